@@ -0,0 +1,79 @@
+"""
+Benchmark: prebuilt-base DOCX builder vs. the basic python-docx builder
+
+Usage:
+    python benchmarks/bench_docx.py
+    python benchmarks/bench_docx.py --sizes 5 20 50 --iterations 30 --json docx.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from profiles.models import CV
+from profiles.services.cv_export_service import CVExportService
+from profiles.services.docx_builder import build_docx
+
+from synthetic import make_sections
+
+
+def time_builder(build, cv, iterations):
+    """Return per-call latencies in milliseconds, after one warm-up call."""
+    build(cv)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        build(cv)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 20, 50], help='Entries per section')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args()
+
+    builders = {
+        'basic': CVExportService._render_docx_basic,
+        'template': lambda cv: build_docx(cv.sections),
+    }
+
+    results = []
+    print(f"{'entries':>8} {'engine':>10} {'p50 ms':>9} {'p95 ms':>9} {'bytes':>8}")
+    for size in args.sizes:
+        cv = CV(title='Benchmark CV', template_key='clean', sections=make_sections(size))
+        for engine, build in builders.items():
+            samples = sorted(time_builder(build, cv, args.iterations))
+            p50 = statistics.median(samples)
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            output_bytes = len(build(cv).getvalue())
+            results.append({
+                'entries': size, 'engine': engine,
+                'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3), 'bytes': output_bytes,
+            })
+            print(f"{size:>8} {engine:>10} {p50:>9.2f} {p95:>9.2f} {output_bytes:>8}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark: CVExportService across templates, CV sizes and formats
+
+Every case (template x format x entries per section) runs in its own forked
+process so peak RSS is attributed to that case alone. The render cache is
+disabled and the template fragment cache is a dummy cache, so each iteration
+is a full render.
+
+Usage:
+    python benchmarks/bench_export.py
+    python benchmarks/bench_export.py --sizes 1 5 20 50 --iterations 10 --json before.json
+    python benchmarks/bench_export.py --json after.json --compare before.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.test import override_settings
+
+from profiles.models import CV
+from profiles.services.cv_export_service import CVExportService
+
+from synthetic import make_sections
+
+TEMPLATES = ['clean', 'modern', 'professional', 'two-column']
+FORMATS = ['pdf', 'docx']
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def export(template_key, export_format, sections):
+    cv = CV(title='Benchmark CV', template_key=template_key, sections=sections)
+    exported = CVExportService.export_file(cv, export_format)
+    exported.close()
+    return exported.size
+
+
+def run_case(template_key, export_format, entries, iterations, queue):
+    """Measure one case in a child process and put the result on ``queue``."""
+    try:
+        sections = make_sections(entries)
+        # Section fragments ({% cache %} in the templates) would otherwise be reused across iterations
+        caches = {**settings.CACHES, 'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CV_RENDER_CACHE_ENABLED=False, CV_RENDER_POOL_WORKERS=0, CACHES=caches):
+            rss_before = peak_rss_mb()
+            output_bytes = export(template_key, export_format, sections)  # warm-up
+
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                export(template_key, export_format, sections)
+                samples.append((time.perf_counter() - start) * 1000)
+
+        queue.put({
+            'template': template_key,
+            'format': export_format,
+            'entries': entries,
+            'p50_ms': round(statistics.median(samples), 3),
+            'p95_ms': round(percentile(samples, 0.95), 3),
+            'mean_ms': round(statistics.mean(samples), 3),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+            'bytes': output_bytes,
+        })
+    except Exception as e:
+        queue.put({
+            'template': template_key, 'format': export_format, 'entries': entries,
+            'error': f'{type(e).__name__}: {str(e)}',
+        })
+
+
+def measure(template_key, export_format, entries, iterations):
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=run_case, args=(template_key, export_format, entries, iterations, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=backend_dir,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_id(result):
+    return result['template'], result['format'], result['entries']
+
+
+def print_results(results):
+    print(f"{'template':>13} {'format':>6} {'entries':>7} {'p50 ms':>9} {'p95 ms':>9} {'peak MB':>8} {'bytes':>9}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['template']:>13} {r['format']:>6} {r['entries']:>7}  ERROR {r['error']}")
+            continue
+        print(f"{r['template']:>13} {r['format']:>6} {r['entries']:>7} {r['p50_ms']:>9.2f} "
+              f"{r['p95_ms']:>9.2f} {r['peak_rss_mb']:>8.1f} {r['bytes']:>9}")
+
+
+def print_comparison(baseline, results):
+    """Print relative change of every metric against a previous run."""
+    previous = {case_id(r): r for r in baseline['results'] if 'error' not in r}
+    print(f"\nCompared with {baseline['meta'].get('revision') or 'baseline'} (negative is better)")
+    print(f"{'template':>13} {'format':>6} {'entries':>7} {'p50':>8} {'p95':>8} {'peak RSS':>9} {'bytes':>8}")
+
+    def delta(new, old):
+        return f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+
+    for r in results:
+        old = previous.get(case_id(r))
+        if old is None or 'error' in r:
+            continue
+        print(f"{r['template']:>13} {r['format']:>6} {r['entries']:>7} "
+              f"{delta(r['p50_ms'], old['p50_ms']):>8} {delta(r['p95_ms'], old['p95_ms']):>8} "
+              f"{delta(r['peak_rss_mb'], old['peak_rss_mb']):>9} {delta(r['bytes'], old['bytes']):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 20, 50], help='Entries per section')
+    parser.add_argument('--templates', nargs='+', default=TEMPLATES, choices=TEMPLATES)
+    parser.add_argument('--formats', nargs='+', default=FORMATS, choices=FORMATS)
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    parser.add_argument('--compare', help='Results file of a previous run to compare against')
+    args = parser.parse_args()
+
+    results = []
+    for export_format in args.formats:
+        for template_key in args.templates:
+            for entries in args.sizes:
+                results.append(measure(template_key, export_format, entries, args.iterations))
+
+    print_results(results)
+
+    output = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+
+    if args.compare:
+        with open(args.compare) as fh:
+            print_comparison(json.load(fh), results)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump(output, fh, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+    if any('error' in r for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
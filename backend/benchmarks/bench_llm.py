@@ -0,0 +1,266 @@
+"""
+Benchmark: end-to-end throughput of the AI endpoints against a fake LLM provider
+
+Starts llm.fake_server.FakeLLMServer in-process (or uses --provider-url, e.g. a
+running `manage.py run_fake_llm`) and points the shared LLM client at it. Each
+scenario is run at every concurrency level with one user and Django test
+client per worker thread, against a throwaway SQLite database. The response
+cache and admission control are off unless asked for, so every request
+reaches the provider.
+
+Scenarios:
+    hint         POST /api/interview/sessions/<id>/hint/
+    generate_cv  POST /api/cvs/generate/
+    feedback     background feedback generation for a submitted 8-question
+                 interview (what submit_interview hands to the feedback runner)
+
+Usage:
+    python benchmarks/bench_llm.py
+    python benchmarks/bench_llm.py --scenarios hint feedback --concurrency 1 4 16 --requests 64
+    python benchmarks/bench_llm.py --latency lognormal:0.8:0.5 --tokens-per-second 150 --error-rate 0.05
+    python benchmarks/bench_llm.py --feedback-mode single --json single.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# Set Django settings; the benchmark gets its own database
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+db_dir = tempfile.mkdtemp(prefix='bench-llm-')
+os.environ['DATABASE_URL'] = f'sqlite:///{db_dir}/bench.sqlite3'
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client, override_settings
+
+from authz.models import User
+from interview.feedback_jobs import run_feedback
+from interview.models import InterviewSession
+from llm.fake_server import FakeLLMServer
+from profiles.models import Profile
+
+from synthetic import make_sections
+
+SCENARIOS = ['hint', 'generate_cv', 'feedback']
+QUESTIONS = [{'id': f'q{i}', 'text': f'Explain concept number {i} and when you would use it.',
+              'category': 'General', 'expected_points': ['definition', 'trade-offs', 'example']}
+             for i in range(1, 9)]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=backend_dir,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_user(index):
+    """User with a filled profile and an interview in progress."""
+    user = User.objects.create_user(email=f'bench{index}@example.com', google_sub=f'bench{index}')
+    sections = make_sections(5, seed=index)
+    Profile.objects.update_or_create(user=user, defaults={
+        'summary': sections['summary'],
+        'experience': [
+            {'title': e['position'], 'company': e['company'], 'start': e['start_date'], 'end': e['end_date'],
+             'description': e['description']}
+            for e in sections['experience']
+        ],
+        'education': [
+            {'degree': e['degree'], 'institution': e['institution'], 'year': e['end_date'][:4],
+             'description': e['description']}
+            for e in sections['education']
+        ],
+        'skills': sections['skills'],
+        'projects': [
+            {'title': p['name'], 'description': p['description'], 'tech': ', '.join(p['technologies']),
+             'link': p['url']}
+            for p in sections['projects']
+        ],
+    })
+    session = InterviewSession.objects.create(user=user, questions=QUESTIONS, status='in_progress')
+    client = Client()
+    client.force_login(user)
+    return {'user': user, 'client': client, 'session': session}
+
+
+def run_hint(worker, n):
+    response = worker['client'].post(
+        f"/api/interview/sessions/{worker['session'].id}/hint/",
+        {'question_id': 'q1', 'current_answer': f'My attempt number {n}'},
+        content_type='application/json',
+    )
+    return response.status_code < 300
+
+
+def run_generate_cv(worker, n):
+    response = worker['client'].post(
+        '/api/cvs/generate/', {'job_description': f'Backend engineer, opening {n}'},
+        content_type='application/json',
+    )
+    return response.status_code < 300
+
+
+def run_feedback_job(worker, n):
+    session = InterviewSession.objects.create(
+        user=worker['user'], questions=QUESTIONS, status='completed', score=70, ai_feedback_status='running',
+        answers=[{'question_id': q['id'], 'text': f'Answer {n} to {q["id"]}: a definition, trade-offs and an example.',
+                  'time_spent': 60} for q in QUESTIONS],
+    )
+    return run_feedback(session).ai_feedback_status == 'completed'
+
+
+RUNNERS = {'hint': run_hint, 'generate_cv': run_generate_cv, 'feedback': run_feedback_job}
+
+
+def measure(scenario, concurrency, requests, workers):
+    """Run ``requests`` calls of a scenario on ``concurrency`` threads."""
+    local = threading.local()
+    free = list(workers[:concurrency])
+    free_lock = threading.Lock()
+    run = RUNNERS[scenario]
+
+    def call(n):
+        if not hasattr(local, 'worker'):
+            with free_lock:
+                local.worker = free.pop()
+        start = time.perf_counter()
+        try:
+            ok = run(local.worker, n)
+        except Exception:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(call, range(requests)))
+    wall = time.perf_counter() - started
+
+    samples = [ms for ms, _ in outcomes]
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': sum(1 for _, ok in outcomes if not ok),
+        'throughput_rps': round(requests / wall, 2),
+        'p50_ms': round(statistics.median(samples), 1),
+        'p95_ms': round(percentile(samples, 0.95), 1),
+        'max_ms': round(max(samples), 1),
+    }
+
+
+def print_results(results):
+    print(f"{'scenario':>12} {'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'errors':>7}")
+    for r in results:
+        print(f"{r['scenario']:>12} {r['concurrency']:>5} {r['throughput_rps']:>8.2f} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['max_ms']:>9.1f} {r['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--requests', type=int, default=24, help='Requests per scenario and concurrency level')
+    parser.add_argument('--provider-url', help='Use this provider instead of starting a fake one')
+    parser.add_argument('--latency', default='lognormal:0.5:0.4', help='Fake provider time to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=250)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--feedback-mode', choices=['per_question', 'single'], default='per_question')
+    parser.add_argument('--cache', action='store_true', help='Keep the LLM response cache on')
+    parser.add_argument('--admission', action='store_true', help='Keep admission control on')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args()
+
+    fake = None
+    provider_url = args.provider_url
+    if provider_url is None:
+        fake = FakeLLMServer(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                             error_rate=args.error_rate, seed=0).start()
+        provider_url = fake.url
+
+    overrides = override_settings(
+        LLM_PROVIDER_URL=provider_url,
+        LLM_API_KEY='fake',
+        LLM_POOL_SIZE=max(settings.LLM_POOL_SIZE, max(args.concurrency) * settings.INTERVIEW_FEEDBACK_CONCURRENCY),
+        LLM_CACHE_ENABLED=args.cache,
+        ADMISSION_CONTROL_ENABLED=args.admission,
+        INTERVIEW_FEEDBACK_MODE=args.feedback_mode,
+        INTERVIEW_FEEDBACK_RUNNER='worker',
+    )
+    overrides.enable()
+    logging.getLogger('llm').setLevel(logging.WARNING)
+    settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 30
+
+    try:
+        call_command('migrate', verbosity=0)
+        call_command('createcachetable', verbosity=0)
+        workers = [make_user(i) for i in range(max(args.concurrency))]
+
+        results = []
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                results.append(measure(scenario, concurrency, args.requests, workers))
+        print_results(results)
+    finally:
+        overrides.disable()
+        if fake is not None:
+            fake.stop()
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+    output = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'provider': args.provider_url or {
+                'latency': args.latency,
+                'tokens_per_second': args.tokens_per_second,
+                'error_rate': args.error_rate,
+            },
+            'feedback_mode': args.feedback_mode,
+            'provider_stats': fake.stats if fake is not None else None,
+        },
+        'results': results,
+    }
+
+    if fake is not None:
+        print(f"\nFake provider: {fake.stats['requests']} requests, {fake.stats['errors']} simulated errors, "
+              f"{fake.stats['completion_tokens']} completion tokens")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump(output, fh, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Synthetic CV sections for export benchmarks.
+"""
+import random
+
+WORDS = (
+    'design build scale ship improve migrate automate optimize lead mentor '
+    'platform service pipeline api latency throughput reliability customer '
+    'feature release review dashboard metrics database cache queue cloud'
+).split()
+
+SKILL_CATEGORIES = ['Technical', 'Tools', 'Soft Skills']
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def make_sections(entries, seed=0):
+    """
+    Build a CV ``sections`` payload with ``entries`` items in every list section.
+
+    The payload is in the canonical shape of ``profiles.services.sections``,
+    the one templates read, as a CV has after it is saved.
+
+    The same ``entries`` and ``seed`` always produce the same payload, so
+    results from different commits are comparable.
+    """
+    rng = random.Random(seed)
+    return {
+        'personal': {
+            'name': 'Benchmark User',
+            'email': 'bench@example.com',
+            'phone': '+1 555-0100',
+            'location': 'Kyiv, Ukraine',
+            'linkedin': 'https://linkedin.com/in/bench',
+            'github': 'https://github.com/bench',
+        },
+        'summary': ' '.join(_sentence(rng, 14) for _ in range(3)),
+        'experience': [
+            {
+                'position': f'Engineer {i}',
+                'company': f'Company {i}',
+                'start_date': f'{2000 + i % 20}-01',
+                'end_date': f'{2001 + i % 20}-06',
+                'location': 'Remote',
+                'description': ' '.join(_sentence(rng, 18) for _ in range(3)),
+            }
+            for i in range(entries)
+        ],
+        'education': [
+            {
+                'degree': f'Degree {i}',
+                'institution': f'University {i}',
+                'start_date': f'{1995 + i % 20}-09',
+                'end_date': f'{1999 + i % 20}-06',
+                'description': _sentence(rng, 16),
+            }
+            for i in range(entries)
+        ],
+        'skills': [
+            {'name': f'Skill {i}', 'category': SKILL_CATEGORIES[i % len(SKILL_CATEGORIES)]}
+            for i in range(entries)
+        ],
+        'projects': [
+            {
+                'name': f'Project {i}',
+                'description': ' '.join(_sentence(rng, 16) for _ in range(2)),
+                'technologies': ['Python', 'Django', 'React'],
+                'url': f'https://example.com/project-{i}',
+            }
+            for i in range(entries)
+        ],
+    }
@@ -11,6 +11,7 @@ python manage.py collectstatic --no-input
 
 # Run migrations
 python manage.py migrate --no-input
+python manage.py createcachetable
 
 # Create logs directory
 mkdir -p logs
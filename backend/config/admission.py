@@ -0,0 +1,262 @@
+"""
+Admission control for slow endpoints.
+
+Exports, AI generation and interview submission hold a gunicorn thread for
+seconds. Each endpoint class gets a concurrency limit and a small wait queue,
+both shared by every worker process on the host through ``flock`` locks on
+slot files. A process that dies releases its locks with it, so slots never
+leak. Each holder also writes its pid into the slot file, which lets
+``metrics`` report occupancy by reading the files instead of probing the
+locks, so looking at the metrics never makes a request queue or fail. On
+top of the per-class limits, ``ADMISSION_MAX_THREADS`` caps how many
+threads gated requests may hold in total, running or queued, which keeps
+threads free for health checks and ordinary requests.
+
+A slot is released when the view returns, before the body is sent, unless
+the view marks a response whose body is generated while it is sent with
+``hold_until_closed``.
+
+Requests that find the queue full, or wait longer than the queue timeout,
+are rejected with ``AdmissionRejected``.
+"""
+import fcntl
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+POLL_INTERVAL = 0.05  # seconds between attempts to take a slot while queued
+
+METRICS_FILE = 'metrics.json'
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted to its endpoint class."""
+
+    def __init__(self, endpoint_class: str, reason: str, retry_after: int):
+        super().__init__(f'{endpoint_class} rejected: {reason}')
+        self.endpoint_class = endpoint_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _try_lock(path: Path) -> Optional[int]:
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    # Marker read by Semaphore.held()
+    os.ftruncate(fd, 0)
+    os.pwrite(fd, str(os.getpid()).encode(), 0)
+    return fd
+
+
+def _unlock(fd: int) -> None:
+    os.ftruncate(fd, 0)
+    # Closing the descriptor drops its flock
+    os.close(fd)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Semaphore:
+    """Counting semaphore made of ``size`` lock files, shared between processes."""
+
+    def __init__(self, directory: Path, name: str, size: int):
+        self.paths = [directory / f'{name}.{index}.lock' for index in range(size)]
+
+    def try_acquire(self) -> Optional[int]:
+        """Lock a free slot without waiting and return its descriptor, or None."""
+        for path in self.paths:
+            fd = _try_lock(path)
+            if fd is not None:
+                return fd
+        return None
+
+    def held(self) -> int:
+        """
+        Number of slots currently held by any process.
+
+        Read from the holders' pid markers without touching the locks. The
+        marker of a process that died while holding a slot outlives its lock,
+        so markers of dead processes are not counted.
+        """
+        count = 0
+        for path in self.paths:
+            try:
+                marker = path.read_text()
+            except FileNotFoundError:
+                continue
+            if marker.isdigit() and _alive(int(marker)):
+                count += 1
+        return count
+
+
+class Ticket:
+    """Locks held by an admitted request. ``release`` may be called more than once."""
+
+    def __init__(self, descriptors: List[int]):
+        self._descriptors = descriptors
+
+    def release(self) -> None:
+        while self._descriptors:
+            _unlock(self._descriptors.pop())
+
+
+def _directory() -> Path:
+    directory = Path(settings.ADMISSION_CONTROL_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _class_config(endpoint_class: str) -> Dict[str, int]:
+    config = settings.ADMISSION_CLASSES[endpoint_class]
+    return {
+        'concurrency': config['concurrency'],
+        'queue': config.get('queue', 0),
+        'timeout': config.get('timeout', settings.ADMISSION_QUEUE_TIMEOUT),
+        'retry_after': config.get('retry_after', settings.ADMISSION_RETRY_AFTER),
+    }
+
+
+def _record(directory: Path, endpoint_class: str, *counters: str) -> None:
+    """Increment per-class counters in the metrics file shared by all workers."""
+    fd = os.open(directory / METRICS_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        with os.fdopen(os.dup(fd), 'r+') as fh:
+            try:
+                data = json.loads(fh.read() or '{}')
+            except ValueError:
+                data = {}
+            totals = data.setdefault(endpoint_class, {})
+            for counter in counters:
+                totals[counter] = totals.get(counter, 0) + 1
+            fh.seek(0)
+            fh.truncate()
+            fh.write(json.dumps(data))
+    finally:
+        os.close(fd)
+
+
+def admit(endpoint_class: str) -> Ticket:
+    """
+    Wait for a slot of ``endpoint_class`` and return the ticket holding it.
+
+    Raises:
+        AdmissionRejected: if the class and its queue are full, or the queue
+            timeout passes before a slot frees up
+    """
+    config = _class_config(endpoint_class)
+    directory = _directory()
+    held = []
+
+    def reject(reason):
+        _record(directory, endpoint_class, 'rejected', f'rejected_{reason}')
+        raise AdmissionRejected(endpoint_class, reason, config['retry_after'])
+
+    try:
+        thread = Semaphore(directory, 'threads', settings.ADMISSION_MAX_THREADS).try_acquire()
+        if thread is None:
+            reject('busy')
+        held.append(thread)
+
+        slots = Semaphore(directory, f'{endpoint_class}.slot', config['concurrency'])
+        slot = slots.try_acquire()
+        waited = slot is None
+        if waited:
+            position = Semaphore(directory, f'{endpoint_class}.queue', config['queue']).try_acquire()
+            if position is None:
+                reject('queue_full')
+            try:
+                deadline = time.monotonic() + config['timeout']
+                while slot is None:
+                    if time.monotonic() >= deadline:
+                        reject('timeout')
+                    time.sleep(POLL_INTERVAL * random.uniform(0.5, 1.5))
+                    slot = slots.try_acquire()
+            finally:
+                _unlock(position)
+        held.append(slot)
+    except BaseException:
+        Ticket(held).release()
+        raise
+
+    _record(directory, endpoint_class, *(('admitted', 'queued') if waited else ('admitted',)))
+    return Ticket(held)
+
+
+def hold_until_closed(response):
+    """Keep the request's slot until ``response`` is closed instead of when the view returns."""
+    response.admission_hold = True
+    return response
+
+
+@contextmanager
+def admitted(endpoint_class: str):
+    """
+    Hold a slot of ``endpoint_class`` for the ``with`` block.
+
+    For views that gate only part of their work; a no-op when admission
+    control is disabled.
+
+    Raises:
+        AdmissionRejected: as ``admit``
+    """
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        yield
+        return
+    ticket = admit(endpoint_class)
+    try:
+        yield
+    finally:
+        ticket.release()
+
+
+def metrics() -> Dict[str, dict]:
+    """Current occupancy and cumulative counters of every endpoint class on this host."""
+    directory = _directory()
+    try:
+        totals = json.loads((directory / METRICS_FILE).read_text() or '{}')
+    except (FileNotFoundError, ValueError):
+        totals = {}
+
+    classes = {}
+    for endpoint_class in settings.ADMISSION_CLASSES:
+        config = _class_config(endpoint_class)
+        counters = totals.get(endpoint_class, {})
+        classes[endpoint_class] = {
+            'concurrency': config['concurrency'],
+            'queue_size': config['queue'],
+            'in_flight': Semaphore(directory, f'{endpoint_class}.slot', config['concurrency']).held(),
+            'queue_depth': Semaphore(directory, f'{endpoint_class}.queue', config['queue']).held(),
+            'admitted': counters.get('admitted', 0),
+            'queued': counters.get('queued', 0),
+            'rejected': counters.get('rejected', 0),
+            'rejected_queue_full': counters.get('rejected_queue_full', 0),
+            'rejected_timeout': counters.get('rejected_timeout', 0),
+            'rejected_busy': counters.get('rejected_busy', 0),
+        }
+
+    return {
+        'threads': {
+            'limit': settings.ADMISSION_MAX_THREADS,
+            'in_use': Semaphore(directory, 'threads', settings.ADMISSION_MAX_THREADS).held(),
+        },
+        'classes': classes,
+    }
@@ -5,6 +5,8 @@ from django.core.cache import cache
 from django.http import JsonResponse
 from django.conf import settings
 
+from .admission import AdmissionRejected, admit
+
 
 class RateLimitMiddleware:
     """
@@ -79,3 +81,64 @@ class SecurityHeadersMiddleware:
 
         return response
 
+
+
+class AdmissionControlMiddleware:
+    """
+    Limit concurrent requests to slow endpoints, per endpoint class.
+
+    Views are mapped to classes by URL name in ``ADMISSION_ROUTES``; all other
+    requests pass through untouched. Rejected requests get 429 with
+    ``Retry-After``.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self._release(request)
+            raise
+
+        ticket = getattr(request, '_admission_ticket', None)
+        if ticket is not None and getattr(response, 'admission_hold', False):
+            # Generated bodies (ZIP archives) do their work while being sent,
+            # so the slot is kept until the server closes the response
+            close = response.close
+
+            def close_and_release():
+                try:
+                    close()
+                finally:
+                    ticket.release()
+
+            response.close = close_and_release
+        else:
+            self._release(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return None
+
+        endpoint_class = settings.ADMISSION_ROUTES.get(request.resolver_match.view_name)
+        if endpoint_class is None:
+            return None
+
+        try:
+            request._admission_ticket = admit(endpoint_class)
+        except AdmissionRejected as e:
+            response = JsonResponse(
+                {'error': 'Server is busy. Please try again later.'},
+                status=429
+            )
+            response['Retry-After'] = str(e.retry_after)
+            return response
+        return None
+
+    @staticmethod
+    def _release(request):
+        ticket = getattr(request, '_admission_ticket', None)
+        if ticket is not None:
+            ticket.release()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -51,6 +52,7 @@ INSTALLED_APPS = [
     'interview',
     'trainer',
     'files',
+    'llm',
 ]
 
 MIDDLEWARE = [
@@ -64,6 +66,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'config.middleware.SecurityHeadersMiddleware',
+    'config.middleware.AdmissionControlMiddleware',
 ]
 
 # Security Settings
@@ -108,6 +111,19 @@ DATABASES = {
     'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
 }
 
+# Cache
+# 'default' is per process (rate limiting); 'shared' is seen by every worker and
+# needs `python manage.py createcachetable` with the database backend
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', 'hirely_cache'),
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -198,7 +214,7 @@ REST_FRAMEWORK = {
 # CORS Settings
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:5173').split(',')
 CORS_ALLOW_CREDENTIALS = True
-CORS_EXPOSE_HEADERS = ['Content-Disposition', 'Content-Type']
+CORS_EXPOSE_HEADERS = ['Content-Disposition', 'Content-Type', 'Content-Range', 'Accept-Ranges', 'ETag']
 
 # Session Settings
 SESSION_COOKIE_HTTPONLY = True
@@ -214,10 +230,43 @@ GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID', '')
 GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET', '')
 WEB_ORIGIN = os.getenv('WEB_ORIGIN', 'http://localhost:5173')  # Updated to current frontend port
 
-# LLM Settings
-LLM_PROVIDER_URL = os.getenv('LLM_PROVIDER_URL', 'https://api.openai.com/v1')
-LLM_API_KEY = os.getenv('LLM_API_KEY', '')
-LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-3.5-turbo')
+# LLM Settings (any OpenAI-compatible chat completions API; Groq by default)
+LLM_PROVIDER_URL = os.getenv('LLM_PROVIDER_URL', 'https://api.groq.com/openai/v1')
+LLM_API_KEY = os.getenv('LLM_API_KEY') or os.getenv('GROQ_API_KEY', '')
+LLM_MODEL = os.getenv('LLM_MODEL', 'llama-3.3-70b-versatile')
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '20'))  # default deadline per call, retries included, seconds
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+LLM_RETRY_BACKOFF = float(os.getenv('LLM_RETRY_BACKOFF', '0.5'))  # first backoff ceiling, doubled per retry
+LLM_RETRY_BACKOFF_MAX = float(os.getenv('LLM_RETRY_BACKOFF_MAX', '4'))
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '10'))  # keep-alive connections per process
+# Completion cache per process (LRU); call sites without a TTL here are not cached
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'True') == 'True'
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1000'))
+LLM_CACHE_TTLS = {  # call site -> seconds
+    'generate_cv': 3600,
+    'enhance_section': 3600,
+    'interview_feedback': 3600,
+    'interview_answer_review': 86400,
+    'interview_hint': 86400,
+}
+LLM_CACHE_STALE_TTL = int(os.getenv('LLM_CACHE_STALE_TTL', '86400'))  # how long past expiry a reply may stand in for a failing provider
+# Circuit breaker: open after LLM_BREAKER_FAILURES provider failures within LLM_BREAKER_WINDOW seconds,
+# fail fast for LLM_BREAKER_COOLDOWN seconds, then let one probe call through
+LLM_BREAKER_ENABLED = os.getenv('LLM_BREAKER_ENABLED', 'True') == 'True'
+LLM_BREAKER_CACHE = 'shared'
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+LLM_BREAKER_WINDOW = int(os.getenv('LLM_BREAKER_WINDOW', '30'))
+LLM_BREAKER_COOLDOWN = int(os.getenv('LLM_BREAKER_COOLDOWN', '30'))
+# Ask the provider for JSON output in chat_json: '' (off), 'json_object' or 'json_schema'
+LLM_JSON_MODE = os.getenv('LLM_JSON_MODE', '')
+# Estimated prompt tokens per call site; longer profile and interview data is shortened to fit
+LLM_PROMPT_BUDGET = int(os.getenv('LLM_PROMPT_BUDGET', '6000'))
+LLM_PROMPT_BUDGETS = {  # call site -> tokens
+    'generate_cv': 3000,
+    'interview_feedback': 4000,
+    'interview_answer_review': 1000,
+}
 
 # Storage Settings (for PDF/exports)
 STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')  # 'local' or 's3'
@@ -225,6 +274,94 @@ STORAGE_ENDPOINT = os.getenv('STORAGE_ENDPOINT', '')
 STORAGE_BUCKET = os.getenv('STORAGE_BUCKET', 'vectorb-exports')
 STORAGE_ACCESS_KEY = os.getenv('STORAGE_ACCESS_KEY', '')
 STORAGE_SECRET_KEY = os.getenv('STORAGE_SECRET_KEY', '')
+STORAGE_REGION = os.getenv('STORAGE_REGION', 'us-east-1')
+# Outside MEDIA_ROOT: stored documents are only served through authenticated views
+STORAGE_LOCAL_ROOT = Path(os.getenv('STORAGE_LOCAL_ROOT', str(BASE_DIR / 'storage')))
+STORAGE_URL_EXPIRY = int(os.getenv('STORAGE_URL_EXPIRY', '3600'))  # Presigned download lifetime, seconds
+
+# CV render cache (content-addressed PDF/DOCX exports)
+CV_RENDER_CACHE_ENABLED = os.getenv('CV_RENDER_CACHE_ENABLED', 'True') == 'True'
+CV_RENDER_CACHE_DIR = Path(os.getenv('CV_RENDER_CACHE_DIR', str(MEDIA_ROOT / 'render_cache')))
+CV_RENDER_CACHE_MAX_BYTES = int(os.getenv('CV_RENDER_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))  # 256MB
+CV_RENDER_CACHE_MAX_ENTRIES = int(os.getenv('CV_RENDER_CACHE_MAX_ENTRIES', '1000'))
+
+# Background export jobs (drained by `manage.py run_export_worker`)
+EXPORT_JOB_TIMEOUT = int(os.getenv('EXPORT_JOB_TIMEOUT', '300'))  # seconds before a running job is requeued
+EXPORT_JOB_MAX_ATTEMPTS = int(os.getenv('EXPORT_JOB_MAX_ATTEMPTS', '3'))
+EXPORT_JOB_RETRY_BACKOFF = int(os.getenv('EXPORT_JOB_RETRY_BACKOFF', '30'))  # seconds before the first retry, doubled after each
+
+# Eager pre-rendering of exports after a CV is saved (opt-in, needs the export worker)
+CV_PRERENDER_ENABLED = os.getenv('CV_PRERENDER_ENABLED', 'False') == 'True'
+CV_PRERENDER_FORMATS = [f.strip() for f in os.getenv('CV_PRERENDER_FORMATS', 'pdf').split(',') if f.strip()]
+CV_PRERENDER_DEBOUNCE = int(os.getenv('CV_PRERENDER_DEBOUNCE', '10'))  # seconds without edits before rendering
+CV_PRERENDER_MAX_DELAY = int(os.getenv('CV_PRERENDER_MAX_DELAY', '60'))  # stop postponing after this many seconds
+
+# PDF render pool (0 workers renders inside the web process)
+CV_RENDER_POOL_WORKERS = int(os.getenv('CV_RENDER_POOL_WORKERS', '0'))
+CV_RENDER_POOL_MEMORY_LIMIT_MB = int(os.getenv('CV_RENDER_POOL_MEMORY_LIMIT_MB', '768'))  # RLIMIT_AS per render process
+CV_RENDER_POOL_MAX_RENDERS = int(os.getenv('CV_RENDER_POOL_MAX_RENDERS', '50'))  # recycle a process after N renders
+CV_RENDER_TIMEOUT = int(os.getenv('CV_RENDER_TIMEOUT', '30'))  # seconds
+
+# DOCX export engine: 'template' (prebuilt styled base document) or 'basic'
+CV_DOCX_ENGINE = os.getenv('CV_DOCX_ENGINE', 'template')
+
+# First-page thumbnails for CV listings, generated by the export worker (opt-in)
+CV_THUMBNAILS_ENABLED = os.getenv('CV_THUMBNAILS_ENABLED', 'False') == 'True'
+CV_THUMBNAIL_WIDTH = int(os.getenv('CV_THUMBNAIL_WIDTH', '320'))  # pixels
+CV_THUMBNAIL_FORMAT = os.getenv('CV_THUMBNAIL_FORMAT', 'webp')  # 'webp' or 'png'
+
+# Cached template fragments of CV sections, shared by HTML previews and PDF renders
+CV_FRAGMENT_CACHE_TIMEOUT = int(os.getenv('CV_FRAGMENT_CACHE_TIMEOUT', '3600'))
+
+# Bulk ZIP export
+CV_BULK_EXPORT_CONCURRENCY = int(os.getenv('CV_BULK_EXPORT_CONCURRENCY', '4'))
+CV_BULK_EXPORT_MAX_CVS = int(os.getenv('CV_BULK_EXPORT_MAX_CVS', '50'))
+
+# AI interview feedback, generated after submit by 'thread' (pool in the web process)
+# or 'worker' (`manage.py run_feedback_worker`)
+INTERVIEW_FEEDBACK_RUNNER = os.getenv('INTERVIEW_FEEDBACK_RUNNER', 'thread')
+INTERVIEW_FEEDBACK_THREADS = int(os.getenv('INTERVIEW_FEEDBACK_THREADS', '2'))
+INTERVIEW_FEEDBACK_TIMEOUT = int(os.getenv('INTERVIEW_FEEDBACK_TIMEOUT', '300'))  # seconds before a running session is requeued
+INTERVIEW_FEEDBACK_MAX_ATTEMPTS = int(os.getenv('INTERVIEW_FEEDBACK_MAX_ATTEMPTS', '2'))
+# 'per_question' reviews each answer with its own completion, then summarizes; 'single' uses one completion
+INTERVIEW_FEEDBACK_MODE = os.getenv('INTERVIEW_FEEDBACK_MODE', 'per_question')
+INTERVIEW_FEEDBACK_CONCURRENCY = int(os.getenv('INTERVIEW_FEEDBACK_CONCURRENCY', '4'))  # answer reviews in flight per session
+INTERVIEW_FEEDBACK_STREAM_TIMEOUT = int(os.getenv('INTERVIEW_FEEDBACK_STREAM_TIMEOUT', '120'))  # seconds a status stream stays open
+# Hints for empty or short answers come from the bank built by `manage.py build_hint_bank`
+INTERVIEW_HINT_BANK_VARIANTS = int(os.getenv('INTERVIEW_HINT_BANK_VARIANTS', '3'))  # hints generated per question
+INTERVIEW_HINT_BANK_MAX_ANSWER_CHARS = int(os.getenv('INTERVIEW_HINT_BANK_MAX_ANSWER_CHARS', '40'))  # longer answers get a live hint
+
+# Admission control for slow endpoints, shared by all workers on a host through lock files
+ADMISSION_CONTROL_ENABLED = os.getenv('ADMISSION_CONTROL_ENABLED', 'True') == 'True'
+ADMISSION_CONTROL_DIR = Path(os.getenv('ADMISSION_CONTROL_DIR', str(Path(tempfile.gettempdir()) / 'hirely-admission')))
+# Threads gated requests may hold in total (running or queued); keep it below the threads that serve sync views
+ADMISSION_MAX_THREADS = int(os.getenv('ADMISSION_MAX_THREADS', '3'))
+ADMISSION_QUEUE_TIMEOUT = int(os.getenv('ADMISSION_QUEUE_TIMEOUT', '10'))  # seconds a queued request waits for a slot
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '5'))  # seconds, sent with 429 responses
+ADMISSION_CLASSES = {
+    # class: concurrent requests, queued requests (optional: timeout, retry_after)
+    'export': {'concurrency': 2, 'queue': 2},
+    'generate_cv': {'concurrency': 1, 'queue': 1, 'retry_after': 15},
+    'generate_preview': {'concurrency': 1, 'queue': 2},
+    'submit_interview': {'concurrency': 2, 'queue': 2, 'retry_after': 10},
+}
+ADMISSION_ROUTES = {
+    # URL name -> class; generate_cv_with_ai takes its 'generate_cv' slot itself,
+    # after coalescing duplicates, so a double click does not queue or get 429
+    'profiles:cv_export': 'export',
+    'profiles:cv_bulk_export': 'export',
+    'profiles:generate_cv_preview': 'generate_preview',
+    'interview:submit_interview': 'submit_interview',
+}
+# Bearer token for /api/metrics/admission/ (staff sessions are always allowed)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Single-flight: identical concurrent AI generations run once and share the result across workers
+SINGLE_FLIGHT_CACHE = os.getenv('SINGLE_FLIGHT_CACHE', 'shared')
+SINGLE_FLIGHT_WAIT = int(os.getenv('SINGLE_FLIGHT_WAIT', '50'))  # seconds a duplicate waits for the running call
+SINGLE_FLIGHT_LOCK_TTL = int(os.getenv('SINGLE_FLIGHT_LOCK_TTL', '60'))  # frees the key if a worker dies mid-call
+SINGLE_FLIGHT_RESULT_TTL = int(os.getenv('SINGLE_FLIGHT_RESULT_TTL', '30'))  # seconds late retries get the same result
+SINGLE_FLIGHT_ERROR_TTL = int(os.getenv('SINGLE_FLIGHT_ERROR_TTL', '5'))  # seconds waiters still get a failed result
 
 # Logging Configuration
 LOGGING = {
@@ -260,6 +397,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'llm': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
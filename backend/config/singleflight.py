@@ -0,0 +1,81 @@
+"""
+Coalescing of identical concurrent requests across workers.
+
+``single_flight(key, compute)`` runs ``compute`` once for all callers that
+share ``key`` at the same time. The first caller takes a lock in the
+``SINGLE_FLIGHT_CACHE`` cache and computes; the others poll until its result
+appears and return that instead of computing again. The result stays
+available for ``SINGLE_FLIGHT_RESULT_TTL`` seconds, so retries that arrive
+just after the computation finished get it too; callers can shorten that
+with ``remember``, e.g. for errors. If the computing worker
+dies, its lock expires after ``SINGLE_FLIGHT_LOCK_TTL`` seconds and a waiting
+caller takes over.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+POLL_INTERVAL = 0.2
+_MISSING = object()
+
+
+class SingleFlightTimeout(Exception):
+    """Raised when a caller gave up waiting for the computation of its key."""
+
+
+def input_hash(*parts: Any) -> str:
+    """Stable hash of JSON-like request inputs."""
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _cache():
+    return caches[settings.SINGLE_FLIGHT_CACHE]
+
+
+def _result_key(key: str) -> str:
+    return f'singleflight:{key}:result'
+
+
+def remember(key: str, value: Any, ttl: Optional[int] = None) -> None:
+    """Make ``value`` the result of ``key`` for ``ttl`` seconds (default ``SINGLE_FLIGHT_RESULT_TTL``)."""
+    _cache().set(_result_key(key), value, settings.SINGLE_FLIGHT_RESULT_TTL if ttl is None else ttl)
+
+
+def single_flight(key: str, compute: Callable[[], Any], wait: Optional[float] = None) -> Tuple[Any, bool]:
+    """
+    Return ``compute()``, or the result of an identical call already running.
+
+    Returns:
+        (result, shared): ``shared`` is True if another call computed it
+
+    Raises:
+        SingleFlightTimeout: if another caller holds the key for longer than
+            ``wait`` seconds (default ``SINGLE_FLIGHT_WAIT``)
+    """
+    cache = _cache()
+    lock_key = f'singleflight:{key}:lock'
+    result_key = _result_key(key)
+    expires = time.monotonic() + (settings.SINGLE_FLIGHT_WAIT if wait is None else wait)
+
+    while True:
+        result = cache.get(result_key, _MISSING)
+        if result is not _MISSING:
+            return result, True
+
+        if cache.add(lock_key, os.getpid(), settings.SINGLE_FLIGHT_LOCK_TTL):
+            try:
+                result = compute()
+                cache.set(result_key, result, settings.SINGLE_FLIGHT_RESULT_TTL)
+                return result, False
+            finally:
+                cache.delete(lock_key)
+
+        if time.monotonic() >= expires:
+            raise SingleFlightTimeout(f'Timed out waiting for {key}')
+        time.sleep(POLL_INTERVAL)
@@ -0,0 +1,176 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from .admission import AdmissionRejected, Semaphore, Ticket, admit, hold_until_closed, metrics
+from .middleware import AdmissionControlMiddleware
+
+User = get_user_model()
+
+
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        settings_override = override_settings(
+            ADMISSION_CONTROL_ENABLED=True,
+            ADMISSION_CONTROL_DIR=self.tmpdir,
+            ADMISSION_MAX_THREADS=3,
+            ADMISSION_QUEUE_TIMEOUT=1,
+            ADMISSION_RETRY_AFTER=7,
+            ADMISSION_CLASSES={'export': {'concurrency': 1, 'queue': 1}},
+            ADMISSION_ROUTES={'profiles:cv_export': 'export'},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_semaphore_is_shared_between_descriptors(self):
+        semaphore = Semaphore(Path(self.tmpdir), 'test', 2)
+        first = semaphore.try_acquire()
+        second = semaphore.try_acquire()
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertIsNone(semaphore.try_acquire())
+        self.assertEqual(semaphore.held(), 2)
+
+        Ticket([first]).release()
+        self.assertEqual(semaphore.held(), 1)
+        Ticket([second]).release()
+        self.assertEqual(semaphore.held(), 0)
+
+    def test_held_does_not_take_locks(self):
+        semaphore = Semaphore(Path(self.tmpdir), 'test', 2)
+        ticket = Ticket([semaphore.try_acquire()])
+        self.addCleanup(ticket.release)
+
+        with mock.patch('config.admission.fcntl.flock') as flock:
+            self.assertEqual(semaphore.held(), 1)
+            metrics()
+        flock.assert_not_called()
+
+    def test_slot_of_dead_process_is_not_counted(self):
+        import subprocess
+
+        child = subprocess.Popen(['true'])
+        child.wait()
+        semaphore = Semaphore(Path(self.tmpdir), 'test', 1)
+        semaphore.paths[0].write_text(str(child.pid))
+        self.assertEqual(semaphore.held(), 0)
+
+    def test_queued_request_is_admitted_when_slot_frees(self):
+        running = admit('export')
+        threading.Timer(0.2, running.release).start()
+
+        ticket = admit('export')
+        ticket.release()
+
+        snapshot = metrics()['classes']['export']
+        self.assertEqual(snapshot['admitted'], 2)
+        self.assertEqual(snapshot['queued'], 1)
+        self.assertEqual(snapshot['in_flight'], 0)
+
+    def test_rejects_when_queue_is_full(self):
+        running = admit('export')
+        self.addCleanup(running.release)
+        waiting = threading.Thread(target=lambda: self.assertRaises(AdmissionRejected, admit, 'export'))
+        waiting.start()
+        time.sleep(0.1)
+
+        self.assertEqual(metrics()['classes']['export']['queue_depth'], 1)
+        with self.assertRaises(AdmissionRejected) as ctx:
+            admit('export')
+        self.assertEqual(ctx.exception.reason, 'queue_full')
+        self.assertEqual(ctx.exception.retry_after, 7)
+        waiting.join()
+
+        snapshot = metrics()['classes']['export']
+        self.assertEqual(snapshot['rejected_queue_full'], 1)
+        self.assertEqual(snapshot['rejected_timeout'], 1)
+
+    def test_thread_cap_covers_all_classes(self):
+        with override_settings(ADMISSION_MAX_THREADS=1):
+            ticket = admit('export')
+            self.addCleanup(ticket.release)
+            with self.assertRaises(AdmissionRejected) as ctx:
+                admit('export')
+        self.assertEqual(ctx.exception.reason, 'busy')
+
+    def test_gated_view_returns_429_with_retry_after(self):
+        user = User.objects.create_user(email='busy@example.com', google_sub='google901')
+        self.client.force_login(user)
+
+        with override_settings(ADMISSION_CLASSES={'export': {'concurrency': 1, 'queue': 0}}):
+            ticket = admit('export')
+            self.addCleanup(ticket.release)
+            response = self.client.get(f'/api/cvs/{uuid.uuid4()}/export/?format=pdf')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '7')
+
+    def test_slot_is_released_after_response(self):
+        user = User.objects.create_user(email='done@example.com', google_sub='google902')
+        self.client.force_login(user)
+
+        response = self.client.get(f'/api/cvs/{uuid.uuid4()}/export/?format=pdf')
+
+        self.assertEqual(response.status_code, 404)
+        snapshot = metrics()['classes']['export']
+        self.assertEqual(snapshot['admitted'], 1)
+        self.assertEqual(snapshot['in_flight'], 0)
+        self.assertEqual(metrics()['threads']['in_use'], 0)
+
+    def _stream_through_middleware(self, response):
+        request = RequestFactory().get('/')
+
+        def get_response(request):
+            request._admission_ticket = admit('export')
+            return response
+
+        return AdmissionControlMiddleware(get_response)(request)
+
+    def test_streamed_response_releases_slot_before_body_is_sent(self):
+        response = self._stream_through_middleware(
+            StreamingHttpResponse(iter([b'part']), status=206)
+        )
+
+        self.assertEqual(metrics()['classes']['export']['in_flight'], 0)
+        self.assertEqual(metrics()['threads']['in_use'], 0)
+        self.assertEqual(b''.join(response.streaming_content), b'part')
+
+    def test_held_response_keeps_slot_until_closed(self):
+        response = self._stream_through_middleware(
+            hold_until_closed(StreamingHttpResponse(iter([b'PK'])))
+        )
+
+        self.assertEqual(b''.join(response.streaming_content), b'PK')
+        self.assertEqual(metrics()['classes']['export']['in_flight'], 1)
+        response.close()
+        self.assertEqual(metrics()['classes']['export']['in_flight'], 0)
+        self.assertEqual(metrics()['threads']['in_use'], 0)
+
+    def test_health_check_is_never_gated(self):
+        with mock.patch('config.middleware.admit') as admit_mock:
+            response = self.client.get('/api/health/')
+        self.assertEqual(response.status_code, 200)
+        admit_mock.assert_not_called()
+
+    def test_metrics_endpoint_requires_staff_or_token(self):
+        self.assertEqual(self.client.get('/api/metrics/admission/').status_code, 403)
+
+        with override_settings(METRICS_TOKEN='secret'):
+            response = self.client.get('/api/metrics/admission/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('export', response.json()['classes'])
+
+        staff = User.objects.create_user(email='staff@example.com', google_sub='google903', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/api/metrics/admission/').status_code, 200)
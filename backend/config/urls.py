@@ -19,16 +19,49 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
 
 from interview.llama_api import ask_llama
 
+from llm.breaker import breaker as llm_breaker
+from llm.cache import get_cache as get_llm_cache
+
+from .admission import metrics as admission_snapshot
+
 def health_check(request):
     """Health check endpoint for monitoring"""
     return JsonResponse({"status": "ok", "service": "hirely-backend"})
 
+def metrics_allowed(request):
+    """Metrics are served to staff sessions and to holders of METRICS_TOKEN"""
+    auth = request.META.get('HTTP_AUTHORIZATION', '')
+    token_ok = bool(settings.METRICS_TOKEN) and constant_time_compare(auth, f'Bearer {settings.METRICS_TOKEN}')
+    return token_ok or request.user.is_staff
+
+def admission_metrics(request):
+    """Queue depth, in-flight requests and rejection counts of gated endpoints"""
+    if not metrics_allowed(request):
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return JsonResponse(admission_snapshot())
+
+def llm_cache_metrics(request):
+    """Hit/miss counters of this worker's LLM completion cache"""
+    if not metrics_allowed(request):
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return JsonResponse(get_llm_cache().stats())
+
+def llm_breaker_metrics(request):
+    """State of the LLM provider circuit breaker, shared by all workers"""
+    if not metrics_allowed(request):
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return JsonResponse(llm_breaker.state())
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/health/', health_check, name='health_check'),
+    path('api/metrics/admission/', admission_metrics, name='admission_metrics'),
+    path('api/metrics/llm-cache/', llm_cache_metrics, name='llm_cache_metrics'),
+    path('api/metrics/llm-breaker/', llm_breaker_metrics, name='llm_breaker_metrics'),
     path('api/auth/', include('authz.urls')),
     path('api/interview/', include('interview.urls')),
     path('api/trainer/', include('trainer.urls')),
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Discover fonts once per worker instead of on the first export
+try:
+    from profiles.services.stylesheets import warm_stylesheets
+    warm_stylesheets()
+except Exception as e:
+    print(f"Warning: Failed to preload CV stylesheets: {e}")
@@ -1,11 +1,18 @@
 from django.contrib import admin
-from .models import InterviewSession
+from .models import InterviewSession, QuestionHint
 
 
 @admin.register(InterviewSession)
 class InterviewSessionAdmin(admin.ModelAdmin):
-    list_display = ['user', 'status', 'score', 'started_at', 'ended_at']
-    list_filter = ['status', 'started_at']
+    list_display = ['user', 'status', 'score', 'ai_feedback_status', 'started_at', 'ended_at']
+    list_filter = ['status', 'ai_feedback_status', 'started_at']
     search_fields = ['user__email']
     readonly_fields = ['user', 'started_at', 'ended_at', 'duration_sec', 'score']
     ordering = ['-started_at']
+
+
+@admin.register(QuestionHint)
+class QuestionHintAdmin(admin.ModelAdmin):
+    list_display = ['question_id', 'text', 'created_at']
+    search_fields = ['question_id', 'text']
+    ordering = ['question_id', 'id']
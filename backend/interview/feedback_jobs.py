@@ -0,0 +1,170 @@
+"""
+Background generation of AI feedback for submitted interviews.
+
+``submit_interview`` saves the session with ``ai_feedback_status='pending'``
+and calls ``dispatch_feedback``. Depending on ``INTERVIEW_FEEDBACK_RUNNER``
+the session is then picked up by a small thread pool inside the web process
+(``thread``) or by ``manage.py run_feedback_worker`` (``worker``). Either way
+a session is claimed with a conditional UPDATE, so it is processed once even
+when both runners are active.
+
+The thread pool dies with its process, so ``get_interview_session`` calls
+``resume_feedback``: a session that is pending but not queued here, or left
+running past ``INTERVIEW_FEEDBACK_TIMEOUT``, is dispatched again.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import InterviewSession
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_FEEDBACK = {
+    'strengths': ['Completed the interview'],
+    'weaknesses': ['AI feedback not available'],
+    'tips': ['Practice explaining concepts with real-world examples'],
+    'overall_assessment': 'Unable to generate detailed feedback at this time.',
+    'recommendation': 'Please try again or contact support.'
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+# Sessions submitted to this process's pool and not finished yet
+_queued = set()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.INTERVIEW_FEEDBACK_THREADS, thread_name_prefix='interview-feedback'
+            )
+        return _executor
+
+
+def dispatch_feedback(session: InterviewSession) -> None:
+    """Hand a pending session to the configured runner once the current transaction commits."""
+    if settings.INTERVIEW_FEEDBACK_RUNNER != 'thread':
+        return  # run_feedback_worker polls for pending sessions
+
+    session_id = session.id
+    transaction.on_commit(lambda: _submit(session_id))
+
+
+def resume_feedback(session: InterviewSession) -> None:
+    """Dispatch again a session whose in-process runner was lost, e.g. to a restart."""
+    if settings.INTERVIEW_FEEDBACK_RUNNER != 'thread':
+        return
+    if session.ai_feedback_status == 'running' and not requeue_stale_sessions(session.id):
+        return
+    if session.ai_feedback_status in ('pending', 'running'):
+        _submit(session.id)
+
+
+def _submit(session_id) -> None:
+    with _executor_lock:
+        if session_id in _queued:
+            return
+        _queued.add(session_id)
+    _get_executor().submit(_run_in_thread, session_id)
+
+
+def _run_in_thread(session_id) -> None:
+    try:
+        # Failed attempts go back to pending; retry them here until the limit
+        session = claim_session(session_id)
+        while session is not None:
+            run_feedback(session)
+            session = claim_session(session_id)
+    except Exception:
+        logger.exception(f"Background feedback for session {session_id} crashed")
+    finally:
+        with _executor_lock:
+            _queued.discard(session_id)
+        close_old_connections()
+
+
+def requeue_stale_sessions(session_id=None) -> int:
+    """
+    Return sessions whose runner died mid-generation to the pending state.
+
+    A session that has used up ``INTERVIEW_FEEDBACK_MAX_ATTEMPTS`` gets the
+    fallback feedback and is marked failed instead, so one that keeps
+    killing its runner is not retried forever.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.INTERVIEW_FEEDBACK_TIMEOUT)
+    stale = InterviewSession.objects.filter(ai_feedback_status='running', ai_feedback_started_at__lt=cutoff)
+    if session_id is not None:
+        stale = stale.filter(id=session_id)
+    stale.filter(ai_feedback_attempts__gte=settings.INTERVIEW_FEEDBACK_MAX_ATTEMPTS).update(
+        ai_feedback=FALLBACK_FEEDBACK, detailed_review=[], ai_feedback_status='failed'
+    )
+    return stale.update(ai_feedback_status='pending')
+
+
+def claim_session(session_id=None) -> Optional[InterviewSession]:
+    """
+    Atomically take a pending session, the given one or the oldest.
+
+    Only one runner sees the conditional UPDATE change the row.
+    """
+    while True:
+        pending = InterviewSession.objects.filter(ai_feedback_status='pending')
+        if session_id is not None:
+            pending = pending.filter(id=session_id)
+        session = pending.order_by('ended_at').first()
+        if session is None:
+            return None
+
+        claimed = InterviewSession.objects.filter(id=session.id, ai_feedback_status='pending').update(
+            ai_feedback_status='running',
+            ai_feedback_started_at=timezone.now(),
+            ai_feedback_attempts=session.ai_feedback_attempts + 1,
+        )
+        if claimed:
+            session.refresh_from_db()
+            return session
+
+
+def run_feedback(session: InterviewSession) -> InterviewSession:
+    """Generate feedback for a claimed session and record the outcome."""
+    from .llama_api import generate_interview_feedback
+
+    try:
+        overall_feedback, detailed_review = generate_interview_feedback(session)
+        session.ai_feedback = overall_feedback
+        session.detailed_review = detailed_review
+        session.ai_feedback_status = 'completed'
+    except Exception as e:
+        logger.exception(f"Feedback for session {session.id} failed: {str(e)}")
+        if session.ai_feedback_attempts < settings.INTERVIEW_FEEDBACK_MAX_ATTEMPTS:
+            session.ai_feedback_status = 'pending'
+        else:
+            session.ai_feedback = FALLBACK_FEEDBACK
+            session.detailed_review = []
+            session.ai_feedback_status = 'failed'
+
+    session.save(update_fields=['ai_feedback', 'detailed_review', 'ai_feedback_status'])
+    return session
+
+
+def process_pending(max_sessions: Optional[int] = None) -> int:
+    """Generate feedback for pending sessions, returning how many were processed."""
+    requeue_stale_sessions()
+
+    processed = 0
+    while max_sessions is None or processed < max_sessions:
+        session = claim_session()
+        if session is None:
+            break
+        run_feedback(session)
+        processed += 1
+    return processed
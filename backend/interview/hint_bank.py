@@ -0,0 +1,143 @@
+"""
+Bank of pregenerated hints for the questions in QUESTION_BANK.
+
+Until the candidate has written something, a hint depends only on the
+question text, and the question bank is small and static. ``manage.py
+build_hint_bank`` therefore generates a few hint variants per question
+ahead of time. ``get_ai_hint`` and ``stream_ai_hint`` serve a random variant
+while the answer is empty or at most ``INTERVIEW_HINT_BANK_MAX_ANSWER_CHARS``
+characters long. They call the model only for substantive partial answers
+and for questions that have no banked hints.
+
+Hints are keyed by a hash of the question text, so editing a question
+retires its old hints until the bank is rebuilt.
+"""
+import hashlib
+import logging
+import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from llm.client import LLMError, chat
+from .models import QuestionHint
+
+logger = logging.getLogger(__name__)
+
+
+def question_hash(question_text: str) -> str:
+    return hashlib.sha256(question_text.strip().encode('utf-8')).hexdigest()
+
+
+def serves_from_bank(current_answer: str) -> bool:
+    """Whether a hint for this answer may come from the bank."""
+    return len((current_answer or '').strip()) <= settings.INTERVIEW_HINT_BANK_MAX_ANSWER_CHARS
+
+
+def banked_hint(question_text: str) -> Optional[str]:
+    """A random banked hint for the question, or None if it has none."""
+    hints = list(
+        QuestionHint.objects.filter(question_hash=question_hash(question_text)).values_list('text', flat=True)
+    )
+    return random.choice(hints) if hints else None
+
+
+async def abanked_hint(question_text: str) -> Optional[str]:
+    """Async ``banked_hint``."""
+    hints = [
+        text async for text in
+        QuestionHint.objects.filter(question_hash=question_hash(question_text)).values_list('text', flat=True)
+    ]
+    return random.choice(hints) if hints else None
+
+
+def bank_questions() -> Dict[str, Dict[str, Any]]:
+    """QUESTION_BANK questions by text hash; questions shared by topics appear once."""
+    from .views import QUESTION_BANK
+
+    questions = {}
+    for topic_questions in QUESTION_BANK.values():
+        for question in topic_questions:
+            questions.setdefault(question_hash(question['text']), question)
+    return questions
+
+
+def generate_hint(question_text: str) -> Optional[str]:
+    """One fresh hint for a question that has not been answered yet; None on failure."""
+    from .llama_api import HINT_DEADLINE, hint_messages
+
+    try:
+        hint = chat(
+            hint_messages(question_text),
+            temperature=0.9,
+            max_tokens=200,
+            deadline=HINT_DEADLINE,
+            site="interview_hint_bank"  # not cached: every call must be a new variant
+        )
+    except LLMError as e:
+        logger.warning(f"Hint generation failed for {question_text[:60]!r}: {e}")
+        return None
+    return hint.strip() or None
+
+
+def _generate_hint_in_thread(question_text: str) -> Optional[str]:
+    try:
+        return generate_hint(question_text)
+    finally:
+        # The LLM breaker may use the database; pool threads end with the build
+        connections.close_all()
+
+
+def build_bank(variants: int, replace: bool = False, concurrency: int = 4) -> Dict[str, int]:
+    """
+    Generate hints until every bank question has ``variants`` of them.
+
+    Args:
+        variants: Hints to keep per question
+        replace: Regenerate all hints instead of topping up; a question's
+            old hints are kept if none of its new ones could be generated
+        concurrency: Completions in flight at once
+
+    Returns:
+        dict: Number of questions, created hints, failed generations and
+        removed hints of questions no longer in the bank
+    """
+    questions = bank_questions()
+    removed = QuestionHint.objects.exclude(question_hash__in=questions).delete()[0]
+
+    existing = defaultdict(set)
+    if not replace:
+        for key, text in QuestionHint.objects.values_list('question_hash', 'text'):
+            existing[key].add(text)
+
+    jobs = [
+        key
+        for key in questions
+        for _ in range(variants - len(existing[key]))
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        replies = list(executor.map(lambda key: _generate_hint_in_thread(questions[key]['text']), jobs))
+
+    generated = defaultdict(list)
+    failed = 0
+    for key, hint in zip(jobs, replies):
+        if hint is None:
+            failed += 1
+        elif hint not in existing[key] and hint not in generated[key]:
+            generated[key].append(hint)
+
+    created = 0
+    for key, hints in generated.items():
+        with transaction.atomic():
+            if replace:
+                removed += QuestionHint.objects.filter(question_hash=key).delete()[0]
+            QuestionHint.objects.bulk_create([
+                QuestionHint(question_hash=key, question_id=questions[key]['id'], text=hint)
+                for hint in hints
+            ])
+        created += len(hints)
+
+    return {'questions': len(questions), 'created': created, 'failed': failed, 'removed': removed}
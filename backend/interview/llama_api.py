@@ -1,24 +1,57 @@
-from django.http import JsonResponse
-from groq import Groq
-import os
-from dotenv import load_dotenv
-import json
-
-load_dotenv()
+from concurrent.futures import ThreadPoolExecutor
 
-# Initialize Groq client only if API key is available
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-client = None
-if GROQ_API_KEY:
-    try:
-        client = Groq(api_key=GROQ_API_KEY)
-    except Exception as e:
-        print(f"Warning: Failed to initialize Groq client: {e}")
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+import logging
+
+from llm.client import LLMInvalidResponse, chat, chat_json, is_configured, stream_chat
+from llm.prompt import build_prompt
+from .hint_bank import abanked_hint, banked_hint, serves_from_bank
+
+logger = logging.getLogger(__name__)
+
+# Deadlines per call, retries included, in seconds (gunicorn kills requests at 60s)
+ASK_DEADLINE = 20
+FEEDBACK_DEADLINE = 45
+REVIEW_DEADLINE = 20
+SYNTHESIS_DEADLINE = 20
+HINT_DEADLINE = 10
+
+# Shapes of the JSON replies; also sent to the provider in json_schema mode
+_STRING_LIST = {'type': 'array', 'items': {'type': 'string'}}
+OVERALL_FEEDBACK_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'strengths': _STRING_LIST,
+        'weaknesses': _STRING_LIST,
+        'tips': _STRING_LIST,
+        'overall_assessment': {'type': 'string'},
+        'recommendation': {'type': 'string'},
+    },
+}
+REVIEW_SCHEMA = {
+    'type': 'object',
+    'required': ['answer_review', 'score'],
+    'properties': {
+        'answer_review': {'type': 'string'},
+        'score': {'type': ['number', 'string']},
+        'suggestions': {'type': 'string'},
+    },
+}
+FEEDBACK_SCHEMA = {
+    'type': 'object',
+    'required': ['overall_feedback'],
+    'properties': {
+        'overall_feedback': OVERALL_FEEDBACK_SCHEMA,
+        'detailed_review': {'type': 'array', 'items': {'type': 'object'}},
+    },
+}
 
 def ask_llama(request):
-    if not client:
+    if not is_configured():
         return JsonResponse(
-            {"error": "Groq API key not configured. Please set GROQ_API_KEY in your environment."},
+            {"error": "LLM API key not configured. Please set LLM_API_KEY in your environment."},
             status=503
         )
 
@@ -27,18 +60,21 @@ def ask_llama(request):
         return JsonResponse({"error": "No prompt provided"}, status=400)
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return JsonResponse({"reply": response.choices[0].message.content})
+        reply = chat([{"role": "user", "content": prompt}], deadline=ASK_DEADLINE)
+        return JsonResponse({"reply": reply})
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
 def generate_interview_feedback(session):
     """
-    Generate AI-powered feedback for an interview session using Groq LLM.
+    Generate AI-powered feedback for an interview session using the configured LLM.
+
+    With ``INTERVIEW_FEEDBACK_MODE = 'per_question'`` every answer is reviewed
+    by its own small completion, up to ``INTERVIEW_FEEDBACK_CONCURRENCY`` at a
+    time, and a final short completion writes the overall feedback from those
+    reviews. A failed review only affects its own question. ``'single'`` asks
+    for everything in one completion.
 
     Args:
         session: InterviewSession object with questions and answers
@@ -48,19 +84,26 @@ def generate_interview_feedback(session):
         - overall_feedback: {strengths, weaknesses, tips, overall_assessment, recommendation}
         - detailed_review: [{question_id, answer_review, score, suggestions}]
     """
-    if not client:
+    if not is_configured():
         return (
             {
                 'strengths': ['Completed the interview'],
                 'weaknesses': ['AI feedback unavailable - API key not configured'],
-                'tips': ['Configure GROQ_API_KEY to enable AI feedback'],
+                'tips': ['Configure LLM_API_KEY to enable AI feedback'],
                 'overall_assessment': 'Unable to provide detailed feedback without AI configuration.',
                 'recommendation': 'Try again after configuring the AI system.'
             },
             []
         )
 
-    # Build context for AI
+    questions_and_answers = _questions_and_answers(session)
+    if settings.INTERVIEW_FEEDBACK_MODE == 'per_question' and questions_and_answers:
+        return _per_question_feedback(session, questions_and_answers)
+    return _single_call_feedback(session, questions_and_answers)
+
+
+def _questions_and_answers(session):
+    """Answered questions of a session with the context the reviewer needs."""
     questions_and_answers = []
     for answer in (session.answers or []):
         question = next((q for q in session.questions if q['id'] == answer['question_id']), None)
@@ -72,12 +115,152 @@ def generate_interview_feedback(session):
                 'category': question.get('category', 'General'),
                 'expected_points': question.get('expected_points', [])
             })
+    return questions_and_answers
+
+
+def _default_recommendation(score):
+    score = score or 0
+    if score >= 80:
+        return "Great job! You're ready for real interviews. Consider practicing more advanced topics."
+    elif score >= 60:
+        return "Good effort! Practice the weak areas and retake to improve your confidence."
+    return "Keep practicing! Review the concepts and retake the interview to build your skills."
 
+
+def review_answer(qa):
+    """
+    Review one answer with its own completion.
+
+    Returns:
+        dict: {question_id, answer_review, score, suggestions}; on failure the
+        review says so and ``score`` is None
+    """
+    prompt_template = """You are an expert technical interviewer. Review this single interview answer.
+
+Category: {category}
+Question: {question}
+Key points a strong answer covers: {expected_points}
+Answer: {answer}
+
+Return ONLY valid JSON in this exact format:
+{{
+    "answer_review": "Review of the answer: technical accuracy, depth and clarity (2-3 sentences)",
+    "score": numerical score from 0-10,
+    "suggestions": "Specific suggestions for improvement (1-2 sentences)"
+}}"""
+
+    try:
+        prompt = build_prompt(
+            prompt_template,
+            site="interview_answer_review",
+            category=qa['category'],
+            question=qa['question'],
+            expected_points=', '.join(qa['expected_points']) or 'not specified',
+            answer=qa['answer'],
+        )
+        review = chat_json(
+            [
+                {"role": "system", "content": "You are an expert technical interviewer providing constructive feedback."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=350,
+            schema=REVIEW_SCHEMA,
+            deadline=REVIEW_DEADLINE,
+            site="interview_answer_review"
+        )
+        return {
+            'question_id': qa['question_id'],
+            'answer_review': str(review.get('answer_review', '')),
+            'score': review.get('score'),
+            'suggestions': str(review.get('suggestions', '')),
+        }
+    except Exception as e:
+        logger.warning(f"Review of question {qa['question_id']} failed: {e}")
+        return {
+            'question_id': qa['question_id'],
+            'answer_review': 'Automatic review of this answer is not available right now.',
+            'score': None,
+            'suggestions': 'Compare your answer with the key concepts of the question.',
+        }
+
+
+def _synthesize_feedback(session, questions_and_answers, detailed_review):
+    """Write the overall feedback from the per-question reviews with one short completion."""
+    questions = {qa['question_id']: qa['question'] for qa in questions_and_answers}
+    summary = [
+        {'question': questions.get(review['question_id'], ''), 'score': review['score'],
+         'review': review['answer_review']}
+        for review in detailed_review
+    ]
+    prompt = build_prompt("""You are an expert technical interviewer. These are reviews of each answer in a mock interview:
+
+{reviews}
+
+Summarize them as JSON in this exact format:
+{{
+    "strengths": [list of 3-5 specific strengths],
+    "weaknesses": [list of 3-5 specific areas for improvement],
+    "tips": [list of 3-5 actionable tips for improvement],
+    "overall_assessment": "A brief 2-3 sentence overall assessment",
+    "recommendation": "Should they retake the interview? Suggest next steps (1-2 sentences)"
+}}
+
+Be encouraging but honest.""", site="interview_feedback", reviews=summary)
+
+    try:
+        overall_feedback = chat_json(
+            [
+                {"role": "system", "content": "You are an expert technical interviewer providing constructive feedback."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.5,
+            max_tokens=600,
+            schema=OVERALL_FEEDBACK_SCHEMA,
+            deadline=SYNTHESIS_DEADLINE,
+            site="interview_feedback"
+        )
+    except Exception as e:
+        logger.warning(f"Feedback synthesis for session {session.id} failed: {e}")
+        overall_feedback = None
+
+    fallback = {
+        'strengths': ['Completed the interview'],
+        'weaknesses': ['Review the per-question feedback below'],
+        'tips': [review['suggestions'] for review in detailed_review if review['suggestions']][:5],
+        'overall_assessment': 'Detailed feedback for each answer is available below.',
+    }
+    overall_feedback = overall_feedback or {}
+    for field, value in fallback.items():
+        if not overall_feedback.get(field):
+            overall_feedback[field] = value
+    if not overall_feedback.get('recommendation'):
+        overall_feedback['recommendation'] = _default_recommendation(session.score)
+    return overall_feedback
+
+
+def _review_answer_in_thread(qa):
+    try:
+        return review_answer(qa)
+    finally:
+        # The LLM cache and breaker may use the database; pool threads end with the call
+        connections.close_all()
+
+
+def _per_question_feedback(session, questions_and_answers):
+    workers = max(1, min(settings.INTERVIEW_FEEDBACK_CONCURRENCY, len(questions_and_answers)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='answer-review') as executor:
+        detailed_review = list(executor.map(_review_answer_in_thread, questions_and_answers))
+
+    return (_synthesize_feedback(session, questions_and_answers, detailed_review), detailed_review)
+
+
+def _single_call_feedback(session, questions_and_answers):
     # Create prompt for AI - requesting both overall and detailed feedback
-    prompt = f"""You are an expert technical interviewer. Analyze the following interview responses and provide comprehensive feedback.
+    prompt_template = """You are an expert technical interviewer. Analyze the following interview responses and provide comprehensive feedback.
 
 Interview Questions and Answers:
-{json.dumps(questions_and_answers, indent=2)}
+{questions_and_answers}
 
 Please provide feedback in JSON format with the following structure:
 {{
@@ -106,67 +289,41 @@ Focus on:
 5. Practical examples and real-world understanding
 
 Provide specific, constructive feedback that helps the candidate improve. Be encouraging but honest."""
+    prompt = build_prompt(prompt_template, site="interview_feedback", questions_and_answers=questions_and_answers)
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
+        feedback_data = chat_json(
+            [
                 {"role": "system", "content": "You are an expert technical interviewer providing constructive feedback."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=2500
+            max_tokens=2500,
+            schema=FEEDBACK_SCHEMA,
+            deadline=FEEDBACK_DEADLINE,
+            site="interview_feedback"
         )
+        overall_feedback = feedback_data.get('overall_feedback', {})
+        detailed_review = feedback_data.get('detailed_review', [])
 
-        # Parse AI response
-        ai_response = response.choices[0].message.content
-
-        # Try to extract JSON from response
-        try:
-            # Find JSON in response (might be wrapped in markdown code blocks)
-            json_start = ai_response.find('{')
-            json_end = ai_response.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                feedback_data = json.loads(ai_response[json_start:json_end])
-                overall_feedback = feedback_data.get('overall_feedback', {})
-                detailed_review = feedback_data.get('detailed_review', [])
-
-                # Ensure all required fields exist
-                if not overall_feedback.get('recommendation'):
-                    score = session.score or 0
-                    if score >= 80:
-                        overall_feedback['recommendation'] = "Great job! You're ready for real interviews. Consider practicing more advanced topics."
-                    elif score >= 60:
-                        overall_feedback['recommendation'] = "Good effort! Practice the weak areas and retake to improve your confidence."
-                    else:
-                        overall_feedback['recommendation'] = "Keep practicing! Review the concepts and retake the interview to build your skills."
-
-                return (overall_feedback, detailed_review)
-            else:
-                # Fallback if JSON not found
-                return (
-                    {
-                        'strengths': ['Completed all questions', 'Showed effort in responses'],
-                        'weaknesses': ['Could provide more detailed examples'],
-                        'tips': ['Practice explaining technical concepts with real-world examples'],
-                        'overall_assessment': ai_response[:200],
-                        'recommendation': 'Review the feedback and consider retaking to improve.'
-                    },
-                    []
-                )
-        except json.JSONDecodeError:
-            # Fallback with raw AI response
-            return (
-                {
-                    'strengths': ['Completed the interview'],
-                    'weaknesses': ['Response analysis in progress'],
-                    'tips': ['Continue practicing interview questions'],
-                    'overall_assessment': ai_response[:500] if ai_response else 'Feedback generated successfully.',
-                    'recommendation': 'Practice more and retake when ready.'
-                },
-                []
-            )
+        # Ensure all required fields exist
+        if not overall_feedback.get('recommendation'):
+            overall_feedback['recommendation'] = _default_recommendation(session.score)
 
+        return (overall_feedback, detailed_review)
+
+    except LLMInvalidResponse as e:
+        # Fallback with raw AI response
+        return (
+            {
+                'strengths': ['Completed the interview'],
+                'weaknesses': ['Response analysis in progress'],
+                'tips': ['Continue practicing interview questions'],
+                'overall_assessment': e.reply[:500] if e.reply else 'Feedback generated successfully.',
+                'recommendation': 'Practice more and retake when ready.'
+            },
+            []
+        )
     except Exception as e:
         print(f"Error generating AI feedback: {e}")
         return (
@@ -181,20 +338,12 @@ Provide specific, constructive feedback that helps the candidate improve. Be enc
         )
 
 
-def get_ai_hint(question_text, current_answer=""):
-    """
-    Get an AI hint for a specific interview question.
-
-    Args:
-        question_text: The interview question
-        current_answer: User's current answer (optional)
+HINT_UNAVAILABLE = "AI hints are not available. Please configure LLM_API_KEY."
+HINT_FALLBACK = "Unable to generate hint at this time. Consider the key concepts related to this topic."
 
-    Returns:
-        str: AI-generated hint or guidance
-    """
-    if not client:
-        return "AI hints are not available. Please configure GROQ_API_KEY."
 
+def hint_messages(question_text, current_answer=""):
+    """Chat messages asking for a hint on ``question_text``."""
     prompt = f"""You are a helpful interview coach. A candidate is working on the following question:
 
 Question: {question_text}
@@ -208,21 +357,65 @@ Provide a helpful hint or guidance (2-3 sentences) that:
 
 Keep it encouraging and educational."""
 
+    return [
+        {"role": "system", "content": "You are a supportive interview coach providing hints."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def get_ai_hint(question_text, current_answer=""):
+    """
+    Get an AI hint for a specific interview question.
+
+    Args:
+        question_text: The interview question
+        current_answer: User's current answer (optional)
+
+    Returns:
+        str: AI-generated hint or guidance; a pregenerated one from the hint
+        bank while the answer is empty or short
+    """
+    if serves_from_bank(current_answer):
+        hint = banked_hint(question_text)
+        if hint:
+            return hint
+
+    if not is_configured():
+        return HINT_UNAVAILABLE
+
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a supportive interview coach providing hints."},
-                {"role": "user", "content": prompt}
-            ],
+        hint = chat(
+            hint_messages(question_text, current_answer),
             temperature=0.7,
-            max_tokens=200
+            max_tokens=200,
+            deadline=HINT_DEADLINE,
+            site="interview_hint"
         )
 
-        return response.choices[0].message.content.strip()
+        return hint.strip()
 
     except Exception as e:
         print(f"Error generating hint: {e}")
-        return "Unable to generate hint at this time. Consider the key concepts related to this topic."
-
-
+        return HINT_FALLBACK
+
+
+async def stream_ai_hint(question_text, current_answer=""):
+    """Async generator yielding an AI hint as the provider produces it."""
+    if serves_from_bank(current_answer):
+        hint = await abanked_hint(question_text)
+        if hint:
+            yield hint
+            return
+
+    if not is_configured():
+        yield HINT_UNAVAILABLE
+        return
+
+    async for piece in stream_chat(
+        hint_messages(question_text, current_answer),
+        temperature=0.7,
+        max_tokens=200,
+        deadline=HINT_DEADLINE,
+        site="interview_hint"
+    ):
+        yield piece
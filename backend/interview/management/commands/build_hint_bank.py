@@ -0,0 +1,35 @@
+"""
+Django management command that pregenerates hints for the question bank
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from interview.hint_bank import build_bank
+from llm.client import is_configured
+
+
+class Command(BaseCommand):
+    help = 'Generate hint variants for every question in QUESTION_BANK'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variants', type=int, default=settings.INTERVIEW_HINT_BANK_VARIANTS,
+                            help='Hints to keep per question')
+        parser.add_argument('--replace', action='store_true', help='Regenerate existing hints instead of topping up')
+        parser.add_argument('--concurrency', type=int, default=4, help='LLM calls in flight at once')
+
+    def handle(self, *args, **options):
+        if not is_configured():
+            raise CommandError('LLM_API_KEY is not set')
+        if options['variants'] < 1:
+            raise CommandError('--variants must be at least 1')
+
+        result = build_bank(options['variants'], replace=options['replace'], concurrency=options['concurrency'])
+
+        self.stdout.write(
+            f"{result['questions']} questions: {result['created']} hint(s) created, "
+            f"{result['removed']} removed, {result['failed']} failed"
+        )
+        if result['failed']:
+            self.stdout.write(self.style.WARNING('Run the command again to fill the missing hints'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Hint bank is up to date'))
@@ -0,0 +1,41 @@
+"""
+Django management command that generates AI feedback for submitted interviews
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from interview.feedback_jobs import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Generate AI feedback for submitted interviews in the background'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--max-sessions', type=int, default=None, help='Exit after processing this many sessions')
+
+    def handle(self, *args, **options):
+        once = options['once']
+        poll_interval = options['poll_interval']
+        max_sessions = options['max_sessions']
+        total = 0
+
+        self.stdout.write('Feedback worker started')
+        try:
+            while True:
+                remaining = None if max_sessions is None else max_sessions - total
+                processed = process_pending(max_sessions=remaining)
+                total += processed
+                if processed:
+                    self.stdout.write(f'Generated feedback for {processed} session(s)')
+
+                if once or (max_sessions is not None and total >= max_sessions):
+                    break
+                if not processed:
+                    time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'Feedback worker stopped after {total} session(s)'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:21
+
+from django.db import migrations, models
+
+
+def mark_existing_feedback(apps, schema_editor):
+    # Sessions submitted before feedback moved to the background already have it
+    InterviewSession = apps.get_model('interview', 'InterviewSession')
+    InterviewSession.objects.filter(status='completed').update(ai_feedback_status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0002_interviewsession_can_retake_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewsession',
+            name='ai_feedback_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='interviewsession',
+            name='ai_feedback_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='interviewsession',
+            name='ai_feedback_status',
+            field=models.CharField(choices=[('none', 'Not requested'), ('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='none', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_feedback, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0003_ai_feedback_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionHint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_hash', models.CharField(db_index=True, max_length=64)),
+                ('question_id', models.CharField(max_length=50)),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'interview_question_hints',
+                'ordering': ['question_id', 'id'],
+            },
+        ),
+    ]
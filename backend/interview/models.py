@@ -10,6 +10,13 @@ class InterviewSession(models.Model):
         ('completed', 'Completed'),
         ('abandoned', 'Abandoned'),
     ]
+    FEEDBACK_STATUS_CHOICES = [
+        ('none', 'Not requested'),
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='interview_sessions')
@@ -29,6 +36,10 @@ class InterviewSession(models.Model):
     checklist = models.JSONField(default=list, blank=True)  # [{criterion, passed, notes}]
     ai_feedback = models.JSONField(default=dict, blank=True)  # {strengths, weaknesses, tips, overall_assessment}
     detailed_review = models.JSONField(default=list, blank=True)  # [{question_id, answer_review, score, suggestions}]
+    # AI feedback is generated in the background after submit
+    ai_feedback_status = models.CharField(max_length=20, choices=FEEDBACK_STATUS_CHOICES, default='none', db_index=True)
+    ai_feedback_attempts = models.PositiveIntegerField(default=0)
+    ai_feedback_started_at = models.DateTimeField(null=True, blank=True)
     can_retake = models.BooleanField(default=True)  # Whether the user can retake this interview
 
     class Meta:
@@ -42,3 +53,18 @@ class InterviewSession(models.Model):
     def __str__(self):
         return f"Interview {self.id} by {self.user.email} - {self.status}"
 
+
+
+class QuestionHint(models.Model):
+    """Pregenerated hint for a question bank question, see hint_bank.py."""
+    question_hash = models.CharField(max_length=64, db_index=True)  # sha256 of the question text
+    question_id = models.CharField(max_length=50)
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'interview_question_hints'
+        ordering = ['question_id', 'id']
+
+    def __str__(self):
+        return f"Hint for {self.question_id}"
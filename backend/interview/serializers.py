@@ -8,10 +8,10 @@ class InterviewSessionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'questions', 'answers', 'status', 'started_at', 
             'ended_at', 'duration_sec', 'score', 'checklist', 'ai_feedback',
-            'detailed_review', 'can_retake'
+            'detailed_review', 'ai_feedback_status', 'can_retake'
         ]
         read_only_fields = ['id', 'started_at', 'ended_at', 'duration_sec', 'score',
-                            'checklist', 'ai_feedback', 'detailed_review', 'can_retake']
+                            'checklist', 'ai_feedback', 'detailed_review', 'ai_feedback_status', 'can_retake']
 
 
 class InterviewSessionCreateSerializer(serializers.Serializer):
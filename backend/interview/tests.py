@@ -1,9 +1,17 @@
-from django.test import TestCase
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import InterviewSession
+from .feedback_jobs import process_pending
+from .hint_bank import build_bank, question_hash
+from .models import InterviewSession, QuestionHint
 from profiles.models import Profile
+from llm.client import LLMError
 
 User = get_user_model()
 
@@ -118,3 +126,398 @@ class InterviewTests(TestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+
+
+class HintStreamTests(TestCase):
+    """Test the Server-Sent Events hint endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='stream@example.com', google_sub='google321')
+        self.session = InterviewSession.objects.create(
+            user=self.user,
+            questions=[{'id': 'q1', 'text': 'What is a closure?'}],
+            status='in_progress'
+        )
+
+    async def stream(self, data):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            f'/api/interview/sessions/{self.session.id}/hint/stream/', data, content_type='application/json'
+        )
+        body = b''
+        if response.streaming:
+            body = b''.join([chunk async for chunk in response.streaming_content])
+        return response, body.decode()
+
+    async def test_streams_tokens_then_full_hint(self):
+        async def fake_stream(messages, **kwargs):
+            self.assertIn('What is a closure?', messages[-1]['content'])
+            for piece in ['Think about ', 'scope.']:
+                yield piece
+
+        with mock.patch('interview.llama_api.is_configured', return_value=True), \
+                mock.patch('interview.llama_api.stream_chat', fake_stream):
+            response, body = await self.stream({'question_id': 'q1'})
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn('data: {"token": "Think about "}\n\n', body)
+        self.assertTrue(body.endswith('event: done\ndata: {"hint": "Think about scope."}\n\n'))
+
+    async def test_provider_failure_sends_error_event(self):
+        async def failing_stream(messages, **kwargs):
+            yield 'Think'
+            raise LLMError('connection reset')
+
+        with mock.patch('interview.llama_api.is_configured', return_value=True), \
+                mock.patch('interview.llama_api.stream_chat', failing_stream):
+            response, body = await self.stream({'question_id': 'q1'})
+
+        self.assertIn('event: error', body)
+        self.assertNotIn('event: done', body)
+
+    async def test_unknown_question(self):
+        response, _ = await self.stream({'question_id': 'missing'})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_empty_answer_streams_banked_hint(self):
+        await QuestionHint.objects.acreate(
+            question_hash=question_hash('What is a closure?'), question_id='q1', text='Think about scope.'
+        )
+
+        with mock.patch('interview.llama_api.stream_chat') as stream_chat:
+            response, body = await self.stream({'question_id': 'q1'})
+
+        stream_chat.assert_not_called()
+        self.assertTrue(body.endswith('event: done\ndata: {"hint": "Think about scope."}\n\n'))
+
+
+@override_settings(INTERVIEW_FEEDBACK_RUNNER='worker', INTERVIEW_FEEDBACK_MAX_ATTEMPTS=2)
+class FeedbackJobTests(TestCase):
+    """Test background generation of interview feedback."""
+
+    feedback = ({'strengths': ['Clear'], 'recommendation': 'Ready'}, [{'question_id': 'q1', 'score': 8}])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='feedback@example.com', google_sub='google654')
+        self.client.force_authenticate(user=self.user)
+        self.session = InterviewSession.objects.create(
+            user=self.user,
+            questions=[{'id': 'q1', 'text': 'Question 1?'}],
+            answers=[{'question_id': 'q1', 'text': 'A detailed answer that is long enough to count.', 'time_spent': 60}],
+            status='in_progress'
+        )
+
+    def submit(self):
+        return self.client.post(f'/api/interview/sessions/{self.session.id}/submit/')
+
+    def test_submit_does_not_wait_for_feedback(self):
+        """Test that submit scores the session and leaves feedback pending."""
+        with mock.patch('interview.llama_api.generate_interview_feedback') as generate:
+            response = self.submit()
+
+        generate.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual(response.data['ai_feedback_status'], 'pending')
+        self.assertTrue(float(response.data['score']) > 0)
+
+    def test_worker_fills_feedback(self):
+        """Test that the worker stores feedback and marks it completed."""
+        self.submit()
+        with mock.patch('interview.llama_api.generate_interview_feedback', return_value=self.feedback):
+            self.assertEqual(process_pending(), 1)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.ai_feedback_status, 'completed')
+        self.assertEqual(self.session.ai_feedback['recommendation'], 'Ready')
+        self.assertEqual(self.session.detailed_review[0]['score'], 8)
+        self.assertEqual(process_pending(), 0)
+
+    def test_failures_are_retried_then_marked_failed(self):
+        """Test that a failing session is retried up to the attempt limit."""
+        self.submit()
+        with mock.patch('interview.llama_api.generate_interview_feedback', side_effect=RuntimeError('boom')):
+            self.assertEqual(process_pending(max_sessions=1), 1)
+            self.session.refresh_from_db()
+            self.assertEqual(self.session.ai_feedback_status, 'pending')
+
+            self.assertEqual(process_pending(max_sessions=1), 1)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.ai_feedback_status, 'failed')
+        self.assertIn('strengths', self.session.ai_feedback)
+
+    def test_thread_runner_processes_after_commit(self):
+        """Test that the in-process runner picks the session up once submit commits."""
+        executor = mock.Mock()
+        executor.submit.side_effect = lambda fn, *args: fn(*args)
+
+        with override_settings(INTERVIEW_FEEDBACK_RUNNER='thread'), \
+                mock.patch('interview.feedback_jobs._get_executor', return_value=executor), \
+                mock.patch('interview.feedback_jobs.close_old_connections'), \
+                mock.patch('interview.llama_api.generate_interview_feedback', return_value=self.feedback), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.submit()
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.ai_feedback_status, 'completed')
+
+    def test_stale_running_sessions_are_requeued(self):
+        """Test that sessions left running by a dead runner are picked up again."""
+        self.session.status = 'completed'
+        self.session.ai_feedback_status = 'running'
+        self.session.ai_feedback_started_at = timezone.now() - timedelta(hours=1)
+        self.session.save()
+
+        with mock.patch('interview.llama_api.generate_interview_feedback', return_value=self.feedback):
+            self.assertEqual(process_pending(), 1)
+
+    def test_stale_session_out_of_attempts_is_failed(self):
+        """Test that a session that keeps losing its runner gets the fallback feedback."""
+        self.session.status = 'completed'
+        self.session.ai_feedback_status = 'running'
+        self.session.ai_feedback_started_at = timezone.now() - timedelta(hours=1)
+        self.session.ai_feedback_attempts = 2
+        self.session.save()
+
+        self.assertEqual(process_pending(), 0)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.ai_feedback_status, 'failed')
+        self.assertIn('strengths', self.session.ai_feedback)
+
+    @contextmanager
+    def thread_runner(self, **generate):
+        """Run the in-process runner inline, yielding the executor getter and the generator mocks."""
+        executor = mock.Mock()
+        executor.submit.side_effect = lambda fn, *args: fn(*args)
+        with override_settings(INTERVIEW_FEEDBACK_RUNNER='thread'), \
+                mock.patch('interview.feedback_jobs._get_executor', return_value=executor) as get_executor, \
+                mock.patch('interview.feedback_jobs.close_old_connections'), \
+                mock.patch('interview.llama_api.generate_interview_feedback', **generate) as generate_feedback:
+            yield get_executor, generate_feedback
+
+    def test_thread_runner_retries_failed_attempts(self):
+        """Test that the in-process runner retries a failure instead of leaving it pending."""
+        self.submit()
+        with self.thread_runner(side_effect=[RuntimeError('boom'), self.feedback]) as (_, generate):
+            self.client.get(f'/api/interview/sessions/{self.session.id}/')
+
+        self.assertEqual(generate.call_count, 2)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.ai_feedback_status, 'completed')
+
+    def test_session_get_resumes_lost_feedback(self):
+        """Test that polling a session dispatches feedback a restarted process lost."""
+        self.submit()  # worker runner: nothing was queued in this process
+        InterviewSession.objects.filter(id=self.session.id).update(
+            ai_feedback_status='running', ai_feedback_started_at=timezone.now() - timedelta(hours=1)
+        )
+
+        with self.thread_runner(return_value=self.feedback):
+            response = self.client.get(f'/api/interview/sessions/{self.session.id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.ai_feedback_status, 'completed')
+
+    def test_session_get_leaves_fresh_running_session(self):
+        """Test that polling does not dispatch a session another runner is working on."""
+        self.session.status = 'completed'
+        self.session.ai_feedback_status = 'running'
+        self.session.ai_feedback_started_at = timezone.now()
+        self.session.save()
+
+        with self.thread_runner(return_value=self.feedback) as (get_executor, _):
+            self.client.get(f'/api/interview/sessions/{self.session.id}/')
+
+        get_executor.assert_not_called()
+
+    async def test_stream_sends_ready_feedback(self):
+        """Test that the feedback stream ends with the stored feedback."""
+        self.session.status = 'completed'
+        self.session.ai_feedback = self.feedback[0]
+        self.session.ai_feedback_status = 'completed'
+        await self.session.asave()
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f'/api/interview/sessions/{self.session.id}/feedback/stream/')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+        self.assertTrue(body.startswith('event: done\n'))
+        self.assertIn('"recommendation": "Ready"', body)
+
+
+@override_settings(INTERVIEW_FEEDBACK_MODE='per_question', INTERVIEW_FEEDBACK_CONCURRENCY=2)
+class PerQuestionFeedbackTests(TestCase):
+    """Test feedback generated from one review per answer."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='reviews@example.com', google_sub='google655')
+        self.session = InterviewSession.objects.create(
+            user=self.user,
+            questions=[{'id': f'q{i}', 'text': f'Question {i}?'} for i in range(1, 5)],
+            answers=[{'question_id': f'q{i}', 'text': f'Answer {i}', 'time_spent': 30} for i in range(1, 5)],
+            status='completed',
+            score=70
+        )
+
+    def generate(self, fake_chat):
+        from .llama_api import generate_interview_feedback
+
+        with mock.patch('interview.llama_api.is_configured', return_value=True), \
+                mock.patch('llm.client.chat', side_effect=fake_chat):
+            return generate_interview_feedback(self.session)
+
+    def test_failed_review_only_affects_its_question(self):
+        """Test that one failing review leaves the others and the summary intact."""
+        def fake_chat(messages, site=None, **kwargs):
+            prompt = messages[-1]['content']
+            if site == 'interview_feedback':
+                return '{"strengths": ["Concise"], "weaknesses": [], "tips": [], "overall_assessment": "Solid."}'
+            if 'Question 3?' in prompt:
+                raise LLMError('timeout')
+            if 'Question 2?' in prompt:
+                return 'not json'
+            return '{"answer_review": "Good", "score": 7, "suggestions": "Add an example"}'
+
+        overall_feedback, detailed_review = self.generate(fake_chat)
+
+        self.assertEqual([review['question_id'] for review in detailed_review], ['q1', 'q2', 'q3', 'q4'])
+        self.assertEqual([review['score'] for review in detailed_review], [7, None, None, 7])
+        self.assertEqual(overall_feedback['strengths'], ['Concise'])
+        self.assertTrue(overall_feedback['recommendation'])
+
+    def test_review_threads_close_their_connections(self):
+        """Test that every review thread closes the database connections it opened."""
+        import threading
+
+        closed_by = []
+
+        def fake_chat(messages, site=None, **kwargs):
+            if site == 'interview_feedback':
+                return '{"strengths": [], "weaknesses": [], "tips": [], "overall_assessment": "Solid."}'
+            return '{"answer_review": "Good", "score": 7, "suggestions": ""}'
+
+        with mock.patch('interview.llama_api.connections') as connections:
+            connections.close_all.side_effect = lambda: closed_by.append(threading.current_thread().name)
+            self.generate(fake_chat)
+
+        self.assertEqual(len(closed_by), 4)
+        self.assertTrue(all(name.startswith('answer-review') for name in closed_by))
+
+    def test_reviews_run_concurrently_up_to_the_cap(self):
+        """Test that reviews overlap but never exceed INTERVIEW_FEEDBACK_CONCURRENCY."""
+        import threading
+        import time
+
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def fake_chat(messages, site=None, **kwargs):
+            if site == 'interview_feedback':
+                return '{}'
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.pop()
+            return '{"answer_review": "Good", "score": 6, "suggestions": ""}'
+
+        overall_feedback, detailed_review = self.generate(fake_chat)
+
+        self.assertEqual(len(detailed_review), 4)
+        self.assertEqual(max(peak), 2)
+        self.assertIn('tips', overall_feedback)
+
+    def test_synthesis_failure_falls_back_to_reviews(self):
+        """Test that the overall feedback is built from the reviews if the summary call fails."""
+        def fake_chat(messages, site=None, **kwargs):
+            if site == 'interview_feedback':
+                raise LLMError('rate limited')
+            return '{"answer_review": "Good", "score": 8, "suggestions": "Mention trade-offs"}'
+
+        overall_feedback, detailed_review = self.generate(fake_chat)
+
+        self.assertEqual(len(detailed_review), 4)
+        self.assertIn('Mention trade-offs', overall_feedback['tips'])
+        self.assertTrue(overall_feedback['recommendation'])
+
+
+@override_settings(INTERVIEW_HINT_BANK_MAX_ANSWER_CHARS=20)
+class HintBankTests(TestCase):
+    """Test the pregenerated hint bank."""
+
+    QUESTION = 'Describe the binary search algorithm.'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='bank@example.com', google_sub='google654')
+        self.client.force_authenticate(user=self.user)
+        self.session = InterviewSession.objects.create(
+            user=self.user,
+            questions=[{'id': 'alg5', 'text': self.QUESTION}],
+            status='in_progress'
+        )
+
+    def hint(self, current_answer):
+        return self.client.post(
+            f'/api/interview/sessions/{self.session.id}/hint/',
+            {'question_id': 'alg5', 'current_answer': current_answer}, format='json'
+        )
+
+    def test_build_bank_tops_up_every_question(self):
+        """Test that each bank question gets the requested number of distinct variants."""
+        from .views import QUESTION_BANK
+
+        replies = (f'Hint {n}' for n in range(1000))
+        with mock.patch('interview.hint_bank.chat', side_effect=lambda *args, **kwargs: next(replies)):
+            result = build_bank(2, concurrency=1)
+            again = build_bank(2, concurrency=1)
+
+        questions = {q['text'] for topic in QUESTION_BANK.values() for q in topic}
+        self.assertEqual(result, {'questions': len(questions), 'created': 2 * len(questions), 'failed': 0, 'removed': 0})
+        self.assertEqual(again['created'], 0)
+        self.assertEqual(QuestionHint.objects.filter(question_hash=question_hash(self.QUESTION)).count(), 2)
+
+    def test_build_bank_replace_keeps_hints_on_failure(self):
+        """Test that --replace swaps hints per question and prunes questions that left the bank."""
+        QuestionHint.objects.create(question_hash=question_hash(self.QUESTION), question_id='alg5', text='Old')
+        QuestionHint.objects.create(question_hash=question_hash('Removed question?'), question_id='x1', text='Gone')
+
+        with mock.patch('interview.hint_bank.chat', side_effect=LLMError('provider down')):
+            result = build_bank(1, replace=True, concurrency=1)
+
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(result['removed'], 1)
+        self.assertEqual(list(QuestionHint.objects.values_list('text', flat=True)), ['Old'])
+
+    def test_empty_and_short_answers_use_bank(self):
+        """Test that hints for empty or short answers come from the bank without an LLM call."""
+        QuestionHint.objects.create(
+            question_hash=question_hash(self.QUESTION), question_id='alg5', text='Think about sorted input.'
+        )
+
+        with mock.patch('interview.llama_api.chat') as chat:
+            empty = self.hint('')
+            short = self.hint('It halves the array')
+
+        chat.assert_not_called()
+        self.assertEqual(empty.data['hint'], 'Think about sorted input.')
+        self.assertEqual(short.data['hint'], 'Think about sorted input.')
+
+    def test_substantive_answer_gets_live_hint(self):
+        """Test that a longer partial answer, or a question without banked hints, reaches the model."""
+        QuestionHint.objects.create(
+            question_hash=question_hash(self.QUESTION), question_id='alg5', text='Think about sorted input.'
+        )
+
+        with mock.patch('interview.llama_api.is_configured', return_value=True), \
+                mock.patch('interview.llama_api.chat', return_value='Now state its complexity.') as chat:
+            response = self.hint('It compares the middle element with the target')
+
+        chat.assert_called_once()
+        self.assertIn('compares the middle element', chat.call_args[0][0][-1]['content'])
+        self.assertEqual(response.data['hint'], 'Now state its complexity.')
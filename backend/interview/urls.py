@@ -9,7 +9,9 @@ urlpatterns = [
     path('sessions/<uuid:session_id>/', views.get_interview_session, name='get_session'),
     path('sessions/<uuid:session_id>/answer/', views.save_interview_answer, name='save_answer'),
     path('sessions/<uuid:session_id>/submit/', views.submit_interview, name='submit_interview'),
+    path('sessions/<uuid:session_id>/feedback/stream/', views.interview_feedback_stream, name='interview_feedback_stream'),
     path('sessions/<uuid:session_id>/hint/', views.get_ai_hint, name='get_ai_hint'),
+    path('sessions/<uuid:session_id>/hint/stream/', views.get_ai_hint_stream, name='get_ai_hint_stream'),
     path('sessions/<uuid:session_id>/retake/', views.retake_interview, name='retake_interview'),
 ]
 
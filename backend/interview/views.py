@@ -1,10 +1,18 @@
+import asyncio
+import json
+import time
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
+from llm.sse import completion_events, sse_event, sse_response
+from .feedback_jobs import dispatch_feedback, resume_feedback
 from .models import InterviewSession
 from .serializers import InterviewSessionSerializer, InterviewSessionCreateSerializer, InterviewAnswerSerializer
 from authz.models import AuditEvent
@@ -74,6 +82,8 @@ def list_interview_sessions(request):
 def get_interview_session(request, session_id):
     """Get details of a specific interview session."""
     session = get_object_or_404(InterviewSession, id=session_id, user=request.user)
+    # Clients poll this while feedback is generated
+    resume_feedback(session)
     serializer = InterviewSessionSerializer(session)
     return Response(serializer.data)
 
@@ -145,24 +155,15 @@ def submit_interview(request, session_id):
         {'criterion': 'Completed within reasonable time', 'passed': session.duration_sec < 1800},  # 30 min
     ]
 
-    # Generate AI feedback using Groq
-    try:
-        from .llama_api import generate_interview_feedback
-        overall_feedback, detailed_review = generate_interview_feedback(session)
-        session.ai_feedback = overall_feedback
-        session.detailed_review = detailed_review
-    except Exception as e:
-        print(f"Warning: Failed to generate AI feedback: {e}")
-        session.ai_feedback = {
-            'strengths': ['Completed the interview'],
-            'weaknesses': ['AI feedback not available'],
-            'tips': ['Practice explaining concepts with real-world examples'],
-            'overall_assessment': 'Unable to generate detailed feedback at this time.',
-            'recommendation': 'Please try again or contact support.'
-        }
-        session.detailed_review = []
+    # AI feedback is generated in the background; clients poll the session
+    # or follow feedback/stream/ until ai_feedback_status is final
+    session.ai_feedback = {}
+    session.detailed_review = []
+    session.ai_feedback_status = 'pending'
+    session.ai_feedback_attempts = 0
 
     session.save()
+    dispatch_feedback(session)
 
     # Create audit event
     AuditEvent.objects.create(
@@ -203,6 +204,93 @@ def get_ai_hint(request, session_id):
         })
 
 
+async def get_ai_hint_stream(request, session_id):
+    """
+    Stream an AI hint for the current question as Server-Sent Events.
+
+    Async view without DRF: takes the same body as ``get_ai_hint`` and sends
+    ``{"token": ...}`` events followed by a ``done`` event with the full hint.
+    """
+    from .llama_api import stream_ai_hint
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    session = await InterviewSession.objects.filter(id=session_id, user=user, status='in_progress').afirst()
+    if session is None:
+        return JsonResponse({'error': 'Interview session not found'}, status=404)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    question_id = data.get('question_id')
+    current_answer = data.get('current_answer', '')
+
+    if not question_id:
+        return JsonResponse({'error': 'question_id is required'}, status=400)
+
+    question = next((q for q in session.questions if q['id'] == question_id), None)
+    if not question:
+        return JsonResponse({'error': 'Question not found'}, status=404)
+
+    return sse_response(completion_events(stream_ai_hint(question['text'], current_answer), 'hint'))
+
+
+FEEDBACK_FINAL_STATUSES = ('completed', 'failed')
+
+
+async def _feedback_events(session_id):
+    expires = time.monotonic() + settings.INTERVIEW_FEEDBACK_STREAM_TIMEOUT
+    last_status = None
+    while True:
+        session = await InterviewSession.objects.filter(id=session_id).only(
+            'ai_feedback_status', 'ai_feedback', 'detailed_review'
+        ).afirst()
+        if session is None:
+            return
+
+        if session.ai_feedback_status in FEEDBACK_FINAL_STATUSES:
+            yield sse_event({
+                'ai_feedback_status': session.ai_feedback_status,
+                'ai_feedback': session.ai_feedback,
+                'detailed_review': session.detailed_review,
+            }, event='done')
+            return
+
+        if session.ai_feedback_status != last_status:
+            last_status = session.ai_feedback_status
+            yield sse_event({'ai_feedback_status': last_status}, event='status')
+
+        if time.monotonic() >= expires:
+            yield sse_event({'error': 'Feedback is still being generated'}, event='timeout')
+            return
+        await asyncio.sleep(1)
+
+
+async def interview_feedback_stream(request, session_id):
+    """
+    Stream the background AI feedback of a submitted interview as Server-Sent Events.
+
+    Sends ``status`` events while feedback is pending and a ``done`` event with
+    ``ai_feedback`` and ``detailed_review`` once it is ready.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    if not await InterviewSession.objects.filter(id=session_id, user=user).aexists():
+        return JsonResponse({'error': 'Interview session not found'}, status=404)
+
+    return sse_response(_feedback_events(session_id))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def retake_interview(request, session_id):
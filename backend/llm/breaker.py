@@ -0,0 +1,105 @@
+"""
+Circuit breaker for the LLM provider.
+
+State lives in the ``LLM_BREAKER_CACHE`` cache alias so all workers agree on
+it. The breaker opens when ``LLM_BREAKER_FAILURES`` calls fail within
+``LLM_BREAKER_WINDOW`` seconds; while open, calls fail fast instead of each
+holding a worker thread until its own deadline. After
+``LLM_BREAKER_COOLDOWN`` seconds a single probe call is let through: if it
+succeeds the breaker closes, otherwise it stays open for another cool-down.
+
+Only failures that point at the provider count: timeouts, connection
+errors, rate limits and 5xx responses. Rejected requests and unusable
+replies do not.
+"""
+import logging
+import time
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'llm:breaker'
+
+
+class CircuitBreaker:
+    def __init__(self, name: str = 'provider'):
+        self.name = name
+        self.failures_key = f'{PREFIX}:{name}:failures'
+        self.open_key = f'{PREFIX}:{name}:open_until'
+        self.probe_key = f'{PREFIX}:{name}:probe'
+
+    @property
+    def cache(self):
+        return caches[settings.LLM_BREAKER_CACHE]
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now."""
+        if not settings.LLM_BREAKER_ENABLED:
+            return True
+        open_until = self.cache.get(self.open_key)
+        if open_until is None:
+            return True
+        if time.time() < open_until:
+            return False
+        # Cooled down: exactly one caller gets to probe the provider
+        return self.cache.add(self.probe_key, True, settings.LLM_BREAKER_COOLDOWN)
+
+    def record_success(self) -> None:
+        if not settings.LLM_BREAKER_ENABLED:
+            return
+        state = self.cache.get_many([self.failures_key, self.open_key])
+        if state:
+            if self.open_key in state:
+                logger.warning(f"LLM circuit '{self.name}' closed after a successful probe")
+            self.cache.delete_many([self.failures_key, self.open_key, self.probe_key])
+
+    def record_failure(self) -> None:
+        if not settings.LLM_BREAKER_ENABLED:
+            return
+        open_until = self.cache.get(self.open_key)
+        if open_until is not None:
+            # Past the cool-down only the probe reaches the provider; failures
+            # before that come from calls that started before the breaker
+            # opened and must not extend the cool-down
+            if time.time() >= open_until:
+                self._open()
+            return
+
+        self.cache.add(self.failures_key, 0, settings.LLM_BREAKER_WINDOW)
+        try:
+            failures = self.cache.incr(self.failures_key)
+        except ValueError:  # the window expired in between
+            failures = 1
+            self.cache.set(self.failures_key, failures, settings.LLM_BREAKER_WINDOW)
+        if failures >= settings.LLM_BREAKER_FAILURES:
+            self._open()
+
+    def _open(self) -> None:
+        cooldown = settings.LLM_BREAKER_COOLDOWN
+        # Kept past the cool-down so the next caller knows to probe
+        self.cache.set(self.open_key, time.time() + cooldown, cooldown + settings.LLM_BREAKER_WINDOW + 60)
+        self.cache.delete_many([self.failures_key, self.probe_key])
+        logger.warning(f"LLM circuit '{self.name}' open for {cooldown}s")
+
+    def state(self) -> Dict[str, Any]:
+        state = self.cache.get_many([self.failures_key, self.open_key])
+        open_until = state.get(self.open_key)
+        if open_until is None:
+            status = 'closed'
+        elif time.time() < open_until:
+            status = 'open'
+        else:
+            status = 'half_open'
+        return {
+            'name': self.name,
+            'enabled': settings.LLM_BREAKER_ENABLED,
+            'state': status,
+            'recent_failures': state.get(self.failures_key, 0),
+            'retry_in': max(0, round(open_until - time.time(), 1)) if open_until else 0,
+        }
+
+
+breaker = CircuitBreaker()
@@ -0,0 +1,112 @@
+"""
+In-process cache of LLM completions.
+
+Entries are keyed on the request that produced them: model, prompt (with
+whitespace normalized), temperature, max_tokens and any other request
+options. Each call site names itself and gets its own TTL from
+``LLM_CACHE_TTLS``; sites without a TTL are not cached. The cache holds at
+most ``LLM_CACHE_MAX_ENTRIES`` completions and evicts the least recently
+used one first. Expired completions are kept until evicted so that
+``get_stale`` can serve them while the provider is unavailable.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_prompt(text: str) -> str:
+    """Collapse runs of whitespace so formatting-only differences share an entry."""
+    return _WHITESPACE.sub(' ', text or '').strip()
+
+
+def key_for(payload: Dict[str, Any]) -> str:
+    """Cache key of a chat completion request payload."""
+    normalized = dict(payload)
+    normalized['messages'] = [
+        {**message, 'content': normalize_prompt(message.get('content', ''))}
+        for message in payload.get('messages', [])
+    ]
+    normalized.pop('stream', None)
+    encoded = json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with per-entry expiry and per-site hit/miss counters."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.evictions = 0
+
+    def _count(self, site: str, counter: str) -> None:
+        site_stats = self._stats.setdefault(site, {'hits': 0, 'misses': 0})
+        site_stats[counter] = site_stats.get(counter, 0) + 1
+
+    def get(self, key: str, site: str = 'default') -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            # Expired entries stay until evicted, for get_stale
+            if entry is None or entry[0] <= time.monotonic():
+                self._count(site, 'misses')
+                return None
+
+            self._entries.move_to_end(key)
+            self._count(site, 'hits')
+            return entry[1]
+
+    def get_stale(self, key: str, site: str = 'default', max_age: float = 0) -> Optional[str]:
+        """Value of ``key`` even if it expired up to ``max_age`` seconds ago."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] + max_age <= time.monotonic():
+                return None
+            self._count(site, 'stale')
+            return entry[1]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats = {}
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+                'sites': {site: dict(counters) for site, counters in self._stats.items()},
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Return this process's response cache, following ``LLM_CACHE_MAX_ENTRIES``."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(settings.LLM_CACHE_MAX_ENTRIES)
+        _cache.max_entries = settings.LLM_CACHE_MAX_ENTRIES
+        return _cache
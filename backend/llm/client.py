@@ -0,0 +1,445 @@
+"""
+Shared client for OpenAI-compatible chat completion APIs (Groq, OpenAI, ...).
+
+Every call site goes through one ``LLMClient`` per process, created on first
+use from ``LLM_PROVIDER_URL``, ``LLM_API_KEY`` and ``LLM_MODEL``, so all of
+them share a single pool of keep-alive connections. Each call has a deadline
+that covers all of its attempts: transient failures (timeouts, connection
+errors, 429 and 5xx responses) are retried with jittered exponential backoff
+only while the deadline allows, so a hung provider cannot hold a worker
+thread until gunicorn kills it.
+
+``chat`` serves repeated requests from ``llm.cache`` for call sites that
+have a TTL in ``LLM_CACHE_TTLS``. ``stream_chat`` is its async counterpart
+for views that forward tokens as the provider emits them; a stream is only
+retried until its first token arrives. Both log the estimated prompt size of
+every call under its call site. ``chat_json`` is for call sites that expect
+a JSON object back.
+
+Calls go through the circuit breaker in ``llm.breaker``. While it is open,
+or when a call fails, cached call sites get their most recent reply for the
+same request even if it has expired (up to ``LLM_CACHE_STALE_TTL``);
+others get ``CircuitOpen`` or the error straight away.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .breaker import breaker
+from .cache import get_cache, key_for as cache_key
+from .jsonparse import extract_json, validate
+from .prompt import message_tokens
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when a completion cannot be obtained from the provider."""
+
+
+class LLMNotConfigured(LLMError):
+    """Raised when no API key is configured."""
+
+
+class LLMTimeout(LLMError):
+    """Raised when a call's deadline passes before the provider answers."""
+
+
+class LLMRequestError(LLMError):
+    """Raised when the provider rejects a request as invalid; retrying will not help."""
+
+
+class CircuitOpen(LLMError):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+
+class LLMInvalidResponse(LLMError):
+    """Raised when a completion does not contain the JSON the caller asked for."""
+
+    def __init__(self, message: str, reply: str = ''):
+        super().__init__(message)
+        self.reply = reply
+
+
+class LLMClient:
+    """Chat completions over a pooled HTTP client."""
+
+    def __init__(self, base_url: str, api_key: str, model: str, timeout: float = 20,
+                 connect_timeout: float = 5, max_retries: int = 2, backoff: float = 0.5,
+                 backoff_max: float = 4, pool_size: int = 10,
+                 transport: Optional[httpx.BaseTransport] = None):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self._client_options = {
+            'base_url': self.base_url,
+            'headers': {'Authorization': f'Bearer {api_key}'},
+            'limits': httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            'transport': transport,
+        }
+        self._client = httpx.Client(**self._client_options)
+        # Async connections belong to the event loop that opened them
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _backoff_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            try:
+                return float(response.headers['retry-after'])
+            except (KeyError, ValueError):
+                pass
+        # Full jitter keeps workers that failed together from retrying together
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def build_payload(self, messages: List[Dict[str, str]], temperature: float = 0.7,
+                      max_tokens: Optional[int] = None, model: Optional[str] = None,
+                      **options: Any) -> Dict[str, Any]:
+        """Request body of a chat completion; ``options`` are extra fields such as ``response_format``."""
+        payload = {
+            'model': model or self.model,
+            'messages': messages,
+            'temperature': temperature,
+            **options,
+        }
+        if max_tokens is not None:
+            payload['max_tokens'] = max_tokens
+        return payload
+
+    def complete(self, payload: Dict[str, Any], deadline: Optional[float] = None) -> str:
+        """
+        Send a request built by ``build_payload`` and return the assistant message.
+
+        Args:
+            deadline: Seconds the whole call, retries included, may take
+                (defaults to ``LLM_TIMEOUT``)
+
+        Raises:
+            LLMTimeout: if the deadline passes
+            LLMError: if the provider rejects the request or keeps failing
+        """
+        data = self._post('/chat/completions', payload, deadline or self.timeout)
+        try:
+            return data['choices'][0]['message']['content'] or ''
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMError(f'Unexpected completion response: {str(e)}') from e
+
+    def chat(self, messages: List[Dict[str, str]], deadline: Optional[float] = None, **kwargs: Any) -> str:
+        """Return the assistant message for ``messages``; see ``build_payload`` and ``complete``."""
+        return self.complete(self.build_payload(messages, **kwargs), deadline)
+
+    def _timeout(self, remaining: float) -> httpx.Timeout:
+        return httpx.Timeout(remaining, connect=min(self.connect_timeout, remaining))
+
+    def _retry_delay(self, attempt: int, error: LLMError, response: Optional[httpx.Response],
+                     expires: float) -> float:
+        """Seconds to wait before retrying, or raise ``error`` if no retry fits."""
+        delay = self._backoff_delay(attempt, response)
+        if attempt >= self.max_retries or time.monotonic() + delay >= expires:
+            raise error
+        logger.warning(f"LLM call failed ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        return delay
+
+    def _post(self, path: str, payload: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+        expires = time.monotonic() + deadline
+        attempt = 0
+        while True:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeout(f'LLM call exceeded its {deadline}s deadline')
+
+            response = None
+            try:
+                response = self._client.post(path, json=payload, timeout=self._timeout(remaining))
+                if response.status_code < 300:
+                    return response.json()
+                if response.status_code not in RETRY_STATUS_CODES:
+                    raise LLMRequestError(f'LLM provider returned HTTP {response.status_code}: {response.text[:200]}')
+                error = LLMError(f'LLM provider returned HTTP {response.status_code}')
+            except httpx.TimeoutException as e:
+                error = LLMTimeout(f'LLM call exceeded its {deadline}s deadline')
+                error.__cause__ = e
+            except httpx.TransportError as e:
+                error = LLMError(f'LLM provider unreachable: {str(e)}')
+                error.__cause__ = e
+            except ValueError as e:
+                raise LLMError(f'LLM provider returned invalid JSON: {str(e)}') from e
+
+            time.sleep(self._retry_delay(attempt, error, response, expires))
+            attempt += 1
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(**self._client_options)
+        return client
+
+    async def stream(self, payload: Dict[str, Any], deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Yield the assistant message of a streamed completion piece by piece.
+
+        Failures before the first piece are retried like ``complete``; once
+        text has been yielded, errors are raised to the caller.
+        """
+        deadline = deadline or self.timeout
+        expires = time.monotonic() + deadline
+        payload = {**payload, 'stream': True}
+        client = self._async_client()
+        attempt = 0
+        started = False
+        while True:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeout(f'LLM call exceeded its {deadline}s deadline')
+
+            response = None
+            try:
+                async with client.stream('POST', '/chat/completions', json=payload,
+                                         timeout=self._timeout(remaining)) as response:
+                    if response.status_code >= 300:
+                        body = (await response.aread()).decode('utf-8', 'replace')
+                        if response.status_code not in RETRY_STATUS_CODES:
+                            raise LLMRequestError(f'LLM provider returned HTTP {response.status_code}: {body[:200]}')
+                        error = LLMError(f'LLM provider returned HTTP {response.status_code}')
+                    else:
+                        async for line in response.aiter_lines():
+                            if time.monotonic() > expires:
+                                raise LLMTimeout(f'LLM call exceeded its {deadline}s deadline')
+                            if not line.startswith('data:'):
+                                continue
+                            data = line[5:].strip()
+                            if data == '[DONE]':
+                                return
+                            try:
+                                delta = json.loads(data)['choices'][0].get('delta') or {}
+                            except (ValueError, KeyError, IndexError, TypeError) as e:
+                                raise LLMError(f'Unexpected stream event: {data[:200]}') from e
+                            if delta.get('content'):
+                                started = True
+                                yield delta['content']
+                        return
+            except httpx.TimeoutException as e:
+                error = LLMTimeout(f'LLM call exceeded its {deadline}s deadline')
+                error.__cause__ = e
+            except httpx.TransportError as e:
+                error = LLMError(f'LLM provider unreachable: {str(e)}')
+                error.__cause__ = e
+
+            if started:
+                raise error
+            await asyncio.sleep(self._retry_delay(attempt, error, response, expires))
+            attempt += 1
+
+    def close(self) -> None:
+        self._client.close()
+
+    async def aclose_loop(self) -> None:
+        """Close the async connections opened on the running event loop."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_client = None
+_client_config = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def is_configured() -> bool:
+    return bool(settings.LLM_API_KEY)
+
+
+def get_client() -> LLMClient:
+    """
+    Return this process's LLM client, creating it on first use.
+
+    Raises:
+        LLMNotConfigured: if ``LLM_API_KEY`` is empty
+    """
+    global _client, _client_config, _client_pid
+    if not is_configured():
+        raise LLMNotConfigured('LLM_API_KEY is not configured')
+
+    config = (
+        settings.LLM_PROVIDER_URL, settings.LLM_API_KEY, settings.LLM_MODEL, settings.LLM_TIMEOUT,
+        settings.LLM_CONNECT_TIMEOUT, settings.LLM_MAX_RETRIES, settings.LLM_RETRY_BACKOFF,
+        settings.LLM_RETRY_BACKOFF_MAX, settings.LLM_POOL_SIZE,
+    )
+
+    with _client_lock:
+        # Connections must not be shared with a forked parent
+        if _client is None or _client_config != config or _client_pid != os.getpid():
+            _client = LLMClient(
+                base_url=settings.LLM_PROVIDER_URL,
+                api_key=settings.LLM_API_KEY,
+                model=settings.LLM_MODEL,
+                timeout=settings.LLM_TIMEOUT,
+                connect_timeout=settings.LLM_CONNECT_TIMEOUT,
+                max_retries=settings.LLM_MAX_RETRIES,
+                backoff=settings.LLM_RETRY_BACKOFF,
+                backoff_max=settings.LLM_RETRY_BACKOFF_MAX,
+                pool_size=settings.LLM_POOL_SIZE,
+            )
+            _client_config = config
+            _client_pid = os.getpid()
+        return _client
+
+
+async def aclose_loop_client() -> None:
+    """Close the async connections this process's client opened on the running loop, if any."""
+    if _client is not None:
+        await _client.aclose_loop()
+
+
+def chat(messages: List[Dict[str, str]], site: Optional[str] = None,
+         deadline: Optional[float] = None, accept: Optional[Callable[[str], bool]] = None,
+         **kwargs: Any) -> str:
+    """
+    Return the assistant message for ``messages`` using the shared client.
+
+    Args:
+        site: Name of the call site; completions are cached for the TTL that
+            ``LLM_CACHE_TTLS`` sets for it
+        accept: Check a reply must pass to be cached
+        kwargs: Request fields, see ``LLMClient.build_payload``
+    """
+    client = get_client()
+    payload = client.build_payload(messages, **kwargs)
+    logger.info(f"LLM prompt for {site or 'unnamed site'}: ~{message_tokens(messages)} tokens")
+
+    ttl = settings.LLM_CACHE_TTLS.get(site, 0) if settings.LLM_CACHE_ENABLED and site else 0
+    cache = get_cache()
+    key = cache_key(payload) if ttl else None
+    if key:
+        reply = cache.get(key, site)
+        if reply is not None:
+            return reply
+
+    if not breaker.allow():
+        return _stale_or_raise(key, site, CircuitOpen('LLM provider circuit is open'))
+    try:
+        reply = client.complete(payload, deadline)
+    except LLMRequestError:
+        raise
+    except LLMError as e:
+        breaker.record_failure()
+        return _stale_or_raise(key, site, e)
+    breaker.record_success()
+
+    if key and reply and (accept is None or accept(reply)):
+        cache.set(key, reply, ttl)
+    return reply
+
+
+def _stale_or_raise(key: Optional[str], site: Optional[str], error: LLMError) -> str:
+    """Most recent cached reply for the request, expired or not, while the provider is failing."""
+    stale = get_cache().get_stale(key, site, settings.LLM_CACHE_STALE_TTL) if key else None
+    if stale is None:
+        raise error
+    logger.warning(f"Serving a stale {site} completion: {error}")
+    return stale
+
+
+def response_format(schema: Optional[Dict[str, Any]], name: str) -> Optional[Dict[str, Any]]:
+    """``response_format`` request field for the configured ``LLM_JSON_MODE``."""
+    if settings.LLM_JSON_MODE == 'json_object':
+        return {'type': 'json_object'}
+    if settings.LLM_JSON_MODE == 'json_schema' and schema:
+        return {'type': 'json_schema', 'json_schema': {'name': name, 'schema': schema}}
+    return None
+
+
+def chat_json(messages: List[Dict[str, str]], schema: Optional[Dict[str, Any]] = None,
+              site: Optional[str] = None, deadline: Optional[float] = None, allow_partial: bool = True,
+              **kwargs: Any) -> Dict[str, Any]:
+    """
+    Return the JSON object in the reply to ``messages``, checked against ``schema``.
+
+    The object is extracted with ``llm.jsonparse``, so fenced, surrounded or
+    slightly malformed JSON is still used, and so is cut-off JSON unless
+    ``allow_partial`` is False. With ``LLM_JSON_MODE`` set, the provider is
+    also asked for JSON output. Only replies holding a complete valid object
+    are cached.
+
+    Raises:
+        LLMInvalidResponse: if the reply has no object matching ``schema``;
+            the reply is kept on the exception
+    """
+    fmt = response_format(schema, site or 'response')
+    if fmt is not None:
+        kwargs.setdefault('response_format', fmt)
+
+    def parse(reply: str, partial: bool):
+        data = extract_json(reply, allow_partial=partial)
+        if data is None:
+            return None, ['no JSON object in reply']
+        return data, validate(data, schema or {})
+
+    # A recovered cut-off object is good enough for this caller at most, never for the cache
+    reply = chat(messages, site=site, deadline=deadline, accept=lambda reply: not parse(reply, False)[1], **kwargs)
+    data, errors = parse(reply, allow_partial)
+    if errors:
+        logger.warning(f"Invalid JSON reply for {site}: {'; '.join(errors[:3])}")
+        raise LLMInvalidResponse(f"Invalid JSON reply: {'; '.join(errors[:3])}", reply)
+    return data
+
+
+async def stream_chat(messages: List[Dict[str, str]], site: Optional[str] = None,
+                      deadline: Optional[float] = None, **kwargs: Any) -> AsyncIterator[str]:
+    """
+    Async counterpart of ``chat`` that yields the reply as it is generated.
+
+    A cached reply is yielded in one piece; a fully streamed reply is cached
+    for the call site like a regular completion.
+    """
+    client = get_client()
+    payload = client.build_payload(messages, **kwargs)
+    logger.info(f"LLM prompt for {site or 'unnamed site'}: ~{message_tokens(messages)} tokens")
+
+    ttl = settings.LLM_CACHE_TTLS.get(site, 0) if settings.LLM_CACHE_ENABLED and site else 0
+    cache = get_cache()
+    key = cache_key(payload) if ttl else None
+    if key:
+        reply = cache.get(key, site)
+        if reply is not None:
+            yield reply
+            return
+
+    # The breaker's cache may be database-backed
+    if not await sync_to_async(breaker.allow)():
+        yield _stale_or_raise(key, site, CircuitOpen('LLM provider circuit is open'))
+        return
+
+    parts = []
+    try:
+        async for piece in client.stream(payload, deadline):
+            parts.append(piece)
+            yield piece
+    except LLMRequestError:
+        raise
+    except LLMError as e:
+        await sync_to_async(breaker.record_failure)()
+        if parts:
+            raise
+        yield _stale_or_raise(key, site, e)
+        return
+    await sync_to_async(breaker.record_success)()
+
+    if key and parts:
+        cache.set(key, ''.join(parts), ttl)
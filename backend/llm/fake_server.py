@@ -0,0 +1,291 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions provider.
+
+Used for load tests and offline benchmarks: point ``LLM_PROVIDER_URL`` at
+``http://127.0.0.1:<port>/v1`` (any ``LLM_API_KEY`` works) and every call
+site talks to this server instead of Groq. ``manage.py run_fake_llm`` runs it
+standalone; ``FakeLLMServer`` can also be started in-process by tests and
+benchmarks.
+
+The server answers ``POST .../chat/completions``, with ``"stream": true``
+as Server-Sent Events. Each request waits for a time to first token drawn
+from a latency distribution, then produces the reply at a fixed token rate.
+A share of requests fails with 429 or 503. Replies come from canned
+response rules: the first rule whose regex matches the request's messages
+is used. Its content is a ``string.Template``, so JSON braces need no
+escaping; ``$model``, ``$request`` (request number) and ``$prompt`` (start
+of the last message) are substituted. The default rules return well-formed
+JSON for CV generation and interview feedback and plain text otherwise.
+Replies longer than ``max_tokens`` are cut off with ``finish_reason:
+"length"``, like a real provider.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from typing import Any, Callable, Dict, List, Optional
+
+from .prompt import estimate_tokens
+
+_TOKEN = re.compile(r'\S+\s*|\s+')
+
+DEFAULT_RESPONSES = [
+    {
+        'match': r'"overall_feedback"',
+        'content': json.dumps({
+            'overall_feedback': {
+                'strengths': ['Clear structure', 'Good use of examples'],
+                'weaknesses': ['Could go deeper on trade-offs'],
+                'tips': ['Quantify the impact of your work'],
+                'overall_assessment': 'A solid interview with room to add depth.',
+                'recommendation': 'Practice system design questions and retake.',
+            },
+            'detailed_review': [],
+        }),
+    },
+    {
+        'match': r'"answer_review"',
+        'content': json.dumps({
+            'answer_review': 'The answer covers the main idea and explains it clearly.',
+            'score': 7,
+            'suggestions': 'Add a concrete example from a real project.',
+        }),
+    },
+    {
+        'match': r'"strengths"',
+        'content': json.dumps({
+            'strengths': ['Consistent answers'],
+            'weaknesses': ['Limited depth on advanced topics'],
+            'tips': ['Review the fundamentals before the next attempt'],
+            'overall_assessment': 'Steady performance across questions.',
+            'recommendation': 'Retake after focused practice.',
+        }),
+    },
+    {
+        'match': r'CV writer.*"summary"',
+        'content': json.dumps({
+            'summary': 'Backend engineer who builds reliable, well-tested services.',
+            'experience': [{
+                'title': 'Software Engineer', 'company': 'Example Corp', 'start': '01/2021', 'end': 'Present',
+                'description': 'Cut API latency by 40% by introducing caching and query optimization.',
+            }],
+            'skills': {'technical': ['Python', 'Django'], 'soft': ['Communication'], 'tools': ['Docker', 'Git']},
+            'projects': [{
+                'title': 'Job board', 'description': 'Served 10k monthly users.', 'tech': 'Django, React', 'link': '',
+            }],
+        }),
+    },
+    {
+        'match': r'',
+        'content': 'Think about the core concept behind the question and walk through a small example step by step.',
+    },
+]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency sampler from ``kind:arg[:arg]`` (seconds).
+
+    ``constant:0.5``, ``uniform:0.2:1.5``, ``normal:0.8:0.2`` (mean, stddev)
+    or ``lognormal:0.8:0.5`` (median, sigma).
+    """
+    kind, _, args = spec.partition(':')
+    values = [float(value) for value in args.split(':') if value]
+    if kind == 'constant' and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(*values)
+    if kind == 'normal' and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(*values))
+    if kind == 'lognormal' and len(values) == 2:
+        median, sigma = values
+        return lambda rng: median * rng.lognormvariate(0, sigma)
+    raise ValueError(f'Invalid latency distribution: {spec!r}')
+
+
+class FakeLLMServer:
+    """Threaded fake provider; use ``start``/``stop`` or as a context manager."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: str = 'constant:0',
+                 tokens_per_second: float = 0, error_rate: float = 0, error_statuses=(429, 503),
+                 retry_after: Optional[float] = 1, responses: Optional[List[Dict[str, str]]] = None,
+                 seed: Optional[int] = None):
+        self.latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.retry_after = retry_after
+        self.responses = [
+            (re.compile(rule['match'], re.DOTALL), Template(rule['content']))
+            for rule in (responses if responses is not None else DEFAULT_RESPONSES)
+        ]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {'requests': 0, 'streamed': 0, 'errors': 0, 'completion_tokens': 0}
+
+        server = self
+
+        class Handler(FakeLLMHandler):
+            fake = server
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self) -> 'FakeLLMServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeLLMServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def draw(self) -> Dict[str, Any]:
+        """Request number, whether it fails, and its time to first token."""
+        with self._lock:
+            self.stats['requests'] += 1
+            return {
+                'request': self.stats['requests'],
+                'fail': self._rng.random() < self.error_rate,
+                'status': self._rng.choice(self.error_statuses) if self.error_statuses else 503,
+                'latency': self.latency(self._rng),
+            }
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[counter] += amount
+
+    def reply_for(self, payload: Dict[str, Any], request: int) -> str:
+        messages = payload.get('messages') or []
+        text = '\n'.join(str(message.get('content', '')) for message in messages)
+        last = str(messages[-1].get('content', '')) if messages else ''
+        values = {'model': payload.get('model', ''), 'request': request, 'prompt': last[:200]}
+        for pattern, template in self.responses:
+            if pattern.search(text):
+                return template.safe_substitute(values)
+        return ''
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    fake = None  # set on the subclass each FakeLLMServer creates
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'not_found'}})
+            return
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'Invalid JSON body', 'type': 'invalid_request_error'}})
+            return
+
+        draw = self.fake.draw()
+        time.sleep(draw['latency'])
+        if draw['fail']:
+            self.fake.count('errors')
+            headers = {}
+            if draw['status'] == 429 and self.fake.retry_after is not None:
+                headers['Retry-After'] = str(self.fake.retry_after)
+            self._send_json(draw['status'], {'error': {'message': 'Simulated failure', 'type': 'server_error'}},
+                            headers)
+            return
+
+        tokens = _TOKEN.findall(self.fake.reply_for(payload, draw['request']))
+        finish_reason = 'stop'
+        max_tokens = payload.get('max_tokens')
+        if max_tokens is not None and len(tokens) > max_tokens:
+            tokens, finish_reason = tokens[:max_tokens], 'length'
+        self.fake.count('completion_tokens', len(tokens))
+
+        completion_id = f'chatcmpl-{uuid.uuid4().hex[:12]}'
+        model = payload.get('model', 'fake')
+        if payload.get('stream'):
+            self.fake.count('streamed')
+            self._stream(completion_id, model, tokens, finish_reason)
+            return
+
+        if self.fake.tokens_per_second:
+            time.sleep(len(tokens) / self.fake.tokens_per_second)
+        prompt_tokens = sum(estimate_tokens(str(m.get('content', ''))) for m in payload.get('messages') or [])
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                'finish_reason': finish_reason,
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(tokens),
+                'total_tokens': prompt_tokens + len(tokens),
+            },
+        })
+
+    def _stream(self, completion_id: str, model: str, tokens: List[str], finish_reason: str) -> None:
+        # Without a length the body ends when the connection closes
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        def chunk(delta, reason=None):
+            event = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': reason}],
+            }
+            self.wfile.write(f'data: {json.dumps(event)}\n\n'.encode())
+            self.wfile.flush()
+
+        try:
+            chunk({'role': 'assistant'})
+            for token in tokens:
+                if self.fake.tokens_per_second:
+                    time.sleep(1 / self.fake.tokens_per_second)
+                chunk({'content': token})
+            chunk({}, finish_reason)
+            self.wfile.write(b'data: [DONE]\n\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away mid-stream
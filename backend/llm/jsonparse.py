@@ -0,0 +1,235 @@
+"""
+Extraction of JSON from model replies.
+
+Models wrap JSON in code fences or prose, stop half-way through when they
+hit ``max_tokens``, and make small syntax mistakes. ``JSONExtractor`` scans
+text as it arrives and returns every top-level JSON value once it closes;
+``partial`` recovers the value that was cut off by closing its open strings
+and brackets and dropping the incomplete last member. Values that do not
+parse as they are go through ``repair``, which fixes the common defects:
+trailing commas, comments, Python literals, typographic quotes and raw line
+breaks inside strings.
+
+``validate`` checks a parsed value against the subset of JSON Schema the
+call sites use (``type``, ``properties``, ``required``, ``items``,
+``enum``); the same schemas are sent to providers in structured-output mode.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+CLOSERS = {'{': '}', '[': ']'}
+LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+_FENCE = re.compile(r'```[a-zA-Z]*')
+_WORD = re.compile(r'[A-Za-z_]+')
+# Candidates tried when recovering a cut-off value, newest member first
+MAX_PARTIAL_ATTEMPTS = 20
+
+
+def repair(text: str) -> str:
+    """Fix common syntax defects in JSON-like text."""
+    out = []
+    in_string = False
+    escape = False
+    closing = '"'
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char in closing:
+                in_string = False
+                char = '"'
+            elif char == '\n':
+                char = '\\n'
+            elif char == '\t':
+                char = '\\t'
+            elif char == '\r':
+                char = ''
+            out.append(char)
+            i += 1
+            continue
+
+        if char in '"“”':
+            in_string = True
+            # A string opened with a typographic quote may close with either kind
+            closing = '"' if char == '"' else '"”'
+            out.append('"')
+        elif char in '}]':
+            # Trailing comma before a closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+            out.append(char)
+        elif text.startswith('//', i):
+            newline = text.find('\n', i)
+            i = len(text) if newline < 0 else newline
+            continue
+        elif _WORD.match(text, i):
+            word = _WORD.match(text, i).group()
+            out.append(LITERALS.get(word, word))
+            i += len(word)
+            continue
+        else:
+            out.append(char)
+        i += 1
+    return ''.join(out)
+
+
+def loads(text: str) -> Optional[Any]:
+    """Parse JSON, repairing it if needed; None if it cannot be parsed."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return json.loads(repair(text))
+    except ValueError:
+        return None
+
+
+class JSONExtractor:
+    """Incremental scanner that returns top-level JSON values as they close in fed text."""
+
+    def __init__(self, openers: str = '{['):
+        self.openers = openers
+        self.values = []
+        self._buffer = []
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Scan more text and return the values completed by it."""
+        found = []
+        for char in text:
+            if not self._stack:
+                if char in self.openers:
+                    self._stack.append(CLOSERS[char])
+                    self._buffer = [char]
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in CLOSERS:
+                self._stack.append(CLOSERS[char])
+            elif char in '}]':
+                # A mismatched closer still ends the innermost value; loads() decides if it parses
+                self._stack.pop()
+                if not self._stack:
+                    value = loads(''.join(self._buffer))
+                    if value is not None:
+                        found.append(value)
+                    self._buffer = []
+        self.values.extend(found)
+        return found
+
+    def partial(self) -> Optional[Any]:
+        """Best-effort value of the JSON still open at the end of the fed text."""
+        if not self._stack:
+            return None
+        text = ''.join(self._buffer)
+        if self._escape:
+            text = text[:-1]
+
+        # Positions where the value can be cut back to its last complete member
+        cuts = []
+        stack = []
+        in_string = escape = False
+        for index, char in enumerate(text):
+            if in_string:
+                if escape:
+                    escape = False
+                elif char == '\\':
+                    escape = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in CLOSERS:
+                stack.append(CLOSERS[char])
+                cuts.append((index + 1, ''.join(reversed(stack))))
+            elif char in '}]' and stack:
+                stack.pop()
+            elif char == ',':
+                cuts.append((index, ''.join(reversed(stack))))
+
+        candidates = [text + ('"' if self._in_string else '') + ''.join(reversed(self._stack))]
+        candidates += [text[:index] + closers for index, closers in reversed(cuts[-MAX_PARTIAL_ATTEMPTS:])]
+        for candidate in candidates:
+            value = loads(candidate)
+            if value is not None:
+                return value
+        return None
+
+
+def extract_json(text: str, allow_partial: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Return the first JSON object in a model reply.
+
+    Code fences and surrounding prose are ignored. If no complete object is
+    found and ``allow_partial`` is set, a cut-off object is recovered.
+    """
+    extractor = JSONExtractor(openers='{')
+    for value in extractor.feed(_FENCE.sub('', text or '')):
+        if isinstance(value, dict):
+            return value
+    if allow_partial:
+        value = extractor.partial()
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'number': (int, float),
+    'integer': int,
+    'boolean': bool,
+    'null': type(None),
+}
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if isinstance(value, bool) and name in ('number', 'integer'):
+        return False
+    return isinstance(value, _TYPES[name])
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = '$') -> List[str]:
+    """Return the ways ``value`` does not match ``schema``; empty if it matches."""
+    expected = schema.get('type')
+    if expected:
+        names = expected if isinstance(expected, list) else [expected]
+        if not any(_is_type(value, name) for name in names):
+            return [f'{path}: expected {" or ".join(names)}, got {type(value).__name__}']
+
+    if 'enum' in schema and value not in schema['enum']:
+        return [f'{path}: {value!r} is not one of {schema["enum"]}']
+
+    errors = []
+    if isinstance(value, dict):
+        for key in schema.get('required', []):
+            if key not in value:
+                errors.append(f'{path}: missing {key}')
+        for key, subschema in schema.get('properties', {}).items():
+            if key in value:
+                errors += validate(value[key], subschema, f'{path}.{key}')
+    elif isinstance(value, list) and 'items' in schema:
+        for index, item in enumerate(value):
+            errors += validate(item, schema['items'], f'{path}[{index}]')
+    return errors
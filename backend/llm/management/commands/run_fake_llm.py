@@ -0,0 +1,55 @@
+"""
+Django management command that serves a fake OpenAI-compatible LLM provider
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from llm.fake_server import FakeLLMServer
+
+
+class Command(BaseCommand):
+    help = 'Serve a local fake chat completions API for load tests and offline benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8090)
+        parser.add_argument('--latency', default='lognormal:0.6:0.4',
+                            help='Time to first token: constant:S, uniform:MIN:MAX, normal:MEAN:SD or lognormal:MEDIAN:SIGMA')
+        parser.add_argument('--tokens-per-second', type=float, default=250, help='Completion token rate (0 for instant)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 429/503')
+        parser.add_argument('--responses', help='JSON file with a list of {"match": regex, "content": template} rules')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        responses = None
+        if options['responses']:
+            try:
+                with open(options['responses']) as fh:
+                    responses = json.load(fh)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read responses file: {str(e)}")
+
+        try:
+            server = FakeLLMServer(
+                host=options['host'],
+                port=options['port'],
+                latency=options['latency'],
+                tokens_per_second=options['tokens_per_second'],
+                error_rate=options['error_rate'],
+                responses=responses,
+                seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'Fake LLM provider listening on {server.url}')
+        self.stdout.write(f'Point the backend at it with LLM_PROVIDER_URL={server.url} LLM_API_KEY=fake')
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+
+        self.stdout.write(self.style.SUCCESS(f"Fake LLM provider stopped after {server.stats['requests']} request(s)"))
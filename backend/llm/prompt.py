@@ -0,0 +1,135 @@
+"""
+Token-budgeted prompts.
+
+``build_prompt`` fills a ``str.format`` template with sections of profile or
+interview data. Sections are serialized as compact JSON with empty values
+and unwanted fields dropped. If the prompt would still exceed the call
+site's budget (``LLM_PROMPT_BUDGETS``, falling back to
+``LLM_PROMPT_BUDGET``), the longest text values are shortened first, so a
+single long job description gives way before short fields lose anything.
+
+Token counts are estimated from the text length; the estimate is good
+enough for budgeting and does not depend on the provider's tokenizer.
+"""
+import json
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+MIN_TEXT_CHARS = 80  # values are never shortened below this
+ELLIPSIS = '…'
+
+_EMPTY = (None, '', [], {})
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or '') / CHARS_PER_TOKEN)
+
+
+def compact(value: Any, drop: Iterable[str] = ()) -> Any:
+    """Copy of ``value`` without empty values and without keys named in ``drop``, at any depth."""
+    drop = frozenset(drop)
+    if isinstance(value, dict):
+        items = ((key, compact(item, drop)) for key, item in value.items() if key not in drop)
+        return {key: item for key, item in items if item not in _EMPTY}
+    if isinstance(value, (list, tuple)):
+        items = (compact(item, drop) for item in value)
+        return [item for item in items if item not in _EMPTY]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON for prompts; strings are inserted as they are."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def prompt_budget(site: Optional[str]) -> int:
+    return settings.LLM_PROMPT_BUDGETS.get(site, settings.LLM_PROMPT_BUDGET)
+
+
+def _text_slots(value: Any, slots: List[list]) -> None:
+    """Collect ``[container, key]`` pairs of every string long enough to shorten."""
+    items = value.items() if isinstance(value, dict) else enumerate(value)
+    for key, item in items:
+        if isinstance(item, str):
+            if len(item) > MIN_TEXT_CHARS:
+                slots.append([value, key])
+        elif isinstance(item, (dict, list)):
+            _text_slots(item, slots)
+
+
+def _shorten(sections: Dict[str, Any], excess_chars: int) -> int:
+    """Cut the longest strings in ``sections`` in place; return the characters removed."""
+    slots = []
+    _text_slots(sections, slots)
+    lengths = sorted((len(container[key]) for container, key in slots), reverse=True)
+
+    # Find the length the longest values are cut down to so that together they free
+    # ``excess_chars``, without cutting any of them below the next longest value
+    cap = MIN_TEXT_CHARS
+    total = 0
+    for count, length in enumerate(lengths, 1):
+        total += length
+        following = lengths[count] if count < len(lengths) else MIN_TEXT_CHARS
+        cap = (total - excess_chars) // count - len(ELLIPSIS)
+        if cap >= max(following, MIN_TEXT_CHARS):
+            break
+    cap = max(cap, MIN_TEXT_CHARS)
+
+    removed = 0
+    for container, key in slots:
+        text = container[key]
+        if len(text) > cap:
+            container[key] = text[:cap].rstrip() + ELLIPSIS
+            removed += len(text) - len(container[key])
+    return removed
+
+
+def build_prompt(template: str, site: Optional[str] = None, drop: Iterable[str] = (),
+                 **sections: Any) -> str:
+    """
+    Format ``template`` with compacted ``sections`` that fit the site's token budget.
+
+    Args:
+        template: ``str.format`` template with one placeholder per section
+        site: Call site whose budget applies
+        drop: Field names left out of every section
+        sections: Values for the placeholders; strings are inserted as they
+            are, anything else as compact JSON
+    """
+    sections = {name: compact(value, drop) for name, value in sections.items()}
+    budget = prompt_budget(site)
+    prompt = template.format(**{name: dumps(value) for name, value in sections.items()})
+    tokens = estimate_tokens(prompt)
+    if tokens <= budget:
+        return prompt
+
+    # Escaping in JSON can make removed characters count more than once; a few passes settle it
+    for _ in range(3):
+        excess_chars = (tokens - budget) * CHARS_PER_TOKEN
+        if not _shorten(sections, excess_chars):
+            break
+        prompt = template.format(**{name: dumps(value) for name, value in sections.items()})
+        tokens = estimate_tokens(prompt)
+        if tokens <= budget:
+            break
+
+    if tokens > budget:
+        logger.warning(f"Prompt for {site} is ~{tokens} tokens after shortening, over its {budget} budget")
+    else:
+        logger.info(f"Prompt for {site} shortened to ~{tokens} tokens to fit its {budget} budget")
+    return prompt
+
+
+def message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimated prompt tokens of chat messages."""
+    return sum(estimate_tokens(message.get('content', '')) for message in messages)
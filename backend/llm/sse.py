@@ -0,0 +1,88 @@
+"""
+Server-Sent Events responses for streamed completions.
+
+A stream sends one ``message`` event per piece of text, ``{"token": "..."}``,
+then a ``done`` event carrying the full text under the view's result key. If
+the provider fails part-way, an ``error`` event is sent instead of ``done``.
+Views return these responses from async views, so under ASGI (as deployed)
+an open stream waits on the event loop instead of holding a worker thread.
+Under WSGI, e.g. ``runserver``, the stream holds a thread until it ends, but
+events are still sent one by one.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from django.http import StreamingHttpResponse
+
+from .client import LLMError, aclose_loop_client
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    lines = [f'event: {event}'] if event else []
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def completion_events(pieces: AsyncIterator[str], result_key: str,
+                            extra: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    """Turn streamed completion text into SSE events."""
+    parts = []
+    try:
+        async for piece in pieces:
+            parts.append(piece)
+            yield sse_event({'token': piece})
+    except LLMError as e:
+        logger.warning(f"Streamed completion failed after {len(parts)} pieces: {e}")
+        yield sse_event({'error': 'Generation failed. Please try again.'}, event='error')
+        return
+
+    yield sse_event({result_key: ''.join(parts).strip(), **(extra or {})}, event='done')
+
+
+class SSEResponse(StreamingHttpResponse):
+    """
+    Streaming response over async events that also streams under WSGI.
+
+    A WSGI server iterates the response synchronously, and Django would
+    collect the whole async iterator before sending the first byte. Here
+    each event is produced on a private event loop and sent right away; the
+    LLM connections opened on that loop are closed with it.
+    """
+
+    def __iter__(self) -> Iterator[bytes]:
+        if not self.is_async:
+            return super().__iter__()
+        return self._iter_events(self._iterator)
+
+    def _iter_events(self, events: AsyncIterator[Any]) -> Iterator[bytes]:
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                try:
+                    event = loop.run_until_complete(events.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield self.make_bytes(event)
+        finally:
+            # Also runs when the client disconnects and the server closes us
+            loop.run_until_complete(self._close(events))
+            loop.close()
+
+    @staticmethod
+    async def _close(events: AsyncIterator[Any]) -> None:
+        try:
+            await events.aclose()
+        finally:
+            await aclose_loop_client()
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingHttpResponse:
+    response = SSEResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
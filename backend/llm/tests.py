@@ -0,0 +1,528 @@
+import json
+import random
+import time
+from unittest import mock
+
+import httpx
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import client as llm_client
+from .breaker import breaker
+from .cache import ResponseCache, get_cache, key_for
+from .client import (
+    CircuitOpen, LLMClient, LLMError, LLMInvalidResponse, LLMNotConfigured, LLMTimeout, chat, chat_json, get_client,
+    stream_chat,
+)
+from .fake_server import FakeLLMServer, parse_latency
+from .jsonparse import JSONExtractor, extract_json, validate
+from .prompt import build_prompt, compact, estimate_tokens
+from .sse import sse_event, sse_response
+
+
+def completion(content):
+    return httpx.Response(200, json={'choices': [{'message': {'role': 'assistant', 'content': content}}]})
+
+
+def completion_stream(*pieces):
+    events = [f"data: {json.dumps({'choices': [{'delta': {'content': piece}}]})}\n\n" for piece in pieces]
+    body = ''.join(events) + 'data: [DONE]\n\n'
+    return httpx.Response(200, content=body.encode(), headers={'content-type': 'text/event-stream'})
+
+
+async def collect(pieces):
+    return [piece async for piece in pieces]
+
+
+class LLMClientTests(SimpleTestCase):
+    def make_client(self, handler, **kwargs):
+        options = {'max_retries': 2, 'backoff': 0.01, 'backoff_max': 0.02}
+        options.update(kwargs)
+        return LLMClient('https://llm.test/v1', 'key', 'test-model',
+                         transport=httpx.MockTransport(handler), **options)
+
+    def test_chat_sends_model_and_returns_content(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return completion('Hello')
+
+        reply = self.make_client(handler).chat([{'role': 'user', 'content': 'Hi'}], max_tokens=10)
+
+        self.assertEqual(reply, 'Hello')
+        body = json.loads(requests[0].content)
+        self.assertEqual(str(requests[0].url), 'https://llm.test/v1/chat/completions')
+        self.assertEqual(requests[0].headers['authorization'], 'Bearer key')
+        self.assertEqual(body['model'], 'test-model')
+        self.assertEqual(body['max_tokens'], 10)
+
+    def test_retries_transient_failures(self):
+        responses = [httpx.Response(503), httpx.Response(429, headers={'retry-after': '0'}), completion('ok')]
+
+        reply = self.make_client(lambda request: responses.pop(0)).chat([{'role': 'user', 'content': 'Hi'}])
+
+        self.assertEqual(reply, 'ok')
+        self.assertEqual(responses, [])
+
+    def test_gives_up_after_max_retries(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ConnectError('refused', request=request)
+
+        with self.assertRaises(LLMError):
+            self.make_client(handler, max_retries=1).chat([{'role': 'user', 'content': 'Hi'}])
+        self.assertEqual(len(calls), 2)
+
+    def test_client_errors_are_not_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(400, json={'error': 'bad request'})
+
+        with self.assertRaises(LLMError):
+            self.make_client(handler).chat([{'role': 'user', 'content': 'Hi'}])
+        self.assertEqual(len(calls), 1)
+
+    def test_deadline_covers_retries(self):
+        def handler(request):
+            raise httpx.ReadTimeout('timed out', request=request)
+
+        client = self.make_client(handler, max_retries=100, backoff=0.05, backoff_max=0.05)
+        start = time.monotonic()
+        with self.assertRaises(LLMTimeout):
+            client.chat([{'role': 'user', 'content': 'Hi'}], deadline=0.3)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_get_client_is_lazy_and_shared(self):
+        with override_settings(LLM_API_KEY=''):
+            with self.assertRaises(LLMNotConfigured):
+                get_client()
+
+        with override_settings(LLM_API_KEY='key'), mock.patch.object(llm_client, '_client', None):
+            first = get_client()
+            self.assertIs(get_client(), first)
+            with override_settings(LLM_MODEL='other-model'):
+                self.assertEqual(get_client().model, 'other-model')
+
+
+@override_settings(LLM_BREAKER_CACHE='default')
+class ResponseCacheTests(SimpleTestCase):
+    def payload(self, content, **kwargs):
+        return {'model': 'm', 'messages': [{'role': 'user', 'content': content}], 'temperature': 0.7, **kwargs}
+
+    def test_key_normalizes_whitespace_only(self):
+        self.assertEqual(key_for(self.payload('Hint  for\n fe1 ')), key_for(self.payload('Hint for fe1')))
+        self.assertNotEqual(key_for(self.payload('Hint for fe1')), key_for(self.payload('Hint for fe2')))
+        self.assertNotEqual(key_for(self.payload('x')), key_for(self.payload('x', max_tokens=10)))
+        self.assertNotEqual(key_for(self.payload('x')), key_for({**self.payload('x'), 'temperature': 0}))
+        self.assertNotEqual(key_for(self.payload('x')), key_for({**self.payload('x'), 'model': 'other'}))
+
+    def test_lru_eviction_and_counters(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set('a', 'A', 60)
+        cache.set('b', 'B', 60)
+        self.assertEqual(cache.get('a', 'hint'), 'A')  # a is now most recent
+        cache.set('c', 'C', 60)
+
+        self.assertIsNone(cache.get('b', 'hint'))
+        self.assertEqual(cache.get('c', 'hint'), 'C')
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['sites']['hint'], {'hits': 2, 'misses': 1})
+
+    def test_entries_expire(self):
+        cache = ResponseCache()
+        cache.set('a', 'A', 60)
+        with mock.patch('llm.cache.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get('a'))
+
+    @override_settings(LLM_API_KEY='key', LLM_CACHE_ENABLED=True,
+                       LLM_CACHE_TTLS={'interview_hint': 60})
+    def test_chat_caches_per_site(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return completion(f'reply {len(calls)}')
+
+        client = LLMClient('https://llm.test/v1', 'key', 'm', transport=httpx.MockTransport(handler))
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        messages = [{'role': 'user', 'content': 'Hint for fe1'}]
+
+        with mock.patch.object(llm_client, 'get_client', return_value=client):
+            self.assertEqual(chat(messages, site='interview_hint', max_tokens=200), 'reply 1')
+            self.assertEqual(chat(messages, site='interview_hint', max_tokens=200), 'reply 1')
+            self.assertEqual(chat(messages, site='interview_hint', max_tokens=100), 'reply 2')
+            self.assertEqual(chat(messages, site='generate_cv'), 'reply 3')
+            self.assertEqual(chat(messages, site='generate_cv'), 'reply 4')
+
+        self.assertEqual(get_cache().stats()['sites']['interview_hint'], {'hits': 1, 'misses': 2})
+
+
+class PromptBuilderTests(SimpleTestCase):
+    def test_compact_drops_empty_and_unwanted_fields(self):
+        experience = [
+            {'id': 7, 'title': 'Engineer', 'company': ' Acme ', 'description': '', 'end': None},
+            {'title': '', 'description': None},
+        ]
+        self.assertEqual(compact(experience, drop=('id',)), [{'title': 'Engineer', 'company': 'Acme'}])
+        self.assertEqual(compact({'level': 0, 'tags': [[], {}]}), {'level': 0})
+
+    @override_settings(LLM_PROMPT_BUDGET=6000, LLM_PROMPT_BUDGETS={})
+    def test_sections_are_compact_json(self):
+        prompt = build_prompt('Name: {name}\nSkills: {skills}', name='Ann', skills=[{'name': 'Go', 'level': ''}])
+        self.assertEqual(prompt, 'Name: Ann\nSkills: [{"name":"Go"}]')
+
+    @override_settings(LLM_PROMPT_BUDGET=6000, LLM_PROMPT_BUDGETS={'generate_cv': 300})
+    def test_longest_text_is_shortened_first(self):
+        projects = [
+            {'title': 'Short', 'description': 'Built a thing.'},
+            {'title': 'Medium', 'description': 'm' * 300},
+            {'title': 'Long', 'description': 'l' * 2000},
+        ]
+        prompt = build_prompt('Projects: {projects}\n{job}', site='generate_cv', projects=projects, job='j' * 100)
+
+        self.assertLessEqual(estimate_tokens(prompt), 300)
+        self.assertIn('Built a thing.', prompt)
+        self.assertIn('j' * 100, prompt)
+        self.assertIn('m' * 300, prompt)
+        self.assertIn('l…', prompt)
+
+    @override_settings(LLM_PROMPT_BUDGET=6000, LLM_PROMPT_BUDGETS={'generate_cv': 30})
+    def test_values_are_not_cut_below_minimum(self):
+        with self.assertLogs('llm.prompt', 'WARNING'):
+            prompt = build_prompt('{a} {b}', site='generate_cv', a='a' * 1000, b='b' * 1000)
+        self.assertIn('a' * 80, prompt)
+        self.assertIn('b' * 80, prompt)
+
+
+@override_settings(LLM_BREAKER_CACHE='default')
+class JSONExtractionTests(SimpleTestCase):
+    def test_fenced_object_with_defects(self):
+        reply = 'Here you go:\n```json\n{"tips": ["a", "b",], // note\n "ready": True, "text": "two\nlines"}\n```'
+        self.assertEqual(extract_json(reply), {'tips': ['a', 'b'], 'ready': True, 'text': 'two\nlines'})
+
+    def test_prose_braces_are_skipped(self):
+        self.assertEqual(extract_json('Use {curly} braces: {"ok": 1}'), {'ok': 1})
+
+    def test_cut_off_object_keeps_complete_members(self):
+        reply = '{"summary": "Backend developer", "experience": [{"title": "Dev", "description": "Led the migr'
+        self.assertEqual(extract_json(reply), {
+            'summary': 'Backend developer',
+            'experience': [{'title': 'Dev', 'description': 'Led the migr'}],
+        })
+        self.assertEqual(extract_json('{"a": 1, "b":'), {'a': 1})
+        self.assertIsNone(extract_json('{"a": 1, "b":', allow_partial=False))
+
+    def test_values_are_returned_as_they_close(self):
+        extractor = JSONExtractor()
+        self.assertEqual(extractor.feed('[{"a": "}"'), [])
+        self.assertEqual(extractor.feed('}] and {"b"'), [[{'a': '}'}]])
+        self.assertEqual(extractor.feed(': 2}'), [{'b': 2}])
+
+    def test_validate(self):
+        schema = {
+            'type': 'object',
+            'required': ['score'],
+            'properties': {'score': {'type': 'number'}, 'tips': {'type': 'array', 'items': {'type': 'string'}}},
+        }
+        self.assertEqual(validate({'score': 7, 'tips': ['x']}, schema), [])
+        self.assertEqual(validate({'tips': [1]}, schema), [
+            '$: missing score', '$.tips[0]: expected string, got int',
+        ])
+        self.assertEqual(validate({'score': True}, schema), ['$.score: expected number, got bool'])
+
+    @override_settings(LLM_API_KEY='key', LLM_CACHE_ENABLED=True, LLM_CACHE_TTLS={'generate_cv': 60},
+                       LLM_JSON_MODE='json_schema')
+    def test_chat_json_requests_schema_and_skips_caching_invalid_replies(self):
+        schema = {'type': 'object', 'required': ['summary']}
+        requests = []
+        replies = iter(['{"title": "CV"}', '{"summary": "Ready"}'])
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return completion(next(replies))
+
+        client = LLMClient('https://llm.test/v1', 'key', 'm', transport=httpx.MockTransport(handler))
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        messages = [{'role': 'user', 'content': 'Write a CV as JSON'}]
+
+        with mock.patch.object(llm_client, 'get_client', return_value=client):
+            with self.assertRaises(LLMInvalidResponse) as ctx:
+                chat_json(messages, schema=schema, site='generate_cv')
+            self.assertEqual(ctx.exception.reply, '{"title": "CV"}')
+            self.assertEqual(chat_json(messages, schema=schema, site='generate_cv'), {'summary': 'Ready'})
+            self.assertEqual(chat_json(messages, schema=schema, site='generate_cv'), {'summary': 'Ready'})
+
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0]['response_format'], {
+            'type': 'json_schema', 'json_schema': {'name': 'generate_cv', 'schema': schema},
+        })
+
+
+    @override_settings(LLM_API_KEY='key', LLM_CACHE_ENABLED=True, LLM_CACHE_TTLS={'generate_cv': 60})
+    def test_chat_json_does_not_cache_cut_off_objects(self):
+        replies = iter(['{"summary": "Ready", "skills": ["Py', '{"summary": "Done"}', '{"summary": "Ready", "ski'])
+
+        client = LLMClient('https://llm.test/v1', 'key', 'm',
+                           transport=httpx.MockTransport(lambda request: completion(next(replies))))
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        messages = [{'role': 'user', 'content': 'Write a CV as JSON'}]
+
+        with mock.patch.object(llm_client, 'get_client', return_value=client):
+            self.assertEqual(chat_json(messages, site='generate_cv'), {'summary': 'Ready', 'skills': ['Py']})
+            self.assertEqual(chat_json(messages, site='generate_cv'), {'summary': 'Done'})
+            get_cache().clear()
+            with self.assertRaises(LLMInvalidResponse):
+                chat_json(messages, site='generate_cv', allow_partial=False)
+
+
+@override_settings(LLM_BREAKER_CACHE='default')
+class LLMStreamTests(SimpleTestCase):
+    def make_client(self, handler):
+        return LLMClient('https://llm.test/v1', 'key', 'm', backoff=0.01, backoff_max=0.02,
+                         transport=httpx.MockTransport(handler))
+
+    async def test_stream_yields_deltas(self):
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return completion_stream('Hel', 'lo')
+
+        client = self.make_client(handler)
+        pieces = await collect(client.stream(client.build_payload([{'role': 'user', 'content': 'Hi'}])))
+
+        self.assertEqual(pieces, ['Hel', 'lo'])
+        self.assertTrue(requests[0]['stream'])
+
+    async def test_stream_retries_before_first_token(self):
+        responses = [httpx.Response(503), completion_stream('ok')]
+        client = self.make_client(lambda request: responses.pop(0))
+
+        pieces = await collect(client.stream(client.build_payload([{'role': 'user', 'content': 'Hi'}])))
+
+        self.assertEqual(pieces, ['ok'])
+
+    async def test_stream_rejects_client_errors(self):
+        client = self.make_client(lambda request: httpx.Response(401, json={'error': 'bad key'}))
+        with self.assertRaises(LLMError):
+            await collect(client.stream(client.build_payload([{'role': 'user', 'content': 'Hi'}])))
+
+    @override_settings(LLM_API_KEY='key', LLM_CACHE_ENABLED=True, LLM_CACHE_TTLS={'interview_hint': 60})
+    async def test_stream_chat_fills_and_uses_cache(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return completion_stream('Think ', 'about scope.')
+
+        client = self.make_client(handler)
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        messages = [{'role': 'user', 'content': 'Hint for fe1'}]
+
+        with mock.patch.object(llm_client, 'get_client', return_value=client):
+            first = await collect(stream_chat(messages, site='interview_hint'))
+            second = await collect(stream_chat(messages, site='interview_hint'))
+            self.assertEqual(chat(messages, site='interview_hint'), 'Think about scope.')
+
+        self.assertEqual(first, ['Think ', 'about scope.'])
+        self.assertEqual(second, ['Think about scope.'])
+        self.assertEqual(len(calls), 1)
+
+
+class SSEResponseTests(SimpleTestCase):
+    def test_sync_iteration_sends_each_event_when_produced(self):
+        produced = []
+        closed = []
+
+        async def events():
+            try:
+                for n in range(3):
+                    produced.append(n)
+                    yield sse_event({'n': n})
+            finally:
+                closed.append(True)
+
+        chunks = iter(sse_response(events()))
+        self.assertEqual(next(chunks), b'data: {"n": 0}\n\n')
+        self.assertEqual(produced, [0])
+        self.assertEqual(list(chunks), [b'data: {"n": 1}\n\n', b'data: {"n": 2}\n\n'])
+        self.assertEqual(closed, [True])
+
+    def test_sync_iteration_closes_the_loop_connections(self):
+        client = LLMClient('https://llm.test/v1', 'key', 'm',
+                           transport=httpx.MockTransport(lambda request: completion_stream('Hi')))
+        opened = []
+
+        async def events():
+            opened.append(client._async_client())
+            async for piece in client.stream(client.build_payload([{'role': 'user', 'content': 'x'}])):
+                yield sse_event({'token': piece})
+
+        with mock.patch.object(llm_client, '_client', client):
+            chunks = list(sse_response(events()))
+
+        self.assertEqual(chunks, [b'data: {"token": "Hi"}\n\n'])
+        self.assertTrue(opened[0].is_closed)
+        self.assertEqual(len(client._async_clients), 0)
+
+    def test_closing_early_closes_the_events(self):
+        closed = []
+
+        async def events():
+            try:
+                while True:
+                    yield sse_event({})
+            finally:
+                closed.append(True)
+
+        response = sse_response(events())
+        chunks = iter(response)
+        next(chunks)
+        chunks.close()
+        self.assertEqual(closed, [True])
+
+    async def test_async_iteration_is_unchanged(self):
+        async def events():
+            yield sse_event({'n': 0})
+
+        response = sse_response(events())
+        self.assertEqual([chunk async for chunk in response], [b'data: {"n": 0}\n\n'])
+
+
+class FakeLLMServerTests(SimpleTestCase):
+    def serve(self, **kwargs):
+        server = FakeLLMServer(seed=1, **kwargs).start()
+        self.addCleanup(server.stop)
+        client = LLMClient(server.url, 'fake', 'm', max_retries=1, backoff=0.01, backoff_max=0.01)
+        self.addCleanup(client.close)
+        return server, client
+
+    def test_canned_responses_and_truncation(self):
+        server, client = self.serve(responses=[
+            {'match': 'hint', 'content': 'Hint $request for $model'},
+            {'match': '', 'content': 'one two three four'},
+        ])
+        self.assertEqual(client.chat([{'role': 'user', 'content': 'hint please'}]), 'Hint 1 for m')
+        self.assertEqual(client.chat([{'role': 'user', 'content': 'other'}], max_tokens=2), 'one two ')
+        self.assertEqual(server.stats['requests'], 2)
+
+    def test_default_responses_are_valid_for_call_sites(self):
+        _, client = self.serve()
+        messages = [{'role': 'user', 'content': 'Return ONLY valid JSON: {"answer_review": "...", "score": 0}'}]
+        self.assertEqual(extract_json(client.chat(messages))['score'], 7)
+
+    async def test_streaming(self):
+        _, client = self.serve(responses=[{'match': '', 'content': 'Think about scope.'}], tokens_per_second=1000)
+        pieces = await collect(client.stream(client.build_payload([{'role': 'user', 'content': 'x'}])))
+        self.assertEqual(pieces, ['Think ', 'about ', 'scope.'])
+
+    def test_simulated_errors_are_retried_then_raised(self):
+        server, client = self.serve(error_rate=1, error_statuses=[503])
+        with self.assertRaises(LLMError):
+            client.chat([{'role': 'user', 'content': 'x'}])
+        self.assertEqual(server.stats['errors'], 2)
+
+    def test_latency_distributions(self):
+        rng = random.Random(0)
+        self.assertEqual(parse_latency('constant:0.25')(rng), 0.25)
+        self.assertTrue(0.1 <= parse_latency('uniform:0.1:0.2')(rng) <= 0.2)
+        self.assertGreater(parse_latency('lognormal:0.5:0.3')(rng), 0)
+        with self.assertRaises(ValueError):
+            parse_latency('pareto:1')
+
+
+@override_settings(LLM_API_KEY='key', LLM_CACHE_ENABLED=True, LLM_CACHE_TTLS={'interview_hint': 60},
+                   LLM_BREAKER_ENABLED=True, LLM_BREAKER_FAILURES=2, LLM_BREAKER_WINDOW=30, LLM_BREAKER_COOLDOWN=10)
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        self.status = 503
+        self.calls = 0
+
+        def handler(request):
+            self.calls += 1
+            if self.status != 200:
+                return httpx.Response(self.status, json={'error': 'down'})
+            return completion(f'reply {self.calls}')
+
+        client = LLMClient('https://llm.test/v1', 'key', 'm', max_retries=0, transport=httpx.MockTransport(handler))
+        patcher = mock.patch.object(llm_client, 'get_client', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        caches['shared'].clear()
+
+    def ask(self, content='Hint for q1', site=None):
+        return chat([{'role': 'user', 'content': content}], site=site)
+
+    def test_opens_after_failures_and_fails_fast(self):
+        for _ in range(2):
+            with self.assertRaises(LLMError):
+                self.ask()
+        self.assertEqual(breaker.state()['state'], 'open')
+
+        with self.assertRaises(CircuitOpen):
+            self.ask()
+        self.assertEqual(self.calls, 2)
+
+    def test_serves_stale_reply_while_open(self):
+        self.status = 200
+        self.assertEqual(self.ask(site='interview_hint'), 'reply 1')
+        self.status = 503
+        with mock.patch('llm.cache.time.monotonic', return_value=time.monotonic() + 120):
+            self.assertEqual(self.ask(site='interview_hint'), 'reply 1')  # the call failed
+            self.ask(site='interview_hint')
+            self.assertEqual(breaker.state()['state'], 'open')
+            self.assertEqual(self.ask(site='interview_hint'), 'reply 1')  # no call made
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(get_cache().stats()['sites']['interview_hint']['stale'], 3)
+
+    def test_probe_after_cooldown_closes_or_reopens(self):
+        for _ in range(2):
+            with self.assertRaises(LLMError):
+                self.ask()
+
+        later = time.time() + 11
+        with mock.patch('llm.breaker.time.time', return_value=later):
+            self.assertEqual(breaker.state()['state'], 'half_open')
+            with self.assertRaises(LLMError):
+                self.ask()  # failed probe
+            self.assertEqual(breaker.state()['state'], 'open')
+
+        with mock.patch('llm.breaker.time.time', return_value=later + 11):
+            self.status = 200
+            self.assertEqual(self.ask(), 'reply 4')
+            self.assertEqual(breaker.state()['state'], 'closed')
+        self.assertEqual(self.calls, 4)
+
+    def test_in_flight_failures_do_not_extend_cooldown(self):
+        for _ in range(2):
+            with self.assertRaises(LLMError):
+                self.ask()
+        open_until = caches['shared'].get(breaker.open_key)
+
+        # A call that started before the breaker opened fails during the cool-down
+        with mock.patch('llm.breaker.time.time', return_value=time.time() + 5):
+            breaker.record_failure()
+        self.assertEqual(caches['shared'].get(breaker.open_key), open_until)
+
+        with mock.patch('llm.breaker.time.time', return_value=open_until + 1):
+            self.assertEqual(breaker.state()['state'], 'half_open')
+
+    def test_rejected_requests_do_not_trip(self):
+        self.status = 400
+        for _ in range(3):
+            with self.assertRaises(LLMError):
+                self.ask()
+        self.assertEqual(breaker.state()['state'], 'closed')
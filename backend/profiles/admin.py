@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Profile, CV
+from .models import Profile, CV, ExportJob
 
 
 @admin.register(Profile)
@@ -17,3 +17,12 @@ class CVAdmin(admin.ModelAdmin):
     search_fields = ['title', 'user__email']
     readonly_fields = ['user', 'version', 'created_at', 'updated_at']
     ordering = ['-updated_at']
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['cv', 'user', 'format', 'status', 'is_prerender', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'format', 'is_prerender', 'created_at']
+    search_fields = ['user__email', 'cv__title']
+    readonly_fields = ['user', 'cv', 'cache_key', 'created_at', 'started_at', 'finished_at']
+    ordering = ['-created_at']
@@ -0,0 +1,41 @@
+"""
+Django management command that drains the CV export job queue
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from profiles.services.export_jobs import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Render queued CV exports in the background'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Exit after processing this many jobs')
+
+    def handle(self, *args, **options):
+        once = options['once']
+        poll_interval = options['poll_interval']
+        max_jobs = options['max_jobs']
+        total = 0
+
+        self.stdout.write('Export worker started')
+        try:
+            while True:
+                remaining = None if max_jobs is None else max_jobs - total
+                processed = process_pending(max_jobs=remaining)
+                total += processed
+                if processed:
+                    self.stdout.write(f'Processed {processed} export job(s)')
+
+                if once or (max_jobs is not None and total >= max_jobs):
+                    break
+                if not processed:
+                    time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'Export worker stopped after {total} job(s)'))
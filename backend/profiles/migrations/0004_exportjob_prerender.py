@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='is_prerender',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='run_after',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_exportjob_prerender'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cv',
+            name='thumbnail_url',
+            field=models.URLField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='format',
+            field=models.CharField(choices=[('pdf', 'PDF'), ('docx', 'DOCX'), ('thumbnail', 'Thumbnail')], default='pdf', max_length=10),
+        ),
+    ]
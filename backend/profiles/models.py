@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.conf import settings
 import uuid
 
@@ -54,6 +55,7 @@ class CV(models.Model):
 
     # Export/render
     rendered_pdf_url = models.URLField(blank=True, null=True)
+    thumbnail_url = models.URLField(blank=True, null=True)  # First page preview, see services/thumbnails.py
 
     # Versioning
     version = models.IntegerField(default=1)
@@ -71,3 +73,48 @@ class CV(models.Model):
 
     def __str__(self):
         return f"{self.title} by {self.user.email}"
+
+
+class ExportJob(models.Model):
+    """Queued CV export rendered outside the request cycle by the export worker."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    FORMAT_CHOICES = [
+        ('pdf', 'PDF'),
+        ('docx', 'DOCX'),
+        ('thumbnail', 'Thumbnail'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='export_jobs')
+    cv = models.ForeignKey(CV, on_delete=models.CASCADE, related_name='export_jobs')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='pdf')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+
+    # Pre-renders scheduled after a save wait out the debounce window before running
+    is_prerender = models.BooleanField(default=False)
+    run_after = models.DateTimeField(default=timezone.now, db_index=True)
+
+    # Result: rendered bytes live in storage (export_jobs.result_key); the render cache key is their ETag
+    cache_key = models.CharField(max_length=64, blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    error_message = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'export_jobs'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.format} export of {self.cv_id} - {self.status}"
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Profile, CV
+from .models import Profile, CV, ExportJob
+from .services.sections import normalize_sections
 
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -22,20 +23,53 @@ class CVSerializer(serializers.ModelSerializer):
     class Meta:
         model = CV
         fields = [
-            'id', 'title', 'template_key', 'sections', 'rendered_pdf_url',
+            'id', 'title', 'template_key', 'sections', 'rendered_pdf_url', 'thumbnail_url',
             'version', 'changelog', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'rendered_pdf_url', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'rendered_pdf_url', 'thumbnail_url', 'created_at', 'updated_at']
 
 
-class CVCreateSerializer(serializers.ModelSerializer):
+class CVSectionsMixin:
+    """Store sections in the canonical schema, see services/sections.py."""
+
+    def validate_sections(self, value):
+        try:
+            return normalize_sections(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+
+class CVCreateSerializer(CVSectionsMixin, serializers.ModelSerializer):
     class Meta:
         model = CV
         fields = ['title', 'template_key', 'sections']
 
 
-class CVUpdateSerializer(serializers.ModelSerializer):
+class CVUpdateSerializer(CVSectionsMixin, serializers.ModelSerializer):
     class Meta:
         model = CV
         fields = ['title', 'template_key', 'sections']
 
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    cv_id = serializers.UUIDField(source='cv.id', read_only=True)
+    status_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'cv_id', 'format', 'status', 'filename', 'error_message',
+            'status_url', 'download_url', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_status_url(self, obj):
+        return f'/api/export-jobs/{obj.id}/'
+
+    def get_download_url(self, obj):
+        # Thumbnails are published on the CV rather than downloaded from the job
+        if obj.status != 'completed' or obj.format == 'thumbnail':
+            return None
+        return f'/api/export-jobs/{obj.id}/download/'
@@ -0,0 +1,109 @@
+"""Concurrent rendering of many CV exports streamed as a ZIP archive."""
+import logging
+import shutil
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, List
+
+from .cv_export_service import CVExportService
+
+logger = logging.getLogger(__name__)
+
+
+class _ZipStream:
+    """
+    Write-only buffer handed to ``ZipFile``.
+
+    It has no ``seek``/``tell``, so ``ZipFile`` writes data descriptors after
+    each entry instead of rewinding, and the bytes written so far can be
+    drained and sent to the client after every entry.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(filename: str, used: set) -> str:
+    name = filename
+    stem, _, extension = filename.rpartition('.')
+    counter = 2
+    while name in used:
+        name = f'{stem}_{counter}.{extension}'
+        counter += 1
+    used.add(name)
+    return name
+
+
+def iter_zip(cvs: Iterable, formats: List[str], max_workers: int) -> Iterator[bytes]:
+    """
+    Render every CV in every format concurrently and yield the ZIP archive.
+
+    Entries are written in completion order, so the client starts receiving
+    data as soon as the first render finishes. At most ``max_workers`` renders
+    are submitted at a time and the next one is submitted only after a
+    finished document has been copied into the archive and closed, so no
+    more than ``max_workers`` documents are open however slowly the client
+    reads. Documents are read from the render cache, not loaded whole.
+    Failed renders are listed in ``errors.txt``.
+    """
+    stream = _ZipStream()
+    used_names = set()
+    errors = []
+    jobs = ((cv, export_format) for cv in cvs for export_format in formats)
+
+    # Documents are already compressed, so entries are stored as-is
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        in_flight = {}
+
+        def submit_next():
+            job = next(jobs, None)
+            if job is not None:
+                in_flight[executor.submit(CVExportService.export_file, *job)] = job
+
+        try:
+            for _ in range(max_workers):
+                submit_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                while done:
+                    # Drop every reference to the future so its document is freed once written
+                    future = done.pop()
+                    cv, export_format = in_flight.pop(future)
+                    try:
+                        exported = future.result()
+                    except Exception as e:
+                        logger.exception(f"Bulk export of {cv.id} ({export_format}) failed: {str(e)}")
+                        errors.append(f'{cv.title} ({cv.id}) [{export_format}]: {str(e)}')
+                    else:
+                        try:
+                            with archive.open(_unique_name(exported.filename, used_names), mode='w') as entry:
+                                shutil.copyfileobj(exported.file, entry)
+                        finally:
+                            exported.close()
+                        del exported
+                    del future
+                    submit_next()
+                    yield stream.drain()
+        finally:
+            # Skip queued renders if the client disconnected mid-stream
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if errors:
+            archive.writestr('errors.txt', '\n'.join(errors) + '\n')
+
+    # Central directory is written when the archive closes
+    yield stream.drain()
@@ -1,76 +1,49 @@
 """
-AI-powered CV generation service using Groq API.
+AI-powered CV generation service using the shared LLM client.
 """
 
-import os
 import json
-from groq import Groq
-from dotenv import load_dotenv
 
-load_dotenv()
+from llm.client import LLMInvalidResponse, chat, chat_json, is_configured, stream_chat
+from llm.prompt import build_prompt
 
-# Initialize Groq client
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-client = None
-if GROQ_API_KEY:
-    try:
-        client = Groq(api_key=GROQ_API_KEY)
-    except Exception as e:
-        print(f"Warning: Failed to initialize Groq client: {e}")
+# Deadlines per call, retries included, in seconds (gunicorn kills requests at 60s)
+GENERATE_DEADLINE = 40
+ENHANCE_DEADLINE = 20
 
+# Shape generate_cv_content expects back; also sent to the provider in json_schema mode
+CV_SCHEMA = {
+    'type': 'object',
+    'required': ['summary'],
+    'properties': {
+        'summary': {'type': 'string'},
+        'experience': {'type': 'array', 'items': {'type': 'object'}},
+        'skills': {'type': ['object', 'array']},
+        'projects': {'type': 'array', 'items': {'type': 'object'}},
+    },
+}
 
-def generate_cv_content(profile_data, job_description=""):
-    """
-    Generate CV content using AI based on profile data and optional job description.
+# Sections are filled in by build_prompt as compact JSON trimmed to the call site's token budget
+CV_PROMPT = """You are a professional CV writer. Based on the following profile information, generate a compelling CV with the following sections:
 
-    Args:
-        profile_data: Dict with user's profile information
-        job_description: Optional job description to tailor CV
-
-    Returns:
-        Dict with generated CV sections
-    """
-    if not client:
-        return {
-            'error': 'AI service not available',
-            'message': 'Please configure GROQ_API_KEY'
-        }
-
-    # Extract profile information
-    full_name = profile_data.get('full_name', 'Professional')
-    email = profile_data.get('email', '')
-    experience = profile_data.get('experience', [])
-    education = profile_data.get('education', [])
-    skills = profile_data.get('skills', [])
-    projects = profile_data.get('projects', [])
-    profile_summary = profile_data.get('summary', '')
-
-    # Build context for AI
-    context = f"""
 Profile Information:
 - Name: {full_name}
 - Email: {email}
-- Current Summary: {profile_summary}
+- Current Summary: {summary}
 
 Experience:
-{json.dumps(experience, indent=2)}
+{experience}
 
 Education:
-{json.dumps(education, indent=2)}
+{education}
 
 Skills:
-{json.dumps(skills, indent=2)}
+{skills}
 
 Projects:
-{json.dumps(projects, indent=2)}
-"""
-
-    if job_description:
-        context += f"\n\nTarget Job Description:\n{job_description}"
-
-    prompt = f"""You are a professional CV writer. Based on the following profile information, generate a compelling CV with the following sections:
+{projects}
 
-{context}
+{job_description}
 
 Please provide a JSON response with these sections:
 1. "summary" - A compelling professional summary (2-3 sentences highlighting key strengths and career focus)
@@ -81,7 +54,7 @@ Please provide a JSON response with these sections:
 Guidelines:
 - Use action verbs and quantify achievements where possible
 - Make it achievement-focused, not just task-focused
-- Tailor to {'the job description' if job_description else 'general professional excellence'}
+- Tailor to {target}
 - Keep descriptions concise but impactful
 - Maintain professional tone
 
@@ -113,10 +86,42 @@ Return ONLY valid JSON in this exact format:
 }}
 """
 
+
+def generate_cv_content(profile_data, job_description=""):
+    """
+    Generate CV content using AI based on profile data and optional job description.
+
+    Args:
+        profile_data: Dict with user's profile information
+        job_description: Optional job description to tailor CV
+
+    Returns:
+        Dict with generated CV sections
+    """
+    if not is_configured():
+        return {
+            'error': 'AI service not available',
+            'message': 'Please configure LLM_API_KEY'
+        }
+
+    prompt = build_prompt(
+        CV_PROMPT,
+        site="generate_cv",
+        drop=('id',),
+        full_name=profile_data.get('full_name', 'Professional'),
+        email=profile_data.get('email', ''),
+        summary=profile_data.get('summary', ''),
+        experience=profile_data.get('experience', []),
+        education=profile_data.get('education', []),
+        skills=profile_data.get('skills', []),
+        projects=profile_data.get('projects', []),
+        job_description=f"Target Job Description:\n{job_description}" if job_description else '',
+        target='the job description' if job_description else 'general professional excellence',
+    )
+
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
+        generated_content = chat_json(
+            [
                 {
                     "role": "system",
                     "content": "You are an expert CV writer and career advisor. You create compelling, ATS-friendly CVs that highlight achievements and impact."
@@ -127,30 +132,21 @@ Return ONLY valid JSON in this exact format:
                 }
             ],
             temperature=0.7,
-            max_tokens=2000
+            max_tokens=2000,
+            schema=CV_SCHEMA,
+            deadline=GENERATE_DEADLINE,
+            site="generate_cv",
+            # A cut-off CV would replace the user's existing ones
+            allow_partial=False
         )
+        return generated_content
 
-        ai_response = response.choices[0].message.content
-
-        # Extract JSON from response
-        json_start = ai_response.find('{')
-        json_end = ai_response.rfind('}') + 1
-
-        if json_start >= 0 and json_end > json_start:
-            generated_content = json.loads(ai_response[json_start:json_end])
-            return generated_content
-        else:
-            # Fallback if JSON not found
-            return {
-                'error': 'Invalid AI response format',
-                'raw_response': ai_response
-            }
-
-    except json.JSONDecodeError as e:
-        print(f"JSON decode error: {e}")
+    except LLMInvalidResponse as e:
+        print(f"Invalid CV generation response: {e}")
         return {
-            'error': 'Failed to parse AI response',
-            'message': str(e)
+            'error': 'Invalid AI response format',
+            'message': str(e),
+            'raw_response': e.reply
         }
     except Exception as e:
         print(f"Error generating CV content: {e}")
@@ -160,21 +156,8 @@ Return ONLY valid JSON in this exact format:
         }
 
 
-def enhance_cv_section(section_name, current_content, context=""):
-    """
-    Enhance a specific CV section using AI.
-
-    Args:
-        section_name: Name of the section (e.g., 'summary', 'experience')
-        current_content: Current content of the section
-        context: Additional context to help AI
-
-    Returns:
-        Enhanced content as string or dict
-    """
-    if not client:
-        return current_content
-
+def enhance_messages(section_name, current_content, context=""):
+    """Chat messages asking to enhance one CV section."""
     prompts = {
         'summary': f"""Enhance this professional summary to be more compelling and achievement-focused:
 
@@ -207,26 +190,60 @@ Organize into categories (Technical, Soft Skills, Tools) and present in a profes
 
     prompt = prompts.get(section_name, f"Enhance this CV section:\n\n{current_content}")
 
+    return [
+        {
+            "role": "system",
+            "content": "You are an expert CV writer. Enhance CV content to be achievement-focused and impactful."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+
+
+def enhance_cv_section(section_name, current_content, context=""):
+    """
+    Enhance a specific CV section using AI.
+
+    Args:
+        section_name: Name of the section (e.g., 'summary', 'experience')
+        current_content: Current content of the section
+        context: Additional context to help AI
+
+    Returns:
+        Enhanced content as string or dict
+    """
+    if not is_configured():
+        return current_content
+
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert CV writer. Enhance CV content to be achievement-focused and impactful."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
+        enhanced = chat(
+            enhance_messages(section_name, current_content, context),
             temperature=0.7,
-            max_tokens=500
+            max_tokens=500,
+            deadline=ENHANCE_DEADLINE,
+            site="enhance_section"
         )
 
-        return response.choices[0].message.content.strip()
+        return enhanced.strip()
 
     except Exception as e:
         print(f"Error enhancing section: {e}")
         return current_content
 
+
+async def stream_enhance_cv_section(section_name, current_content, context=""):
+    """Async generator yielding the enhanced section as the provider produces it."""
+    if not is_configured():
+        yield current_content if isinstance(current_content, str) else json.dumps(current_content)
+        return
+
+    async for piece in stream_chat(
+        enhance_messages(section_name, current_content, context),
+        temperature=0.7,
+        max_tokens=500,
+        deadline=ENHANCE_DEADLINE,
+        site="enhance_section"
+    ):
+        yield piece
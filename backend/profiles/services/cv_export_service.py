@@ -1,53 +1,219 @@
 """Service for exporting CV to PDF and DOCX formats."""
-from io import BytesIO
+import hashlib
+import json
+import os
+from io import BufferedReader, BytesIO, FileIO
 from datetime import datetime
-from typing import Any, Tuple
+from typing import Any, BinaryIO, Optional
 
+from django.conf import settings
 from django.template.loader import render_to_string
-from weasyprint import HTML
+from django.urls import reverse
 from docx import Document
 from docx.shared import Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
+from .docx_builder import build_docx
+from .render_cache import get_render_cache, template_digest
+from .render_pool import get_render_pool
+from .storage import get_storage
+from .stylesheets import write_pdf
+
+# Sections rendered as individually cached template fragments
+FRAGMENT_SECTIONS = ('experience', 'education', 'skills', 'projects')
+
+
+class ExportedFile:
+    """An export ready to be streamed: an open binary file plus its metadata."""
+
+    def __init__(self, file: BinaryIO, filename: str, etag: Optional[str] = None):
+        self.file = file
+        self.filename = filename
+        self.etag = etag
+
+        # Spooled temporary files would roll over to disk on fileno()
+        if isinstance(file, (BufferedReader, FileIO)):
+            self.size = os.fstat(file.fileno()).st_size
+            return
+        file.seek(0, os.SEEK_END)
+        self.size = file.tell()
+        file.seek(0)
+
+    def close(self) -> None:
+        self.file.close()
+
 
 class CVExportService:
     """Service for exporting CV to various formats."""
 
     @staticmethod
-    def export_to_pdf(cv: Any) -> Tuple[BytesIO, str]:
+    def export_file(cv: Any, extension: str) -> ExportedFile:
         """
-        Export CV to PDF format.
+        Export CV for streaming to a client.
+
+        Cached exports are returned as an open handle on the render cache file
+        and fresh renders are written to the cache before being reopened, so
+        the response never holds more than one copy of the document.
 
         Args:
             cv: CV model instance
+            extension: 'pdf' or 'docx'
 
         Returns:
-            Tuple of (BytesIO buffer, filename)
+            ExportedFile whose etag is the render cache key, when caching is enabled
         """
-        # Render HTML template
-        html_content = CVExportService._render_cv_html(cv)
+        render = CVExportService._render_pdf if extension == 'pdf' else CVExportService._render_docx
+        filename = CVExportService._generate_filename(cv, extension)
+
+        cache = get_render_cache()
+        if not cache.enabled:
+            return ExportedFile(render(cv), filename)
+
+        key = cache.key_for(cv, extension)
+        file = cache.open(key, extension)
+        if file is None:
+            buffer = render(cv)
+            with buffer.getbuffer() as view:
+                cache.put(key, extension, view)
+            file = cache.open(key, extension)
+            if file is None:
+                # Document alone exceeds the cache budget
+                return ExportedFile(buffer, filename, etag=key)
+            del buffer
+
+        return ExportedFile(file, filename, etag=key)
 
-        # Convert HTML to PDF using WeasyPrint
-        pdf_buffer = BytesIO()
-        HTML(string=html_content).write_pdf(pdf_buffer)
-        pdf_buffer.seek(0)
+    @staticmethod
+    def open_cached(cv: Any, extension: str) -> Optional[ExportedFile]:
+        """Open the CV's export from the local render cache, or return None without rendering."""
+        cache = get_render_cache()
+        if not cache.enabled:
+            return None
+        key = cache.key_for(cv, extension)
+        file = cache.open(key, extension)
+        if file is None:
+            return None
+        return ExportedFile(file, CVExportService._generate_filename(cv, extension), etag=key)
 
-        # Generate filename
-        filename = CVExportService._generate_filename(cv, 'pdf')
+    @staticmethod
+    def export_etag(cv: Any, extension: str) -> Optional[str]:
+        """Return the entity tag an export of ``cv`` would carry, without rendering."""
+        cache = get_render_cache()
+        if not cache.enabled:
+            return None
+        return cache.key_for(cv, extension)
+
+    @staticmethod
+    def storage_key(cv: Any) -> str:
+        """Return the storage key of the rendered PDF for the CV's current version."""
+        return f'cvs/{cv.id}/v{cv.version}.pdf'
+
+    @staticmethod
+    def published_pdf_url(cv: Any) -> str:
+        """
+        Return the URL recorded in ``rendered_pdf_url`` for the CV's current version.
 
-        return pdf_buffer, filename
+        It points at the authenticated export view rather than at storage, so
+        the stored document is never reachable without the owner's session.
+        """
+        return f"{reverse('profiles:cv_export', kwargs={'cv_id': cv.id})}?format=pdf&v={cv.version}"
 
     @staticmethod
-    def export_to_docx(cv: Any) -> Tuple[BytesIO, str]:
+    def publish_pdf(cv: Any, exported: Optional[ExportedFile] = None) -> str:
         """
-        Export CV to DOCX format.
+        Write the CV's rendered PDF to storage and record its download URL on the CV.
 
         Args:
             cv: CV model instance
+            exported: Already rendered PDF to upload; rendered when omitted
 
         Returns:
-            Tuple of (BytesIO buffer, filename)
+            The URL stored in ``rendered_pdf_url``
+        """
+        storage = get_storage()
+        key = CVExportService.storage_key(cv)
+
+        owned = exported is None
+        if owned:
+            exported = CVExportService.export_file(cv, 'pdf')
+        try:
+            exported.file.seek(0)
+            storage.save(key, exported.file, 'application/pdf')
+            exported.file.seek(0)
+        finally:
+            if owned:
+                exported.close()
+
+        cv.rendered_pdf_url = CVExportService.published_pdf_url(cv)
+        cv.save(update_fields=['rendered_pdf_url'])
+        return cv.rendered_pdf_url
+
+    @staticmethod
+    def is_pdf_published(cv: Any) -> bool:
+        """Whether storage holds the PDF of the CV's current version."""
+        if not cv.rendered_pdf_url:
+            return False
+        return cv.rendered_pdf_url == CVExportService.published_pdf_url(cv)
+
+    @staticmethod
+    def stored_pdf_download_url(cv: Any) -> Optional[str]:
+        """
+        Return a URL the client can download the published PDF from directly.
+
+        None when the PDF is not published or the backend cannot serve it
+        without going through the application.
         """
+        if not CVExportService.is_pdf_published(cv):
+            return None
+        filename = CVExportService._generate_filename(cv, 'pdf')
+        return get_storage().download_url(CVExportService.storage_key(cv), filename)
+
+    @staticmethod
+    def open_stored_pdf(cv: Any) -> Optional[ExportedFile]:
+        """Open the published PDF for streaming, or return None if it is not in storage."""
+        if not CVExportService.is_pdf_published(cv):
+            return None
+        file = get_storage().open(CVExportService.storage_key(cv))
+        if file is None:
+            return None
+        filename = CVExportService._generate_filename(cv, 'pdf')
+        return ExportedFile(file, filename, etag=CVExportService.export_etag(cv, 'pdf'))
+
+    @staticmethod
+    def render_preview(cv: Any) -> str:
+        """
+        Render the CV template to HTML for an in-browser preview.
+
+        Experience, education, skills and projects are cached as template
+        fragments keyed by a hash of their data, so after an edit only the
+        changed sections are rendered again.
+        """
+        return CVExportService._render_cv_html(cv)
+
+    @staticmethod
+    def _render_pdf(cv: Any) -> BytesIO:
+        """Render CV to PDF bytes with WeasyPrint, using the cached template stylesheet."""
+        # Render HTML template
+        html_content = CVExportService._render_cv_html(cv)
+
+        # Offload WeasyPrint to the render pool when one is configured
+        pool = get_render_pool()
+        if pool is not None:
+            return BytesIO(pool.render_pdf(html_content, cv.template_key))
+
+        # Convert HTML to PDF using WeasyPrint
+        return BytesIO(write_pdf(html_content, cv.template_key))
+
+    @staticmethod
+    def _render_docx(cv: Any) -> BytesIO:
+        """Build CV as a DOCX document with the configured engine."""
+        if settings.CV_DOCX_ENGINE == 'basic':
+            return CVExportService._render_docx_basic(cv)
+        return build_docx(cv.sections or {})
+
+    @staticmethod
+    def _render_docx_basic(cv: Any) -> BytesIO:
+        """Build CV as a DOCX document with python-docx, styling it from scratch."""
         document = Document()
         sections = cv.sections or {}
 
@@ -78,19 +244,17 @@ class CVExportService:
                 contact.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
             # Links
-            links = personal.get('links', {})
-            if links:
-                links_parts = []
-                if links.get('linkedin'):
-                    links_parts.append(f"LinkedIn: {links['linkedin']}")
-                if links.get('github'):
-                    links_parts.append(f"GitHub: {links['github']}")
-                if links.get('portfolio'):
-                    links_parts.append(f"Portfolio: {links['portfolio']}")
-
-                if links_parts:
-                    links_para = document.add_paragraph(' | '.join(links_parts))
-                    links_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            links_parts = []
+            if personal.get('linkedin'):
+                links_parts.append(f"LinkedIn: {personal['linkedin']}")
+            if personal.get('github'):
+                links_parts.append(f"GitHub: {personal['github']}")
+            if personal.get('website'):
+                links_parts.append(f"Website: {personal['website']}")
+
+            if links_parts:
+                links_para = document.add_paragraph(' | '.join(links_parts))
+                links_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
             document.add_paragraph()  # Spacing
 
@@ -108,7 +272,7 @@ class CVExportService:
             for exp in experience:
                 # Job title and company
                 title_para = document.add_paragraph()
-                title_run = title_para.add_run(exp.get('position') or exp.get('title', 'Position'))
+                title_run = title_para.add_run(exp.get('position') or 'Position')
                 title_run.bold = True
                 title_run.font.size = Pt(12)
 
@@ -118,8 +282,8 @@ class CVExportService:
 
                 # Dates
                 date_parts = []
-                start = exp.get('start_date') or exp.get('start')
-                end = exp.get('end_date') or exp.get('end')
+                start = exp.get('start_date')
+                end = exp.get('end_date')
                 if start:
                     date_parts.append(start)
                 if end:
@@ -158,8 +322,8 @@ class CVExportService:
                 if edu.get('start_date') and edu.get('end_date'):
                     year_para = document.add_paragraph(f"{edu['start_date']} - {edu['end_date']}")
                     year_para.runs[0].font.color.rgb = RGBColor(100, 100, 100)
-                elif edu.get('year'):
-                    year_para = document.add_paragraph(edu['year'])
+                elif edu.get('end_date'):
+                    year_para = document.add_paragraph(edu['end_date'])
                     year_para.runs[0].font.color.rgb = RGBColor(100, 100, 100)
 
                 # Description
@@ -173,24 +337,16 @@ class CVExportService:
         if skills:
             document.add_heading('Skills', level=2)
 
-            # Handle both formats: array of strings or array of objects
-            if skills and isinstance(skills[0], str):
-                # Simple list of skills as strings
-                skills_para = document.add_paragraph(', '.join(skills))
-            else:
-                # Group skills by category
-                skills_by_category = {}
-                for skill in skills:
-                    category = skill.get('category', 'General')
-                    if category not in skills_by_category:
-                        skills_by_category[category] = []
-                    skills_by_category[category].append(skill.get('name', ''))
-
-                for category, skill_names in skills_by_category.items():
-                    cat_para = document.add_paragraph()
-                    cat_run = cat_para.add_run(f"{category}: ")
-                    cat_run.bold = True
-                    cat_para.add_run(', '.join(skill_names))
+            # Group skills by category
+            skills_by_category = {}
+            for skill in skills:
+                skills_by_category.setdefault(skill['category'], []).append(skill['name'])
+
+            for category, skill_names in skills_by_category.items():
+                cat_para = document.add_paragraph()
+                cat_run = cat_para.add_run(f"{category}: ")
+                cat_run.bold = True
+                cat_para.add_run(', '.join(skill_names))
 
             document.add_paragraph()  # Spacing
 
@@ -201,7 +357,7 @@ class CVExportService:
             for project in projects:
                 # Project title
                 title_para = document.add_paragraph()
-                title_run = title_para.add_run(project.get('name') or project.get('title', 'Project'))
+                title_run = title_para.add_run(project.get('name') or 'Project')
                 title_run.bold = True
                 title_run.font.size = Pt(12)
 
@@ -213,24 +369,13 @@ class CVExportService:
                 if project.get('technologies'):
                     tech_para = document.add_paragraph()
                     tech_para.add_run('Technologies: ').italic = True
-                    if isinstance(project['technologies'], list):
-                        tech_para.add_run(', '.join(project['technologies']))
-                    else:
-                        tech_para.add_run(project['technologies'])
-                elif project.get('tech'):
-                    tech_para = document.add_paragraph()
-                    tech_para.add_run('Technologies: ').italic = True
-                    tech_para.add_run(project['tech'])
+                    tech_para.add_run(', '.join(project['technologies']))
 
                 # Link
                 if project.get('url'):
                     link_para = document.add_paragraph()
                     link_para.add_run('Link: ').italic = True
                     link_para.add_run(project['url'])
-                elif project.get('link'):
-                    link_para = document.add_paragraph()
-                    link_para.add_run('Link: ').italic = True
-                    link_para.add_run(project['link'])
 
                 document.add_paragraph()  # Spacing
 
@@ -239,28 +384,21 @@ class CVExportService:
         document.save(docx_buffer)
         docx_buffer.seek(0)
 
-        # Generate filename
-        filename = CVExportService._generate_filename(cv, 'docx')
-
-        return docx_buffer, filename
+        return docx_buffer
 
     @staticmethod
     def _render_cv_html(cv: Any) -> str:
-        """Render CV as HTML using template."""
-        # Normalize sections data
+        """Render CV as HTML using template. Sections are stored in canonical form."""
         sections = cv.sections or {}
 
-        # Normalize skills format - convert array of strings to array of objects if needed
-        if 'skills' in sections and sections['skills']:
-            skills = sections['skills']
-            if skills and isinstance(skills[0], str):
-                # Convert array of strings to array of objects
-                sections['skills'] = [{'name': skill, 'category': 'General'} for skill in skills]
-
         context = {
             'cv': cv,
             'sections': sections,
             'template_key': cv.template_key,
+            # Fragment cache keys: the template file and each section's data
+            'template_digest': template_digest(cv.template_key),
+            'section_hashes': CVExportService._section_hashes(sections),
+            'fragment_timeout': settings.CV_FRAGMENT_CACHE_TIMEOUT,
         }
 
         # Choose template based on template_key
@@ -273,6 +411,15 @@ class CVExportService:
 
         return html
 
+    @staticmethod
+    def _section_hashes(sections: dict) -> dict:
+        """Hash the data of every fragment-cached section."""
+        hashes = {}
+        for name in FRAGMENT_SECTIONS:
+            encoded = json.dumps(sections.get(name), sort_keys=True, separators=(',', ':'), default=str)
+            hashes[name] = hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+        return hashes
+
     @staticmethod
     def _generate_filename(cv: Any, extension: str) -> str:
         """Generate filename for exported CV."""
@@ -0,0 +1,232 @@
+"""
+DOCX CV builder working from a prebuilt, pre-styled base document.
+
+The base document, including every paragraph and character style the CV
+uses, is built once per process. Each export deep-copies it instead of loading
+python-docx's default template again, and formatting is applied through style
+ids resolved once from the base rather than by setting font properties run by
+run. Ids are written directly because python-docx's ``style`` setters scan
+the whole style table for the default style on every assignment.
+"""
+import copy
+import threading
+from io import BytesIO
+from typing import Any, Dict
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt, RGBColor
+
+_lock = threading.Lock()
+_base_document = None
+_styles = None
+
+
+def _build_base_document():
+    """Create the base document and the styles used by the section builders."""
+    document = Document()
+    styles = document.styles
+
+    normal = styles['Normal']
+    normal.font.name = 'Calibri'
+    normal.font.size = Pt(11)
+
+    name_style = styles.add_style('CV Name', WD_STYLE_TYPE.PARAGRAPH)
+    name_style.base_style = styles['Heading 1']
+    name_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    centered = styles.add_style('CV Centered', WD_STYLE_TYPE.PARAGRAPH)
+    centered.base_style = normal
+    centered.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    entry_title = styles.add_style('CV Entry Title', WD_STYLE_TYPE.PARAGRAPH)
+    entry_title.base_style = normal
+    entry_title.font.bold = True
+    entry_title.font.size = Pt(12)
+
+    entry_subtitle = styles.add_style('CV Entry Subtitle', WD_STYLE_TYPE.PARAGRAPH)
+    entry_subtitle.base_style = normal
+    entry_subtitle.font.italic = True
+
+    entry_date = styles.add_style('CV Entry Date', WD_STYLE_TYPE.PARAGRAPH)
+    entry_date.base_style = normal
+    entry_date.font.color.rgb = RGBColor(100, 100, 100)
+
+    label = styles.add_style('CV Label', WD_STYLE_TYPE.CHARACTER)
+    label.font.italic = True
+
+    strong = styles.add_style('CV Strong', WD_STYLE_TYPE.CHARACTER)
+    strong.font.bold = True
+
+    # Style ids are identical in every copy of the base document
+    cached = {
+        'normal': normal,
+        'name': name_style,
+        'heading': styles['Heading 2'],
+        'centered': centered,
+        'entry_title': entry_title,
+        'entry_subtitle': entry_subtitle,
+        'entry_date': entry_date,
+        'label': label,
+        'strong': strong,
+    }
+    return document, {key: style.style_id for key, style in cached.items()}
+
+
+def _get_base():
+    global _base_document, _styles
+    with _lock:
+        if _base_document is None:
+            _base_document, _styles = _build_base_document()
+        return _base_document, _styles
+
+
+def new_document():
+    """Return a fresh copy of the base document and the cached style ids."""
+    base, styles = _get_base()
+    return copy.deepcopy(base), styles
+
+
+def _paragraph(document, text: str = '', style_id: str = None):
+    paragraph = document.add_paragraph(text)
+    if style_id:
+        paragraph._p.get_or_add_pPr().style = style_id
+    return paragraph
+
+
+def _run(paragraph, text: str, style_id: str = None):
+    run = paragraph.add_run(text)
+    if style_id:
+        run._r.get_or_add_rPr().style = style_id
+    return run
+
+
+def _add_personal(document, styles: Dict[str, str], personal: Dict[str, Any]) -> None:
+    if personal.get('name'):
+        _paragraph(document, personal['name'], styles['name'])
+
+    contact_parts = [personal[key] for key in ('email', 'phone', 'location') if personal.get(key)]
+    if contact_parts:
+        _paragraph(document, ' | '.join(contact_parts), styles['centered'])
+
+    links_parts = []
+    if personal.get('linkedin'):
+        links_parts.append(f"LinkedIn: {personal['linkedin']}")
+    if personal.get('github'):
+        links_parts.append(f"GitHub: {personal['github']}")
+    if personal.get('website'):
+        links_parts.append(f"Website: {personal['website']}")
+
+    if links_parts:
+        _paragraph(document, ' | '.join(links_parts), styles['centered'])
+
+    document.add_paragraph()  # Spacing
+
+
+def _add_experience(document, styles: Dict[str, str], experience: list) -> None:
+    _paragraph(document, 'Work Experience', styles['heading'])
+    for exp in experience:
+        _paragraph(document, exp.get('position') or 'Position', styles['entry_title'])
+        _paragraph(document, exp.get('company', 'Company'), styles['entry_subtitle'])
+
+        date_parts = []
+        start = exp.get('start_date')
+        end = exp.get('end_date')
+        if start:
+            date_parts.append(start)
+        if end:
+            date_parts.append(end)
+        elif start:
+            date_parts.append('Present')
+        if date_parts:
+            _paragraph(document, ' - '.join(date_parts), styles['entry_date'])
+
+        if exp.get('description'):
+            document.add_paragraph(exp['description'])
+
+        document.add_paragraph()  # Spacing between entries
+
+
+def _add_education(document, styles: Dict[str, str], education: list) -> None:
+    _paragraph(document, 'Education', styles['heading'])
+    for edu in education:
+        _paragraph(document, edu.get('degree', 'Degree'), styles['entry_title'])
+
+        if edu.get('institution'):
+            _paragraph(document, edu['institution'], styles['entry_subtitle'])
+
+        if edu.get('start_date') and edu.get('end_date'):
+            _paragraph(document, f"{edu['start_date']} - {edu['end_date']}", styles['entry_date'])
+        elif edu.get('end_date'):
+            _paragraph(document, edu['end_date'], styles['entry_date'])
+
+        if edu.get('description'):
+            document.add_paragraph(edu['description'])
+
+        document.add_paragraph()  # Spacing
+
+
+def _add_skills(document, styles: Dict[str, str], skills: list) -> None:
+    _paragraph(document, 'Skills', styles['heading'])
+
+    skills_by_category = {}
+    for skill in skills:
+        skills_by_category.setdefault(skill['category'], []).append(skill['name'])
+
+    for category, skill_names in skills_by_category.items():
+        paragraph = document.add_paragraph()
+        _run(paragraph, f"{category}: ", styles['strong'])
+        paragraph.add_run(', '.join(skill_names))
+
+    document.add_paragraph()  # Spacing
+
+
+def _add_projects(document, styles: Dict[str, str], projects: list) -> None:
+    _paragraph(document, 'Projects', styles['heading'])
+    for project in projects:
+        _paragraph(document, project.get('name') or 'Project', styles['entry_title'])
+
+        if project.get('description'):
+            document.add_paragraph(project['description'])
+
+        if project.get('technologies'):
+            paragraph = document.add_paragraph()
+            _run(paragraph, 'Technologies: ', styles['label'])
+            paragraph.add_run(', '.join(project['technologies']))
+
+        if project.get('url'):
+            paragraph = document.add_paragraph()
+            _run(paragraph, 'Link: ', styles['label'])
+            paragraph.add_run(project['url'])
+
+        document.add_paragraph()  # Spacing
+
+
+def build_docx(sections: Dict[str, Any]) -> BytesIO:
+    """Build a CV document from canonical sections and return it as a buffer."""
+    document, styles = new_document()
+
+    personal = sections.get('personal', {})
+    if personal:
+        _add_personal(document, styles, personal)
+
+    summary = sections.get('summary', '')
+    if summary:
+        _paragraph(document, 'Professional Summary', styles['heading'])
+        document.add_paragraph(summary)
+        document.add_paragraph()  # Spacing
+
+    if sections.get('experience'):
+        _add_experience(document, styles, sections['experience'])
+    if sections.get('education'):
+        _add_education(document, styles, sections['education'])
+    if sections.get('skills'):
+        _add_skills(document, styles, sections['skills'])
+    if sections.get('projects'):
+        _add_projects(document, styles, sections['projects'])
+
+    buffer = BytesIO()
+    document.save(buffer)
+    buffer.seek(0)
+    return buffer
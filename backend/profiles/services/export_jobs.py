@@ -0,0 +1,186 @@
+"""Database-backed queue for rendering CV exports in a background worker."""
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import CV, ExportJob
+from .cv_export_service import CVExportService, ExportedFile
+from .render_cache import get_render_cache
+from .storage import get_storage
+from .thumbnails import generate_thumbnail
+
+logger = logging.getLogger(__name__)
+
+RESULT_CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+}
+
+
+def enqueue_export(cv: CV, export_format: str) -> ExportJob:
+    """Queue an export of ``cv`` for the worker and return the job."""
+    return ExportJob.objects.create(user=cv.user, cv=cv, format=export_format)
+
+
+def schedule_prerender(cv: CV) -> None:
+    """
+    Queue background renders of the CV's exports after it has been saved.
+
+    Covers the ``CV_PRERENDER_FORMATS`` exports when pre-rendering is enabled
+    and the list thumbnail when thumbnails are enabled. Edits are debounced:
+    while a pre-render for the CV is still pending, each save pushes it back
+    by ``CV_PRERENDER_DEBOUNCE`` seconds, so only the last version in a burst
+    of edits is rendered. A job is not postponed past
+    ``CV_PRERENDER_MAX_DELAY`` seconds after it was first scheduled. Jobs read
+    the CV when they run, so a pending job always renders the latest version.
+    """
+    formats = list(settings.CV_PRERENDER_FORMATS) if settings.CV_PRERENDER_ENABLED else []
+    if settings.CV_THUMBNAILS_ENABLED:
+        formats.append('thumbnail')
+
+    now = timezone.now()
+    run_after = now + timedelta(seconds=settings.CV_PRERENDER_DEBOUNCE)
+    for export_format in formats:
+        pending = ExportJob.objects.filter(cv=cv, format=export_format, is_prerender=True, status='pending')
+        window_start = now - timedelta(seconds=settings.CV_PRERENDER_MAX_DELAY)
+        if pending.filter(created_at__gt=window_start).update(run_after=run_after) or pending.exists():
+            continue
+        ExportJob.objects.create(
+            user=cv.user, cv=cv, format=export_format, is_prerender=True, run_after=run_after
+        )
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Return jobs whose worker died mid-render to the pending state.
+
+    A job that has used up ``EXPORT_JOB_MAX_ATTEMPTS`` is marked failed
+    instead, so a document that keeps killing its worker (e.g. out of
+    memory) is not retried forever.
+    """
+    now = timezone.now()
+    stale = ExportJob.objects.filter(
+        status='running', started_at__lt=now - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    )
+    stale.filter(attempts__gte=settings.EXPORT_JOB_MAX_ATTEMPTS).update(
+        status='failed', error_message='The export worker stopped while rendering', finished_at=now
+    )
+    return stale.update(status='pending')
+
+
+def claim_next_job() -> Optional[ExportJob]:
+    """
+    Atomically take the oldest pending job that is due to run.
+
+    The conditional UPDATE makes claiming safe with several workers on any
+    database backend: only one of them sees a changed row.
+    """
+    while True:
+        job = (
+            ExportJob.objects.filter(status='pending', run_after__lte=timezone.now())
+            .order_by('run_after', 'created_at')
+            .first()
+        )
+        if job is None:
+            return None
+
+        claimed = ExportJob.objects.filter(id=job.id, status='pending').update(
+            status='running',
+            started_at=timezone.now(),
+            attempts=job.attempts + 1,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def result_key(job: ExportJob) -> str:
+    """Storage key of the rendered file of a job."""
+    return f'jobs/{job.id}.{job.format}'
+
+
+def run_job(job: ExportJob) -> ExportJob:
+    """
+    Render a claimed job and record the outcome.
+
+    The rendered file is written to storage, which the web and worker
+    processes share even when they run on different machines; PDFs are also
+    published as the CV's current version.
+    """
+    cv = job.cv
+    try:
+        # Key on the inputs before rendering, as the export service does;
+        # thumbnails are made from the cached PDF
+        cache_key = get_render_cache().key_for(cv, 'pdf' if job.format == 'thumbnail' else job.format)
+        if job.format == 'thumbnail':
+            generate_thumbnail(cv)
+            filename = ''
+        else:
+            exported = CVExportService.export_file(cv, job.format)
+            try:
+                if job.format == 'pdf':
+                    CVExportService.publish_pdf(cv, exported)
+                get_storage().save(result_key(job), exported.file, RESULT_CONTENT_TYPES[job.format])
+            finally:
+                exported.close()
+            filename = exported.filename
+
+        job.cache_key = cache_key
+        job.filename = filename
+        job.status = 'completed'
+        job.error_message = ''
+    except Exception as e:
+        logger.exception(f"Export job {job.id} failed: {str(e)}")
+        job.error_message = str(e)
+        if job.attempts < settings.EXPORT_JOB_MAX_ATTEMPTS:
+            job.status = 'pending'
+            # Back off so a render that keeps failing does not spin the worker
+            delay = settings.EXPORT_JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status = 'failed'
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'cache_key', 'filename', 'error_message', 'run_after', 'finished_at'])
+    return job
+
+
+def process_pending(max_jobs: Optional[int] = None) -> int:
+    """Drain the queue, returning the number of jobs processed."""
+    requeue_stale_jobs()
+
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def open_job_result(job: ExportJob) -> Optional[ExportedFile]:
+    """
+    Open the rendered file of a completed job for streaming.
+
+    Returns None if the file is no longer in storage; the caller should
+    ``requeue_job`` rather than render inline, which would block the request
+    and could return a newer version of the CV than the job rendered.
+    """
+    file = get_storage().open(result_key(job))
+    if file is None:
+        return None
+    return ExportedFile(file, job.filename, etag=job.cache_key or None)
+
+
+def requeue_job(job: ExportJob) -> ExportJob:
+    """Queue a completed job again, e.g. after its result was lost."""
+    job.status = 'pending'
+    job.attempts = 0
+    job.run_after = timezone.now()
+    job.finished_at = None
+    job.save(update_fields=['status', 'attempts', 'run_after', 'finished_at'])
+    return job
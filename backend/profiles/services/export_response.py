@@ -0,0 +1,121 @@
+"""HTTP responses that stream exported documents with conditional and range support."""
+import re
+from typing import Iterator, Optional, Tuple
+
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
+
+from .cv_export_service import ExportedFile
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def not_modified(request, etag: Optional[str]) -> Optional[HttpResponse]:
+    """Return a 304 response when the client already holds ``etag``."""
+    if not etag:
+        return None
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return None
+
+    tags = parse_etags(if_none_match)
+    if '*' in tags or quote_etag(etag) in tags:
+        response = HttpResponseNotModified()
+        response['ETag'] = quote_etag(etag)
+        return response
+    return None
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range`` header into an inclusive (start, end) pair.
+
+    Returns None when the header is absent or not a single byte range, in which
+    case the full document is served. Raises ValueError for unsatisfiable ranges.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Unsatisfiable range')
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+def _iter_range(exported: ExportedFile, start: int, length: int) -> Iterator[bytes]:
+    try:
+        exported.file.seek(start)
+        while length > 0:
+            chunk = exported.file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        exported.close()
+
+
+def build_export_response(request, exported: ExportedFile, content_type: str) -> HttpResponse:
+    """
+    Stream an exported document to the client.
+
+    The file is read in chunks straight from the render cache (or the render
+    buffer when caching is off). Requests carrying a matching ``If-None-Match``
+    get a 304 and single byte ``Range`` requests get a 206.
+    """
+    etag = quote_etag(exported.etag) if exported.etag else None
+
+    response = not_modified(request, exported.etag)
+    if response is not None:
+        exported.close()
+        return response
+
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range or (etag and if_range == etag):
+        try:
+            byte_range = _parse_range(request.META.get('HTTP_RANGE'), exported.size)
+        except ValueError:
+            exported.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{exported.size}'
+            return response
+
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_range(exported, start, length), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{exported.size}'
+        response['Content-Length'] = str(length)
+        response['Content-Disposition'] = content_disposition_header(True, exported.filename)
+    else:
+        response = FileResponse(
+            exported.file, as_attachment=True, filename=exported.filename, content_type=content_type
+        )
+        response.block_size = CHUNK_SIZE
+
+    response['Accept-Ranges'] = 'bytes'
+    if etag:
+        response['ETag'] = etag
+        # Let browsers keep the file but revalidate before reusing it
+        response['Cache-Control'] = 'private, no-cache'
+    return response
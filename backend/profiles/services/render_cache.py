@@ -0,0 +1,156 @@
+"""Content-addressed on-disk cache for rendered CV exports."""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Optional
+
+from django.conf import settings
+from django.template.loader import get_template
+
+# Bump when the renderers change in a way that alters output for the same input
+CACHE_VERSION = 3
+
+# Template digests keyed by (path, mtime) so edited templates invalidate entries
+_template_digests = {}
+
+
+def template_digest(template_key: str) -> str:
+    """Return a hash of the HTML template file used for ``template_key``."""
+    try:
+        path = get_template(f'cv/{template_key}.html').origin.name
+    except Exception:
+        path = get_template('cv/clean.html').origin.name
+
+    mtime = os.stat(path).st_mtime_ns
+    digest = _template_digests.get((path, mtime))
+    if digest is None:
+        with open(path, 'rb') as fh:
+            digest = hashlib.sha256(fh.read()).hexdigest()
+        _template_digests[(path, mtime)] = digest
+    return digest
+
+
+class RenderCache:
+    """
+    Stores rendered export bytes on disk, addressed by a hash of their inputs.
+
+    Recency is tracked through file mtimes so the cache is shared by every
+    worker process pointing at the same directory. Entries are evicted oldest
+    first whenever the total size or entry count exceeds its budget.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, max_entries: int, enabled: bool = True):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+    def key_for(self, cv: Any, extension: str) -> str:
+        """Build the cache key for exporting ``cv`` in the given format."""
+        payload = {
+            'version': CACHE_VERSION,
+            'format': extension,
+            'title': cv.title,
+            'template_key': cv.template_key,
+            'sections': cv.sections or {},
+        }
+        # Only the PDF and HTML output depend on the HTML template
+        if extension in ('pdf', 'html'):
+            payload['template'] = template_digest(cv.template_key)
+        else:
+            payload['engine'] = settings.CV_DOCX_ENGINE
+
+        encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str, extension: str) -> Path:
+        return self.root / key[:2] / f'{key}.{extension}'
+
+    def get_path(self, key: str, extension: str) -> Optional[Path]:
+        """Return the path of a cached entry and mark it as recently used."""
+        path = self.path_for(key, extension)
+        try:
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def open(self, key: str, extension: str) -> Optional[BinaryIO]:
+        """
+        Open a cached entry for streaming.
+
+        The returned handle stays valid even if the entry is evicted while it
+        is being read.
+        """
+        path = self.get_path(key, extension)
+        if path is None:
+            return None
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, extension: str, data: bytes) -> Path:
+        """Store rendered bytes atomically and enforce the cache budgets."""
+        path = self.path_for(key, extension)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        """Remove least recently used entries until both budgets are met."""
+        entries = []
+        total = 0
+        for path in self.root.glob('*/*'):
+            if path.name.startswith('.tmp-'):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, path, stat.st_size))
+            total += stat.st_size
+
+        entries.sort()
+        removed = 0
+        for _, path, size in entries:
+            if total <= self.max_bytes and len(entries) - removed <= self.max_entries:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for path in self.root.glob('*/*'):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def get_render_cache() -> RenderCache:
+    """Return the render cache configured in settings."""
+    return RenderCache(
+        root=settings.CV_RENDER_CACHE_DIR,
+        max_bytes=settings.CV_RENDER_CACHE_MAX_BYTES,
+        max_entries=settings.CV_RENDER_CACHE_MAX_ENTRIES,
+        enabled=settings.CV_RENDER_CACHE_ENABLED,
+    )
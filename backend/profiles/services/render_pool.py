@@ -0,0 +1,158 @@
+"""
+Pool of long-lived subprocesses that render PDFs outside the web worker.
+
+WeasyPrint holds the GIL for the whole render and leaves the process with a
+large heap afterwards. Running it in a separate pool lets renders use every
+core and keeps the API workers small. Each child is limited with RLIMIT_AS and
+a wall-clock alarm, and is replaced after a fixed number of renders.
+
+Functions executed in the children live at module level and must not touch
+Django, which is not configured there.
+"""
+import atexit
+import concurrent.futures
+import logging
+import multiprocessing
+import resource
+import signal
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RenderError(Exception):
+    """Raised when the render pool cannot produce a document."""
+
+
+class RenderTimeout(RenderError):
+    """Raised when a render exceeds its wall-clock limit."""
+
+
+def _init_worker(memory_limit_bytes: int, warm: bool) -> None:
+    """Apply the per-process address space limit and parse stylesheets in a fresh child."""
+    if memory_limit_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    if warm:
+        from .stylesheets import warm_stylesheets
+        warm_stylesheets()
+
+
+def _on_alarm(signum, frame):
+    raise RenderTimeout('Render exceeded its time limit')
+
+
+def _call_with_limits(fn: Callable, args: tuple, timeout: float) -> Any:
+    """Run ``fn`` in the child, interrupting it once ``timeout`` elapses."""
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _write_pdf(html: str, template_key: str) -> bytes:
+    from .stylesheets import write_pdf
+    return write_pdf(html, template_key)
+
+
+class RenderPool:
+    """
+    Bounded pool of render processes.
+
+    Children are started through a forkserver that has WeasyPrint imported, so
+    new or recycled workers do not pay the import cost again, and parse the
+    template stylesheets once when they start.
+    """
+
+    def __init__(self, workers: int, memory_limit_mb: int = 0, timeout: float = 30,
+                 max_renders_per_worker: Optional[int] = None,
+                 preload: Iterable[str] = ('weasyprint',), warm: bool = True):
+        self.workers = workers
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024
+        self.timeout = timeout
+        self.max_renders_per_worker = max_renders_per_worker or None
+        self.preload = list(preload)
+        self.warm = warm
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(self.preload)
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_bytes, self.warm),
+                    max_tasks_per_child=self.max_renders_per_worker,
+                )
+            return self._executor
+
+    def _discard_executor(self, executor, terminate: bool = False) -> None:
+        """Drop a broken or stuck executor so the next call starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        if terminate:
+            # A child that ignores its alarm (stuck in native code) has to be killed;
+            # the executor offers no public API for that before Python 3.14.
+            for process in list((getattr(executor, '_processes', None) or {}).values()):
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn: Callable, *args) -> Any:
+        """Execute ``fn(*args)`` in a pool process under the configured limits."""
+        executor = self._get_executor()
+        future = executor.submit(_call_with_limits, fn, args, self.timeout)
+        try:
+            # The child enforces the limit itself; the grace period covers queueing
+            return future.result(timeout=self.timeout * 2 + 5)
+        except concurrent.futures.TimeoutError:
+            logger.error('Render pool task did not return in time, restarting pool')
+            self._discard_executor(executor, terminate=True)
+            raise RenderTimeout('Render exceeded its time limit')
+        except BrokenProcessPool as e:
+            logger.error(f'Render pool process died: {str(e)}')
+            self._discard_executor(executor)
+            raise RenderError('Render process terminated unexpectedly') from e
+        except MemoryError as e:
+            raise RenderError('Render exceeded its memory limit') from e
+
+    def render_pdf(self, html: str, template_key: str) -> bytes:
+        """Render a CV template's HTML to PDF bytes in a pool process."""
+        return self.run(_write_pdf, html, template_key)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> Optional[RenderPool]:
+    """Return the process-wide render pool, or None when rendering in-process."""
+    global _pool
+    if settings.CV_RENDER_POOL_WORKERS <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool(
+                workers=settings.CV_RENDER_POOL_WORKERS,
+                memory_limit_mb=settings.CV_RENDER_POOL_MEMORY_LIMIT_MB,
+                timeout=settings.CV_RENDER_TIMEOUT,
+                max_renders_per_worker=settings.CV_RENDER_POOL_MAX_RENDERS,
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
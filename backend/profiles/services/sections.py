@@ -0,0 +1,119 @@
+"""
+Canonical schema for CV ``sections``.
+
+CVs are written by the frontend editor, by AI generation and by older code
+that used different field names. ``normalize_sections`` maps all of them onto
+one shape when a CV is saved, so templates and DOCX builders read canonical
+fields directly and never reshape data while rendering:
+
+    personal:       {name, title, email, phone, location, linkedin, github, website, photo}
+    summary:        str
+    experience:     [{position, company, start_date, end_date, location, description, achievements}]
+    education:      [{degree, institution, start_date, end_date, location, description}]
+    skills:         [{name, category, level}]
+    projects:       [{name, description, url, technologies}]
+    languages:      [{name, level}]
+    certifications: [{name, issuer, date, url}]
+
+Fields and sections outside the schema are kept unchanged.
+"""
+from typing import Any, Dict, List
+
+DEFAULT_SKILL_CATEGORY = 'General'
+
+# Alternative field name -> canonical field name, per list section
+ENTRY_ALIASES = {
+    'experience': {'title': 'position', 'start': 'start_date', 'end': 'end_date'},
+    'education': {'school': 'institution', 'year': 'end_date'},
+    'projects': {'title': 'name', 'link': 'url', 'tech': 'technologies'},
+    'languages': {'language': 'name', 'proficiency': 'level'},
+    'certifications': {'title': 'name'},
+}
+
+# personal.links key -> canonical personal field
+PERSONAL_LINKS = {'linkedin': 'linkedin', 'github': 'github', 'portfolio': 'website', 'website': 'website'}
+
+
+def _apply_aliases(entry: Dict[str, Any], aliases: Dict[str, str]) -> Dict[str, Any]:
+    entry = dict(entry)
+    for alias, canonical in aliases.items():
+        if alias in entry:
+            value = entry.pop(alias)
+            if not entry.get(canonical):
+                entry[canonical] = value
+    return entry
+
+
+def _normalize_personal(personal: Any) -> Dict[str, Any]:
+    if not isinstance(personal, dict):
+        return {}
+
+    personal = dict(personal)
+    links = personal.pop('links', None)
+    if isinstance(links, dict):
+        for key, canonical in PERSONAL_LINKS.items():
+            if links.get(key) and not personal.get(canonical):
+                personal[canonical] = links[key]
+    return personal
+
+
+def _normalize_skills(skills: Any) -> List[Dict[str, Any]]:
+    # AI generation returns {category: [names]}
+    if isinstance(skills, dict):
+        skills = [
+            {'name': name, 'category': str(category).title()}
+            for category, names in skills.items()
+            for name in (names or [])
+        ]
+
+    normalized = []
+    for skill in skills or []:
+        if isinstance(skill, str):
+            skill = {'name': skill}
+        elif not isinstance(skill, dict):
+            continue
+        skill = dict(skill)
+        if not skill.get('name'):
+            continue
+        skill['category'] = skill.get('category') or DEFAULT_SKILL_CATEGORY
+        normalized.append(skill)
+    return normalized
+
+
+def _normalize_entries(name: str, entries: Any) -> List[Dict[str, Any]]:
+    normalized = []
+    for entry in entries or []:
+        if isinstance(entry, str) and name in ('languages', 'certifications'):
+            entry = {'name': entry}
+        elif not isinstance(entry, dict):
+            continue
+        entry = _apply_aliases(entry, ENTRY_ALIASES[name])
+
+        if name == 'projects' and isinstance(entry.get('technologies'), str):
+            entry['technologies'] = [t.strip() for t in entry['technologies'].split(',') if t.strip()]
+        normalized.append(entry)
+    return normalized
+
+
+def normalize_sections(sections: Any) -> Dict[str, Any]:
+    """
+    Return a canonical copy of a CV ``sections`` payload.
+
+    The input is not modified. Raises ValueError if it is not a JSON object.
+    """
+    if sections is None:
+        return {}
+    if not isinstance(sections, dict):
+        raise ValueError('sections must be an object')
+
+    normalized = dict(sections)
+    if 'personal' in normalized:
+        normalized['personal'] = _normalize_personal(normalized['personal'])
+    if 'summary' in normalized:
+        normalized['summary'] = normalized['summary'] or ''
+    if 'skills' in normalized:
+        normalized['skills'] = _normalize_skills(normalized['skills'])
+    for name in ENTRY_ALIASES:
+        if name in normalized:
+            normalized[name] = _normalize_entries(name, normalized[name])
+    return normalized
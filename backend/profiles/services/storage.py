@@ -0,0 +1,246 @@
+"""
+Object storage for rendered exports.
+
+``LocalStorage`` keeps objects under a private directory; ``S3Storage`` talks
+to any S3-compatible service (AWS, MinIO, ...) with path-style requests signed
+with AWS Signature Version 4. Both expose the same small interface, selected
+with ``STORAGE_BACKEND``. Objects hold users' personal data, so they are only
+handed out through authenticated views or short-lived presigned URLs.
+"""
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+from urllib.parse import quote
+
+import httpx
+from django.conf import settings
+
+Content = Union[bytes, bytearray, memoryview, BinaryIO]
+
+# Downloads larger than this are spooled to a temporary file instead of memory
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+class StorageError(Exception):
+    """Raised when the storage backend rejects a request."""
+
+
+class LocalStorage:
+    """Stores objects as files below ``root``."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise StorageError(f'Invalid storage key: {key}')
+        return path
+
+    def save(self, key: str, content: Content, content_type: str = 'application/octet-stream') -> None:
+        """Write an object atomically, replacing any previous version."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                if isinstance(content, (bytes, bytearray, memoryview)):
+                    fh.write(content)
+                else:
+                    shutil.copyfileobj(content, fh)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        try:
+            return open(self._path(key), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def download_url(self, key: str, filename: str) -> Optional[str]:
+        """Local objects are streamed by the application, so there is nothing to redirect to."""
+        return None
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+class S3Storage:
+    """
+    Minimal client for an S3-compatible bucket.
+
+    Downloads are handed off to the storage service through presigned URLs so
+    document bytes do not pass through the Django workers.
+    """
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str,
+                 region: str = 'us-east-1', url_expiry: int = 3600,
+                 transport: Optional[httpx.BaseTransport] = None):
+        self.endpoint = endpoint.rstrip('/')
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.url_expiry = url_expiry
+        self._client = httpx.Client(transport=transport, timeout=30)
+
+    def _path(self, key: str) -> str:
+        return f'/{quote(self.bucket)}/{quote(key)}'
+
+    def _signature(self, method: str, path: str, query: str, headers: dict,
+                   payload_hash: str, amz_date: str) -> tuple:
+        """Return (credential scope, signed header names, signature) for a request."""
+        signed_headers = ';'.join(sorted(headers))
+        canonical_headers = ''.join(f'{name}:{headers[name].strip()}\n' for name in sorted(headers))
+        canonical_request = '\n'.join([method, path, query, canonical_headers, signed_headers, payload_hash])
+
+        date = amz_date[:8]
+        scope = f'{date}/{self.region}/s3/aws4_request'
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256',
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+        ])
+
+        key = _hmac(f'AWS4{self.secret_key}'.encode('utf-8'), date)
+        for part in (self.region, 's3', 'aws4_request'):
+            key = _hmac(key, part)
+        signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        return scope, signed_headers, signature
+
+    def _request(self, method: str, key: str, body: bytes = b'', content_type: Optional[str] = None,
+                 stream: bool = False) -> httpx.Response:
+        path = self._path(key)
+        amz_date = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        payload_hash = hashlib.sha256(body).hexdigest()
+
+        headers = {
+            'host': httpx.URL(self.endpoint).netloc.decode('ascii'),
+            'x-amz-content-sha256': payload_hash,
+            'x-amz-date': amz_date,
+        }
+        if content_type:
+            headers['content-type'] = content_type
+
+        scope, signed_headers, signature = self._signature(method, path, '', headers, payload_hash, amz_date)
+        headers['authorization'] = (
+            f'AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, '
+            f'SignedHeaders={signed_headers}, Signature={signature}'
+        )
+
+        try:
+            request = self._client.build_request(method, self.endpoint + path, content=body or None, headers=headers)
+            return self._client.send(request, stream=stream)
+        except httpx.HTTPError as e:
+            raise StorageError(f'Storage request failed: {str(e)}') from e
+
+    def save(self, key: str, content: Content, content_type: str = 'application/octet-stream') -> None:
+        body = bytes(content) if isinstance(content, (bytes, bytearray, memoryview)) else content.read()
+        response = self._request('PUT', key, body, content_type)
+        if response.status_code >= 300:
+            raise StorageError(f'Storage rejected upload of {key}: HTTP {response.status_code}')
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Download the object into a temporary file that spills to disk past ``SPOOL_MAX_SIZE``."""
+        response = self._request('GET', key, stream=True)
+        try:
+            if response.status_code == 404:
+                return None
+            if response.status_code >= 300:
+                raise StorageError(f'Storage rejected download of {key}: HTTP {response.status_code}')
+            file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            try:
+                for chunk in response.iter_bytes():
+                    file.write(chunk)
+            except httpx.HTTPError as e:
+                file.close()
+                raise StorageError(f'Storage download of {key} failed: {str(e)}') from e
+            file.seek(0)
+            return file
+        finally:
+            response.close()
+
+    def exists(self, key: str) -> bool:
+        response = self._request('HEAD', key)
+        if response.status_code == 404:
+            return False
+        if response.status_code >= 300:
+            raise StorageError(f'Storage rejected lookup of {key}: HTTP {response.status_code}')
+        return True
+
+    def delete(self, key: str) -> None:
+        response = self._request('DELETE', key)
+        if response.status_code >= 300 and response.status_code != 404:
+            raise StorageError(f'Storage rejected delete of {key}: HTTP {response.status_code}')
+
+    def download_url(self, key: str, filename: str) -> Optional[str]:
+        """Return a presigned GET URL that downloads the object as ``filename``."""
+        path = self._path(key)
+        amz_date = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        host = httpx.URL(self.endpoint).netloc.decode('ascii')
+
+        params = {
+            'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+            'X-Amz-Credential': f'{self.access_key}/{amz_date[:8]}/{self.region}/s3/aws4_request',
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': str(self.url_expiry),
+            'X-Amz-SignedHeaders': 'host',
+            'response-content-disposition': f'attachment; filename="{filename}"',
+        }
+        query = '&'.join(f'{quote(name, safe="-_.~")}={quote(value, safe="-_.~")}'
+                         for name, value in sorted(params.items()))
+
+        _, _, signature = self._signature('GET', path, query, {'host': host}, 'UNSIGNED-PAYLOAD', amz_date)
+        return f'{self.endpoint}{path}?{query}&X-Amz-Signature={signature}'
+
+
+_storage = None
+_storage_config = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Return the storage backend configured in settings, reusing its HTTP connections."""
+    global _storage, _storage_config
+    config = (
+        settings.STORAGE_BACKEND, settings.STORAGE_LOCAL_ROOT,
+        settings.STORAGE_ENDPOINT, settings.STORAGE_BUCKET, settings.STORAGE_ACCESS_KEY,
+        settings.STORAGE_SECRET_KEY, settings.STORAGE_REGION, settings.STORAGE_URL_EXPIRY,
+    )
+
+    with _storage_lock:
+        if _storage is None or _storage_config != config:
+            if settings.STORAGE_BACKEND == 's3':
+                _storage = S3Storage(
+                    endpoint=settings.STORAGE_ENDPOINT,
+                    bucket=settings.STORAGE_BUCKET,
+                    access_key=settings.STORAGE_ACCESS_KEY,
+                    secret_key=settings.STORAGE_SECRET_KEY,
+                    region=settings.STORAGE_REGION,
+                    url_expiry=settings.STORAGE_URL_EXPIRY,
+                )
+            else:
+                _storage = LocalStorage(root=settings.STORAGE_LOCAL_ROOT)
+            _storage_config = config
+        return _storage
@@ -0,0 +1,86 @@
+"""
+Per-thread cache of parsed CV stylesheets and font configuration.
+
+Every CV template embeds a large static ``<style>`` block. Instead of letting
+WeasyPrint parse it and rebuild the font configuration on each export, the CSS
+is parsed once into a ``CSS`` object sharing one ``FontConfiguration``, and the
+inline block is stripped before rendering.
+
+The cache is thread-local: WeasyPrint documents neither object as safe to
+share between threads, and a ``FontConfiguration`` is mutated while rendering
+(``@font-face`` rules are added to it). Render pool processes run one render
+at a time, so there it is effectively per process; in-process renders under
+gunicorn's ``--threads`` get one copy per thread.
+
+This module does not use Django so it can run inside render pool processes.
+"""
+import re
+import threading
+from pathlib import Path
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / 'templates' / 'cv'
+TEMPLATE_KEYS = ('clean', 'modern', 'professional', 'two-column')
+DEFAULT_TEMPLATE_KEY = 'clean'
+
+_STYLE_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL)
+
+_local = threading.local()
+
+
+def extract_template_css(template_key: str) -> str:
+    """Return the inline CSS of a CV template."""
+    path = TEMPLATE_DIR / f'{template_key}.html'
+    if not path.exists():
+        path = TEMPLATE_DIR / f'{DEFAULT_TEMPLATE_KEY}.html'
+    return '\n'.join(_STYLE_RE.findall(path.read_text(encoding='utf-8')))
+
+
+def strip_styles(html: str) -> str:
+    """Remove inline style blocks that are supplied as a cached stylesheet."""
+    return _STYLE_RE.sub('', html)
+
+
+def get_font_config():
+    """Return this thread's ``FontConfiguration``."""
+    font_config = getattr(_local, 'font_config', None)
+    if font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        font_config = _local.font_config = FontConfiguration()
+    return font_config
+
+
+def get_template_stylesheet(template_key: str):
+    """Return this thread's parsed ``CSS`` object for a template, parsing it on first use."""
+    if template_key not in TEMPLATE_KEYS:
+        template_key = DEFAULT_TEMPLATE_KEY
+
+    stylesheets = getattr(_local, 'stylesheets', None)
+    if stylesheets is None:
+        stylesheets = _local.stylesheets = {}
+
+    stylesheet = stylesheets.get(template_key)
+    if stylesheet is None:
+        from weasyprint import CSS
+        stylesheet = CSS(string=extract_template_css(template_key), font_config=get_font_config())
+        stylesheets[template_key] = stylesheet
+    return stylesheet
+
+
+def warm_stylesheets() -> None:
+    """
+    Parse every template stylesheet up front in the calling thread.
+
+    Other threads still parse their own copies, but fontconfig's font
+    discovery, the slow part of the first render, is shared by the process.
+    """
+    for template_key in TEMPLATE_KEYS:
+        get_template_stylesheet(template_key)
+
+
+def write_pdf(html: str, template_key: str) -> bytes:
+    """Render template HTML to PDF using the cached stylesheet and fonts."""
+    from weasyprint import HTML
+    return HTML(string=strip_styles(html)).write_pdf(
+        stylesheets=[get_template_stylesheet(template_key)],
+        font_config=get_font_config(),
+    )
@@ -0,0 +1,104 @@
+"""
+First-page thumbnails of rendered CVs for list views.
+
+Thumbnails are produced by the export worker from the cached PDF and stored
+under the PDF's render cache key, so a CV whose content has not changed never
+gets rasterized twice. Rasterizing uses pypdfium2.
+
+Stored thumbnails are served by the authenticated ``cv_thumbnail`` view;
+``thumbnail_url`` points there, with the stored name as a version parameter
+so browsers can cache each thumbnail indefinitely.
+"""
+import logging
+import re
+from io import BytesIO
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.urls import reverse
+from PIL import Image
+
+from .cv_export_service import CVExportService
+from .render_cache import get_render_cache
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'webp': 'image/webp',
+}
+
+
+_STORED_NAME = re.compile(r'[0-9a-f]{64}-\d+\.(png|webp)')
+
+
+class ThumbnailError(Exception):
+    """Raised when a PDF page cannot be rasterized."""
+
+
+def rasterize_first_page(pdf: bytes, width: int) -> Image.Image:
+    """Render the first page of a PDF to an image ``width`` pixels wide."""
+    import pypdfium2
+
+    try:
+        document = pypdfium2.PdfDocument(pdf)
+        try:
+            page = document[0]
+            return page.render(scale=width / page.get_width()).to_pil()
+        finally:
+            document.close()
+    except pypdfium2.PdfiumError as e:
+        raise ThumbnailError(f'PDF rasterizing failed: {str(e)}') from e
+
+
+def encode_thumbnail(image: Image.Image, image_format: str) -> bytes:
+    buffer = BytesIO()
+    if image_format == 'webp':
+        image.convert('RGB').save(buffer, format='WEBP', quality=80, method=4)
+    else:
+        image.convert('RGB').save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def thumbnail_key(cv: Any) -> str:
+    """Storage key of the thumbnail for the CV's current content."""
+    content_hash = get_render_cache().key_for(cv, 'pdf')
+    return f'thumbnails/{content_hash}-{settings.CV_THUMBNAIL_WIDTH}.{settings.CV_THUMBNAIL_FORMAT}'
+
+
+def stored_thumbnail_key(cv: Any) -> Optional[str]:
+    """Storage key of the thumbnail recorded in ``thumbnail_url``, or None."""
+    if not cv.thumbnail_url:
+        return None
+    name = parse_qs(urlsplit(cv.thumbnail_url).query).get('v', [''])[0]
+    return f'thumbnails/{name}' if _STORED_NAME.fullmatch(name) else None
+
+
+def generate_thumbnail(cv: Any) -> str:
+    """
+    Make sure a thumbnail of the CV's current content is stored and record its URL.
+
+    Returns:
+        The URL stored in ``thumbnail_url``
+    """
+    storage = get_storage()
+    key = thumbnail_key(cv)
+
+    if not storage.exists(key):
+        exported = CVExportService.export_file(cv, 'pdf')
+        try:
+            pdf = exported.file.read()
+        finally:
+            exported.close()
+
+        image = rasterize_first_page(pdf, settings.CV_THUMBNAIL_WIDTH)
+        image_format = settings.CV_THUMBNAIL_FORMAT
+        storage.save(key, encode_thumbnail(image, image_format), CONTENT_TYPES[image_format])
+        logger.info(f"Thumbnail generated for CV {cv.id}: {key}")
+
+    name = key.removeprefix('thumbnails/')
+    cv.thumbnail_url = f"{reverse('profiles:cv_thumbnail', kwargs={'cv_id': cv.id})}?v={name}"
+    cv.save(update_fields=['thumbnail_url'])
+    return cv.thumbnail_url
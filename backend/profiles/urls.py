@@ -6,9 +6,15 @@ app_name = 'profiles'
 urlpatterns = [
     path('profile/', views.profile_detail, name='profile_detail'),
     path('cvs/', views.cv_list, name='cv_list'),
+    path('cvs/bulk-export/', views.cv_bulk_export, name='cv_bulk_export'),
     path('cvs/<uuid:cv_id>/', views.cv_detail, name='cv_detail'),
     path('cvs/<uuid:cv_id>/export/', views.cv_export, name='cv_export'),
+    path('cvs/<uuid:cv_id>/preview.html', views.cv_preview, name='cv_preview'),
+    path('cvs/<uuid:cv_id>/thumbnail/', views.cv_thumbnail, name='cv_thumbnail'),
+    path('export-jobs/<uuid:job_id>/', views.export_job_detail, name='export_job_detail'),
+    path('export-jobs/<uuid:job_id>/download/', views.export_job_download, name='export_job_download'),
     path('cvs/<uuid:cv_id>/enhance/', views.enhance_cv_section_with_ai, name='enhance_cv_section'),
+    path('cvs/<uuid:cv_id>/enhance/stream/', views.enhance_cv_section_stream, name='enhance_cv_section_stream'),
     path('cvs/generate/', views.generate_cv_with_ai, name='generate_cv_ai'),
     path('cvs/generate-preview/', views.generate_cv_preview, name='generate_cv_preview'),
     path('export/', views.export_data, name='export_data'),
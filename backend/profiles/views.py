@@ -1,18 +1,31 @@
+import json
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils.http import quote_etag
 
-from .models import Profile, CV
-from .serializers import ProfileSerializer, CVSerializer, CVCreateSerializer, CVUpdateSerializer
+from .models import Profile, CV, ExportJob
+from .serializers import ProfileSerializer, CVSerializer, CVCreateSerializer, CVUpdateSerializer, ExportJobSerializer
+from .services.bulk_export import iter_zip
+from .services.export_jobs import enqueue_export, schedule_prerender
 from .services.cv_export_service import CVExportService
+from .services.export_response import build_export_response, not_modified
+from .services.sections import normalize_sections
 from authz.models import AuditEvent, DeletionRequest
 from authz.serializers import UserSerializer
 from interview.models import InterviewSession
 from trainer.models import TrainerResult
+from config.admission import AdmissionRejected, admitted, hold_until_closed
+from config.singleflight import SingleFlightTimeout, input_hash, remember, single_flight
+from llm.sse import completion_events, sse_response
 
 
 @api_view(['GET', 'PUT'])
@@ -66,6 +79,7 @@ def cv_list(request):
         serializer = CVCreateSerializer(data=request.data)
         if serializer.is_valid():
             cv = serializer.save(user=request.user)
+            schedule_prerender(cv)
 
             # Create audit event
             AuditEvent.objects.create(
@@ -94,6 +108,8 @@ def cv_detail(request, cv_id):
             # Track version and changes
             old_data = CVSerializer(cv).data
             cv.version += 1
+            # Published PDF belongs to the previous version
+            cv.rendered_pdf_url = None
 
             changelog_entry = {
                 'version': cv.version,
@@ -116,6 +132,9 @@ def cv_detail(request, cv_id):
                 cv.changelog = changelog[-50:]  # Keep last 50 versions
                 cv.save()
 
+            # Render the new version in the background so the next download is instant
+            schedule_prerender(cv)
+
             # Create audit event
             AuditEvent.objects.create(
                 user=request.user,
@@ -131,27 +150,55 @@ def cv_detail(request, cv_id):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+EXPORT_CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+}
+
+
+def _json_error(message, status_code):
+    return HttpResponse(
+        json.dumps({'error': message}),
+        content_type='application/json',
+        status=status_code
+    )
+
+
+def _wants_link(request):
+    """Whether the client asked for the storage download URL as JSON instead of the document."""
+    return request.GET.get('link') == '1'
+
+
+def _accepts_redirect(request):
+    """Whether the client can follow a redirect to another origin and still save the download."""
+    return request.GET.get('redirect') == '1' or request.headers.get('Sec-Fetch-Mode') == 'navigate'
+
+
 def cv_export(request, cv_id):
-    """Export CV to PDF or DOCX format. Pure Django view without DRF."""
+    """
+    Export CV to PDF or DOCX format. Pure Django view without DRF.
+
+    GET streams the document, rendering it first unless it is cached, and
+    honours ``If-None-Match`` and ``Range``. Rendered PDFs are published to
+    storage; a published PDF the render cache no longer holds is streamed
+    from storage. When the storage backend offers presigned URLs, requests
+    with ``link=1`` get ``{"download_url": ...}`` as JSON and browser
+    navigations or ``redirect=1`` are redirected, so the document bytes do
+    not pass through the worker. POST with ``async=1`` queues an export job
+    for ``run_export_worker`` and returns its id for polling.
+    """
     import logging
-    import json
     logger = logging.getLogger(__name__)
 
     # Check authentication manually (since we're not using DRF decorators)
     if not request.user.is_authenticated:
-        return HttpResponse(
-            json.dumps({'error': 'Authentication required'}),
-            content_type='application/json',
-            status=401
-        )
+        return _json_error('Authentication required', 401)
 
-    # Only allow GET requests
-    if request.method != 'GET':
-        return HttpResponse(
-            json.dumps({'error': 'Method not allowed'}),
-            content_type='application/json',
-            status=405
-        )
+    is_async = request.method == 'POST' and (request.GET.get('async') or request.POST.get('async')) == '1'
+
+    # Only allow GET requests, or POST for asynchronous exports
+    if request.method != 'GET' and not is_async:
+        return _json_error('Method not allowed', 405)
 
     logger.info(f"CV Export request - cv_id: {cv_id}, user: {request.user}")
 
@@ -161,31 +208,32 @@ def cv_export(request, cv_id):
         logger.info(f"CV found: {cv.title}")
     except CV.DoesNotExist:
         logger.error(f"CV not found or access denied: {cv_id}")
-        return HttpResponse(
-            json.dumps({'error': 'CV not found'}),
-            content_type='application/json',
-            status=404
-        )
+        return _json_error('CV not found', 404)
 
     # Get format from query parameter (default to pdf)
-    export_format = request.GET.get('format', 'pdf').lower()
+    export_format = (request.GET.get('format') or request.POST.get('format') or 'pdf').lower()
+
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return _json_error('Invalid format. Use "pdf" or "docx".', 400)
+
+    if is_async:
+        job = enqueue_export(cv, export_format)
 
-    if export_format not in ['pdf', 'docx']:
-        return HttpResponse(
-            json.dumps({'error': 'Invalid format. Use "pdf" or "docx".'}),
-            content_type='application/json',
-            status=400
+        AuditEvent.objects.create(
+            user=request.user,
+            type='cv_export',
+            payload={'cv_id': str(cv.id), 'format': export_format, 'job_id': str(job.id)}
         )
 
-    try:
-        # Export CV using the service
-        if export_format == 'pdf':
-            file_buffer, filename = CVExportService.export_to_pdf(cv)
-            content_type = 'application/pdf'
-        else:  # docx
-            file_buffer, filename = CVExportService.export_to_docx(cv)
-            content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        logger.info(f"Export job queued: {job.id}")
+        return JsonResponse(ExportJobSerializer(job).data, status=202)
 
+    # Client already holds this exact document
+    response = not_modified(request, CVExportService.export_etag(cv, export_format))
+    if response is not None:
+        return response
+
+    try:
         # Create audit event
         AuditEvent.objects.create(
             user=request.user,
@@ -193,23 +241,246 @@ def cv_export(request, cv_id):
             payload={'cv_id': str(cv.id), 'format': export_format}
         )
 
-        logger.info(f"Export successful: {filename}")
-
-        # Return file as response
-        file_data = file_buffer.getvalue()
-        response = HttpResponse(file_data, content_type=content_type)
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response['Content-Length'] = len(file_data)
-        return response
+        exported = None
+        if export_format == 'pdf':
+            # Published PDFs are downloaded straight from storage when the client can
+            # take a link or follow a redirect
+            wants_link = _wants_link(request)
+            download_url = None
+            if wants_link or _accepts_redirect(request):
+                download_url = CVExportService.stored_pdf_download_url(cv)
+            if download_url:
+                logger.info(f"Export served from storage: {cv.id} v{cv.version}")
+                if wants_link:
+                    return JsonResponse({'download_url': download_url})
+                return HttpResponseRedirect(download_url)
+            # The local render cache is cheaper than a storage download
+            exported = CVExportService.open_cached(cv, 'pdf') or CVExportService.open_stored_pdf(cv)
+
+        if exported is None:
+            # Export CV using the service
+            exported = CVExportService.export_file(cv, export_format)
+
+            if export_format == 'pdf':
+                try:
+                    CVExportService.publish_pdf(cv, exported)
+                except Exception as e:
+                    logger.warning(f"Could not publish PDF of {cv.id} to storage: {str(e)}")
+
+        logger.info(f"Export successful: {exported.filename}")
+
+        # Stream file as response
+        return build_export_response(request, exported, EXPORT_CONTENT_TYPES[export_format])
 
     except Exception as e:
         logger.exception(f"Export failed: {str(e)}")
-        return HttpResponse(
-            json.dumps({'error': f'Export failed: {str(e)}'}),
-            content_type='application/json',
-            status=500
+        return _json_error(f'Export failed: {str(e)}', 500)
+
+
+def cv_preview(request, cv_id):
+    """
+    Render a CV as HTML for previewing. Pure Django view without DRF.
+
+    GET renders the saved CV and honours ``If-None-Match``. POST renders an
+    unsaved draft: a JSON body with any of ``title``, ``template_key`` and
+    ``sections`` overrides the stored values without changing the CV.
+    """
+    if not request.user.is_authenticated:
+        return _json_error('Authentication required', 401)
+
+    if request.method not in ('GET', 'POST'):
+        return _json_error('Method not allowed', 405)
+
+    try:
+        cv = CV.objects.get(id=cv_id, user=request.user)
+    except CV.DoesNotExist:
+        return _json_error('CV not found', 404)
+
+    if request.method == 'POST':
+        try:
+            draft = json.loads(request.body or b'{}')
+        except ValueError:
+            return _json_error('Invalid JSON body', 400)
+        if not isinstance(draft, dict):
+            return _json_error('Invalid draft', 400)
+        try:
+            sections = normalize_sections(draft['sections']) if 'sections' in draft else cv.sections
+        except ValueError as e:
+            return _json_error(str(e), 400)
+
+        cv = CV(
+            id=cv.id,
+            user=cv.user,
+            title=draft.get('title', cv.title),
+            template_key=draft.get('template_key', cv.template_key),
+            sections=sections,
+            version=cv.version,
         )
 
+    etag = CVExportService.export_etag(cv, 'html')
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    response = HttpResponse(CVExportService.render_preview(cv), content_type='text/html; charset=utf-8')
+    if etag:
+        response['ETag'] = quote_etag(etag)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cv_thumbnail(request, cv_id):
+    """
+    Serve the stored first-page thumbnail of a CV. Pure Django view without DRF.
+
+    ``thumbnail_url`` links here with the stored name as ``v``, so the image
+    never changes for a given URL and may be cached by the browser.
+    """
+    from .services.storage import get_storage
+    from .services.thumbnails import CONTENT_TYPES, stored_thumbnail_key
+
+    if not request.user.is_authenticated:
+        return _json_error('Authentication required', 401)
+
+    if request.method != 'GET':
+        return _json_error('Method not allowed', 405)
+
+    try:
+        cv = CV.objects.get(id=cv_id, user=request.user)
+    except CV.DoesNotExist:
+        return _json_error('CV not found', 404)
+
+    key = stored_thumbnail_key(cv)
+    if key is None:
+        return _json_error('CV has no thumbnail', 404)
+
+    etag = key.removeprefix('thumbnails/')
+    response = not_modified(request, etag)
+    if response is None:
+        file = get_storage().open(key)
+        if file is None:
+            return _json_error('CV has no thumbnail', 404)
+        with file:
+            response = HttpResponse(file.read(), content_type=CONTENT_TYPES[key.rpartition('.')[2]])
+        response['ETag'] = quote_etag(etag)
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+def _is_list_of_strings(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def cv_bulk_export(request):
+    """
+    Export many CVs as a streamed ZIP archive. Pure Django view without DRF.
+
+    Expects a JSON body ``{"cv_ids": [...], "formats": ["pdf", "docx"]}``.
+    Without ``cv_ids`` every CV of the user is exported; staff may pass
+    ``user_id`` to export another user's CVs or any ``cv_ids``.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+
+    if not request.user.is_authenticated:
+        return _json_error('Authentication required', 401)
+
+    if request.method != 'POST':
+        return _json_error('Method not allowed', 405)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return _json_error('Invalid JSON body', 400)
+    if not isinstance(payload, dict):
+        return _json_error('Invalid JSON body', 400)
+
+    formats = payload.get('formats') or ['pdf']
+    if not _is_list_of_strings(formats) or any(f.lower() not in EXPORT_CONTENT_TYPES for f in formats):
+        return _json_error('Invalid format. Use "pdf" or "docx".', 400)
+    formats = list(dict.fromkeys(f.lower() for f in formats))
+
+    cv_ids = payload.get('cv_ids')
+    if cv_ids is not None and not _is_list_of_strings(cv_ids):
+        return _json_error('cv_ids must be a list of CV ids', 400)
+
+    cvs = CV.objects.all()
+    if not request.user.is_staff:
+        cvs = cvs.filter(user=request.user)
+    elif payload.get('user_id'):
+        cvs = cvs.filter(user_id=payload['user_id'])
+    elif not payload.get('cv_ids'):
+        cvs = cvs.filter(user=request.user)
+
+    if cv_ids:
+        cv_ids = list(dict.fromkeys(cv_ids))
+        try:
+            cvs = list(cvs.filter(id__in=cv_ids))
+        except ValidationError:
+            return _json_error('Invalid CV id', 400)
+        if len(cvs) != len(cv_ids):
+            return _json_error('CV not found', 404)
+    else:
+        cvs = list(cvs)
+
+    if not cvs:
+        return _json_error('No CVs to export', 404)
+
+    if len(cvs) > settings.CV_BULK_EXPORT_MAX_CVS:
+        return _json_error(f'Too many CVs. At most {settings.CV_BULK_EXPORT_MAX_CVS} per request.', 400)
+
+    AuditEvent.objects.create(
+        user=request.user,
+        type='cv_export',
+        payload={'cv_ids': [str(cv.id) for cv in cvs], 'formats': formats, 'bulk': True}
+    )
+
+    logger.info(f"Bulk export request - {len(cvs)} CV(s), formats: {formats}, user: {request.user}")
+
+    archive_name = f"cvs_{timezone.now().strftime('%Y%m%d')}.zip"
+    response = StreamingHttpResponse(
+        iter_zip(cvs, formats, max_workers=settings.CV_BULK_EXPORT_CONCURRENCY),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{archive_name}"'
+    # Documents are rendered while the archive streams
+    return hold_until_closed(response)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_job_detail(request, job_id):
+    """Get the status of a queued CV export."""
+    job = get_object_or_404(ExportJob, id=job_id, user=request.user)
+    return Response(ExportJobSerializer(job).data)
+
+
+def export_job_download(request, job_id):
+    """Download the result of a completed export job. Pure Django view without DRF."""
+    if not request.user.is_authenticated:
+        return _json_error('Authentication required', 401)
+
+    if request.method != 'GET':
+        return _json_error('Method not allowed', 405)
+
+    try:
+        job = ExportJob.objects.select_related('cv').get(id=job_id, user=request.user)
+    except ExportJob.DoesNotExist:
+        return _json_error('Export job not found', 404)
+
+    if job.format not in EXPORT_CONTENT_TYPES:
+        return _json_error('Export job has no downloadable file', 404)
+
+    if job.status != 'completed':
+        return _json_error(f'Export job is {job.status}', 409)
+
+    from .services.export_jobs import open_job_result, requeue_job
+    exported = open_job_result(job)
+    if exported is None:
+        requeue_job(job)
+        return _json_error('Export result is no longer available and has been queued again', 409)
+    return build_export_response(request, exported, EXPORT_CONTENT_TYPES[job.format])
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -249,15 +520,61 @@ def export_data(request):
     return Response(export_data_dict)
 
 
+def _generation_key(request, profile):
+    """Single-flight key of a CV generation: user, request body and the profile it starts from."""
+    snapshot = {
+        field: getattr(profile, field)
+        for field in ('summary', 'experience', 'education', 'skills', 'projects', 'links')
+    }
+    return f'generate_cv:{request.user.id}:{input_hash(request.data, snapshot)}'
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generate_cv_with_ai(request):
-    """Generate CV content using AI based on profile data."""
-    from .services.cv_ai_service import generate_cv_content
+    """
+    Generate CV content using AI based on profile data.
 
-    # Get profile
+    Identical requests (double clicks, client retries) are coalesced across
+    workers: one generates, the others wait for it and return its response.
+    Only the generating request takes a ``generate_cv`` admission slot.
+    """
     profile, _ = Profile.objects.get_or_create(user=request.user)
 
+    def generate():
+        with admitted('generate_cv'):
+            return _generate_cv_with_ai(request, profile)
+
+    key = _generation_key(request, profile)
+    try:
+        (data, status_code), shared = single_flight(key, generate)
+    except SingleFlightTimeout:
+        return Response(
+            {'error': 'The same CV generation is already in progress. Please try again shortly.'},
+            status=status.HTTP_409_CONFLICT
+        )
+    except AdmissionRejected as e:
+        return Response(
+            {'error': 'Server is busy. Please try again later.'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(e.retry_after)}
+        )
+
+    if not shared:
+        if status_code < 300:
+            # A retry now sees the profile as updated by this generation
+            remember(_generation_key(request, profile), (data, status_code))
+        else:
+            # Waiters poll for the result, so keep the error long enough for
+            # them to see it; a later retry tries again
+            remember(key, (data, status_code), settings.SINGLE_FLIGHT_ERROR_TTL)
+    return Response(data, status=status_code)
+
+
+def _generate_cv_with_ai(request, profile):
+    """Run one CV generation; returns the response body and status code."""
+    from .services.cv_ai_service import generate_cv_content
+
     # Get job description from request if provided
     job_description = request.data.get('job_description', '')
     cv_title = request.data.get('title', 'AI Generated CV')
@@ -282,9 +599,9 @@ def generate_cv_with_ai(request):
 
     # Check for errors
     if 'error' in generated_content:
-        return Response(
+        return (
             {'error': generated_content['error'], 'message': generated_content.get('message', '')},
-            status=status.HTTP_503_SERVICE_UNAVAILABLE
+            status.HTTP_503_SERVICE_UNAVAILABLE
         )
 
     # Process skills format
@@ -373,7 +690,7 @@ def generate_cv_with_ai(request):
         profile.save()
 
     # Create CV with generated content
-    cv_sections = {
+    cv_sections = normalize_sections({
         'personal': {
             'name': profile_data['full_name'],
             'email': profile_data['email'],
@@ -388,7 +705,7 @@ def generate_cv_with_ai(request):
         'projects': generated_content.get('projects', []),
         'languages': [],
         'certifications': []
-    }
+    })
 
     # Handle CV creation/update based on parameters
     cv = None
@@ -402,24 +719,26 @@ def generate_cv_with_ai(request):
             cv.template_key = template_key
             cv.sections = cv_sections
             cv.version += 1
+            cv.rendered_pdf_url = None
             cv.save()
             is_update = True
         except CV.DoesNotExist:
-            return Response(
-                {'error': 'CV not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+            return {'error': 'CV not found'}, status.HTTP_404_NOT_FOUND
     elif replace_existing:
-        # Delete all existing CVs for this user before creating new one
-        deleted_count = CV.objects.filter(user=request.user).delete()[0]
-
-        # Create new CV
-        cv = CV.objects.create(
-            user=request.user,
-            title=cv_title,
-            template_key=template_key,
-            sections=cv_sections
-        )
+        # Concurrent generations for the same user take turns replacing the CVs,
+        # so neither deletes the CV the other just created
+        with transaction.atomic():
+            Profile.objects.select_for_update().filter(pk=profile.pk).first()
+            # Delete all existing CVs for this user before creating new one
+            CV.objects.filter(user=request.user).delete()
+
+            # Create new CV
+            cv = CV.objects.create(
+                user=request.user,
+                title=cv_title,
+                template_key=template_key,
+                sections=cv_sections
+            )
     else:
         # Just create a new CV without deleting old ones
         cv = CV.objects.create(
@@ -429,6 +748,8 @@ def generate_cv_with_ai(request):
             sections=cv_sections
         )
 
+    schedule_prerender(cv)
+
     # Create audit event
     audit_payload = {
         'cv_id': str(cv.id),
@@ -456,7 +777,7 @@ def generate_cv_with_ai(request):
 
     # Return appropriate status code
     status_code = status.HTTP_200_OK if is_update else status.HTTP_201_CREATED
-    return Response(response_data, status=status_code)
+    return dict(response_data), status_code
 
 
 @api_view(['POST'])
@@ -561,6 +882,45 @@ def enhance_cv_section_with_ai(request, cv_id):
     })
 
 
+async def enhance_cv_section_stream(request, cv_id):
+    """
+    Stream an AI enhancement of a CV section as Server-Sent Events.
+
+    Async view without DRF: takes the same body as ``enhance_cv_section_with_ai``
+    and sends ``{"token": ...}`` events followed by a ``done`` event with the
+    full enhanced text.
+    """
+    from .services.cv_ai_service import stream_enhance_cv_section
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _json_error('Authentication required', 401)
+    if request.method != 'POST':
+        return _json_error('Method not allowed', 405)
+
+    cv = await CV.objects.filter(id=cv_id, user=user).afirst()
+    if cv is None:
+        return _json_error('CV not found', 404)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return _json_error('Invalid JSON body', 400)
+
+    section_name = data.get('section')
+    context = data.get('context', '')
+
+    if not section_name:
+        return _json_error('section parameter is required', 400)
+
+    current_content = (cv.sections or {}).get(section_name, '')
+    if not current_content:
+        return _json_error(f'Section {section_name} is empty or does not exist', 400)
+
+    pieces = stream_enhance_cv_section(section_name, current_content, context)
+    return sse_response(completion_events(pieces, 'enhanced', {'section': section_name}))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def erase_data(request):
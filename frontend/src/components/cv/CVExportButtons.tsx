@@ -18,23 +18,31 @@ export default function CVExportButtons({ cvId }: CVExportButtonsProps) {
 
     try {
       console.log(`[CVExport] Calling exportCV service...`);
-      const { blob, filename } = await profileService.exportCV(cvId, format);
-
-      console.log(`[CVExport] Received blob:`, {
-        size: blob.size,
-        type: blob.type,
-        filename: filename
-      });
-
-      // Verify we got data
-      if (blob.size === 0) {
-        throw new Error('Received empty file');
+      const exported = await profileService.exportCV(cvId, format);
+      const { filename } = exported;
+
+      let url: string;
+      if ('downloadUrl' in exported) {
+        // Published PDF: the browser downloads it straight from storage
+        url = exported.downloadUrl;
+      } else {
+        const { blob } = exported;
+        console.log(`[CVExport] Received blob:`, {
+          size: blob.size,
+          type: blob.type,
+          filename: filename
+        });
+
+        // Verify we got data
+        if (blob.size === 0) {
+          throw new Error('Received empty file');
+        }
+
+        // Create a download link
+        url = window.URL.createObjectURL(blob);
+        console.log(`[CVExport] Created blob URL: ${url}`);
       }
 
-      // Create a download link
-      const url = window.URL.createObjectURL(blob);
-      console.log(`[CVExport] Created blob URL: ${url}`);
-
       const link = document.createElement('a');
       link.href = url;
       link.download = filename;
@@ -51,7 +59,7 @@ export default function CVExportButtons({ cvId }: CVExportButtonsProps) {
       // Cleanup after a short delay
       setTimeout(() => {
         document.body.removeChild(link);
-        window.URL.revokeObjectURL(url);
+        if (!('downloadUrl' in exported)) window.URL.revokeObjectURL(url);
         console.log(`[CVExport] Cleanup completed`);
       }, 100);
 
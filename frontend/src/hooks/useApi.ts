@@ -99,16 +99,16 @@ export function useExportCV() {
   return useMutation({
     mutationFn: ({ id, format }: { id: string; format: 'pdf' | 'docx' }) =>
       profileService.exportCV(id, format),
-    onSuccess: ({ blob, filename }) => {
+    onSuccess: (exported) => {
       // Automatically download the file
-      const url = URL.createObjectURL(blob);
+      const url = 'downloadUrl' in exported ? exported.downloadUrl : URL.createObjectURL(exported.blob);
       const link = document.createElement('a');
       link.href = url;
-      link.download = filename;
+      link.download = exported.filename;
       document.body.appendChild(link);
       link.click();
       document.body.removeChild(link);
-      URL.revokeObjectURL(url);
+      if ('blob' in exported) URL.revokeObjectURL(url);
     },
   });
 }
@@ -122,11 +122,23 @@ export function useInterviewSessions() {
   });
 }
 
+// Poll every 2s for the first minute, then every 10s; give up after ~10 minutes
+const FEEDBACK_FAST_POLLS = 30;
+const FEEDBACK_MAX_POLLS = 90;
+
 export function useInterviewSession(sessionId: string) {
   return useQuery({
     queryKey: ['interview-session', sessionId],
     queryFn: () => interviewService.getSession(sessionId),
     enabled: !!sessionId,
+    // AI feedback is generated in the background after submit
+    refetchInterval: (query) => {
+      const status = query.state.data?.ai_feedback_status;
+      if (status !== 'pending' && status !== 'running') return false;
+      const polls = query.state.dataUpdateCount;
+      if (polls >= FEEDBACK_MAX_POLLS) return false;
+      return polls < FEEDBACK_FAST_POLLS ? 2000 : 10000;
+    },
   });
 }
 
@@ -29,7 +29,10 @@ export default function CVMaster() {
         summary: cv.sections.summary,
         experience: cv.sections.experience,
         education: cv.sections.education,
-        skills: cv.sections.skills,
+        // Stored skills are {name, category} objects; the editor works with names
+        skills: (cv.sections.skills || []).map((skill: string | { name: string }) =>
+          typeof skill === 'string' ? skill : skill.name
+        ),
         projects: cv.sections.projects,
         languages: cv.sections.languages,
         certifications: cv.sections.certifications,
@@ -7,7 +7,7 @@ import { CheckCircle, XCircle, Lightbulb, TrendingUp, RefreshCw, Star } from 'lu
 export default function InterviewResults() {
   const { sessionId } = useParams<{ sessionId: string }>();
   const navigate = useNavigate();
-  const { data: session, isLoading, error } = useInterviewSession(sessionId || '');
+  const { data: session, isLoading, error, refetch, isFetching } = useInterviewSession(sessionId || '');
   const [isRetaking, setIsRetaking] = useState(false);
 
   useEffect(() => {
@@ -150,6 +150,21 @@ export default function InterviewResults() {
         </div>
       )}
 
+      {/* AI feedback still being generated */}
+      {(session.ai_feedback_status === 'pending' || session.ai_feedback_status === 'running') && (
+        <div className="bg-white rounded-lg shadow p-6 mb-8 flex items-center gap-3">
+          <div className="animate-spin rounded-full h-6 w-6 border-b-2 border-blue-600"></div>
+          <p className="text-gray-700">Generating AI feedback...</p>
+          <button
+            onClick={() => refetch()}
+            disabled={isFetching}
+            className="ml-auto text-sm text-blue-600 hover:underline disabled:opacity-50"
+          >
+            Check again
+          </button>
+        </div>
+      )}
+
       {/* AI Feedback */}
       {ai_feedback && (
         <div className="space-y-6">
@@ -113,8 +113,13 @@ export async function updateCV(id: string, payload: Record<string, unknown>) {
   });
   return handleResponse(res);
 }
-export async function exportCV(id: string, format: 'pdf' | 'docx') {
-  const url = `${API_ORIGIN}/api/cvs/${id}/export/?format=${format}`;
+// Published PDFs come back as a presigned storage URL, other exports as the file itself
+export type ExportedCV =
+  | { blob: Blob; filename: string }
+  | { downloadUrl: string; filename: string };
+
+export async function exportCV(id: string, format: 'pdf' | 'docx'): Promise<ExportedCV> {
+  const url = `${API_ORIGIN}/api/cvs/${id}/export/?format=${format}&link=1`;
   console.log(`[API] exportCV: Fetching ${url}`);
 
   const res = await fetch(url, {
@@ -130,6 +135,13 @@ export async function exportCV(id: string, format: 'pdf' | 'docx') {
     throw error;
   }
 
+  if ((res.headers.get('content-type') || '').includes('application/json')) {
+    // The storage URL sets its own Content-Disposition filename
+    const { download_url: downloadUrl } = await res.json();
+    console.log(`[API] exportCV: Downloading from storage`);
+    return { downloadUrl, filename: '' };
+  }
+
   // Return blob for download
   const blob = await res.blob();
   console.log(`[API] exportCV: Blob received, size=${blob.size}, type=${blob.type}`);
@@ -44,6 +44,7 @@ export interface InterviewSession {
   feedback?: string;
   ai_feedback?: AIFeedback;
   detailed_review?: DetailedReview[];
+  ai_feedback_status?: 'none' | 'pending' | 'running' | 'completed' | 'failed';
   checklist?: ChecklistItem[];
   can_retake?: boolean;
   created_at: string;
@@ -51,6 +51,7 @@ export interface CV {
   template_key: 'clean' | 'two-column' | 'modern' | 'professional';
   sections: Omit<CVFormData, 'title' | 'template_key'>;
   rendered_pdf_url?: string;
+  thumbnail_url?: string | null;
   version: number;
   changelog: Array<Record<string, unknown>>;
   created_at: string;
@@ -86,7 +87,7 @@ export const profileService = {
     return api.deleteCV(id);
   },
 
-  async exportCV(id: string, format: 'pdf' | 'docx'): Promise<{ blob: Blob; filename: string }> {
+  async exportCV(id: string, format: 'pdf' | 'docx'): Promise<api.ExportedCV> {
     return api.exportCV(id, format);
   },
 
@@ -44,6 +44,7 @@ export interface CV {
   template_key: 'clean' | 'two-column' | 'modern' | 'professional';
   sections: CVSections;
   rendered_pdf_url?: string;
+  thumbnail_url?: string | null;
   version?: number;
   created_at?: string;
   updated_at?: string;